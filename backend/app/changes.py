@@ -0,0 +1,128 @@
+"""In-memory change feed behind the GET /api/changes Server-Sent Events stream.
+
+Writes publish compact events ({"collection", "op", "id", "version"}) with
+increasing sequence numbers. The most recent events are kept in a ring
+buffer so a reconnecting client can resume from its Last-Event-ID; if the
+events it missed are gone it is told to reset (refetch) instead.
+"""
+
+import asyncio
+import threading
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+# Event op that tells clients to discard their copy of the dataset
+RESET = "reset"
+
+
+class ChangeFeed:
+    """Ring buffer of change events for one dataset, with async waiters.
+
+    publish() may be called from any thread; waiters are woken on their own
+    event loops.
+    """
+
+    def __init__(self, max_events: int = 1000):
+        # Distinguishes sequence numbers of this process from a previous one
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events: Deque[Tuple[int, dict]] = deque(maxlen=max_events)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    @property
+    def listeners(self) -> int:
+        """Number of streams waiting for the next event."""
+        with self._lock:
+            return len(self._waiters)
+
+    def event_id(self, seq: int) -> str:
+        """Format a sequence number as an SSE event ID."""
+        return f"{self.epoch}-{seq}"
+
+    def parse_event_id(self, event_id: str) -> Optional[int]:
+        """Get the sequence number of an event ID from this feed, else None."""
+        epoch, _, seq = event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def publish(self, events: List[dict]):
+        """Append events and wake every waiter."""
+        if not events:
+            return
+        with self._lock:
+            for event in events:
+                self._last_seq += 1
+                self._events.append((self._last_seq, event))
+            waiters = list(self._waiters)
+        for loop, wakeup in waiters:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def since(self, seq: int) -> Optional[List[Tuple[int, dict]]]:
+        """Get the events after seq, or None if some of them were already dropped."""
+        with self._lock:
+            if seq > self._last_seq:
+                return None
+            oldest = self._events[0][0] if self._events else self._last_seq + 1
+            if seq + 1 < oldest:
+                return None
+            return [(s, event) for s, event in self._events if s > seq]
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """Wait until an event after seq is published.
+
+        Returns:
+            False if the timeout passed first
+        """
+        wakeup = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), wakeup)
+        with self._lock:
+            if self._last_seq > seq:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+class ChangeRecorder:
+    """Collects the records a write endpoint changed, published once it succeeds."""
+
+    def __init__(self):
+        self.changes: List[Tuple[str, str, str, Optional[str]]] = []
+
+    def created(self, collection: str, record_id: str):
+        self.changes.append((collection, "create", record_id, None))
+
+    def updated(self, collection: str, record_id: str, previous_id: Optional[str] = None):
+        """Record an update; pass previous_id if the record's ID changed."""
+        if previous_id == record_id:
+            previous_id = None
+        self.changes.append((collection, "update", record_id, previous_id))
+
+    def deleted(self, collection: str, record_id: str):
+        self.changes.append((collection, "delete", record_id, None))
+
+    def collections(self) -> Set[str]:
+        return {collection for collection, *_ in self.changes}
+
+    def events(self, versions: Dict[str, str]) -> List[dict]:
+        """Build the change events, given the new version of each changed collection."""
+        events = []
+        for collection, op, record_id, previous_id in self.changes:
+            event = {"collection": collection, "op": op, "id": record_id, "version": versions[collection]}
+            if previous_id is not None:
+                event["previousId"] = previous_id
+            events.append(event)
+        return events
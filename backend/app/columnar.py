@@ -0,0 +1,701 @@
+"""Columnar store of user needs for filtering and aggregation.
+
+Each need is a row and every field is a column. The fields with recurring
+values (userGroupId, workflowPhase, sla, fromState, toState and the items of
+entities and constraints) are dictionary-encoded as integer codes into one
+shared copy of each distinct string, with -1 for None. The boolean flags are
+int8 columns (1, 0, or -1 for None) and the two lists are stored CSR-style:
+the codes of every row in one array, delimited by per-row offsets. IDs,
+titles and descriptions are plain lists. Filters are vectorised comparisons
+over the code columns, so they keep no hash set per value, and pivots
+bincount a flat index combining several code columns. The /api/statistics
+counts are the one exception: they are kept per value and adjusted by each
+added or removed row, so reading them never scans the table.
+
+The columns are the only copy of the needs: the table keeps no UserNeed
+models, builds the ones it returns from the columns on each call, and only
+reads the models it is given. TableDataStore holds a dataset whose needs
+are kept this way.
+
+Rows are append-only: updating a need kills its row and appends a new one
+with the same list position, and the table is compacted once dead rows
+outnumber live ones.
+"""
+
+import threading
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from pydantic import BaseModel, TypeAdapter
+
+from .models import DataStore, Entity, UserGroup, UserNeed, UserSuperGroup, WorkflowPhase
+from .pagination import SortKey, page_needs
+
+# Boolean flag columns
+FLAGS = ("refined", "optional", "futureFeature", "triggersStateChange")
+
+# Dimensions needs can be cross-tabulated by
+DIMENSIONS = ("userGroup", "superGroup", "workflowPhase", "entity") + FLAGS
+
+# Dead rows tolerated before compaction, on top of the number of live rows
+COMPACT_MIN_DEAD = 1024
+
+# Flag column values: -1 stands for None
+_FLAG_VALUES = {-1: None, 0: False, 1: True}
+
+# Builds the UserNeed models of a batch of rows
+_NEEDS = TypeAdapter(List[UserNeed])
+
+
+def _add(index: Dict[str, Set[str]], key: Optional[str], value: str):
+    """Add value to the bucket for key."""
+    if key is None:
+        return
+    index.setdefault(key, set()).add(value)
+
+
+def _discard(index: Dict[str, Set[str]], key: Optional[str], value: str):
+    """Remove value from the bucket for key, dropping empty buckets."""
+    bucket = index.get(key)
+    if bucket is None:
+        return
+    bucket.discard(value)
+    if not bucket:
+        del index[key]
+
+
+def _increment(counts: Dict[str, int], key: str, delta: int):
+    """Adjust a counter, dropping keys that reach zero."""
+    value = counts.get(key, 0) + delta
+    if value > 0:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+class Column:
+    """Growable one-dimensional NumPy array."""
+
+    def __init__(self, dtype, capacity: int = 1024):
+        self._data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def _reserve(self, size: int):
+        if size > len(self._data):
+            grown = np.empty(max(size, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+
+    def append(self, value):
+        self._reserve(self.size + 1)
+        self._data[self.size] = value
+        self.size += 1
+
+    def extend(self, values):
+        self._reserve(self.size + len(values))
+        self._data[self.size:self.size + len(values)] = values
+        self.size += len(values)
+
+    def take(self, rows: np.ndarray) -> "Column":
+        """Get a new column holding the values at the given rows."""
+        column = Column(self._data.dtype, max(len(rows), 1024))
+        column.extend(self.values[rows])
+        return column
+
+    @property
+    def values(self) -> np.ndarray:
+        """View of the filled part of the column."""
+        return self._data[:self.size]
+
+
+class Categories:
+    """Dictionary encoding of a categorical column: each distinct value gets an integer code."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        """Get the code of value, assigning the next one to a new value (-1 for None)."""
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, codes: np.ndarray) -> List[Optional[str]]:
+        """Get the values of an array of codes (None for -1)."""
+        values = self.values
+        return [values[code] if code >= 0 else None for code in codes.tolist()]
+
+    def counts(self, codes: np.ndarray) -> Dict[str, int]:
+        """Count the occurrences of each value in an array of codes (values that occur only)."""
+        counts = np.bincount(codes, minlength=len(self.values))
+        return {self.values[code]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+
+class ListColumn:
+    """CSR column of string lists, dictionary-encoded.
+
+    The codes of row r are codes[offsets[r]:offsets[r + 1]]; rows holds the
+    row of each code for vectorised scatters, and present is False for rows
+    whose list is None.
+    """
+
+    def __init__(self, categories: Categories):
+        self.categories = categories
+        self.offsets = Column(np.int64)
+        self.offsets.append(0)
+        self.codes = Column(np.int32)
+        self.rows = Column(np.int32)
+        self.present = Column(np.bool_)
+
+    def extend(self, lists: List[Optional[List[str]]], first_row: int):
+        """Append the lists of consecutive rows, starting at first_row."""
+        codes, rows, offsets = [], [], []
+        offset = self.codes.size
+        for row, values in enumerate(lists, first_row):
+            if values:
+                encoded = [self.categories.encode(value) for value in values]
+                codes += encoded
+                rows += [row] * len(encoded)
+                offset += len(encoded)
+            offsets.append(offset)
+        self.offsets.extend(offsets)
+        self.codes.extend(codes)
+        self.rows.extend(rows)
+        self.present.extend([values is not None for values in lists])
+
+    def _slots(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the index of every code of the given rows (row after row), the
+        length of each row's list and the cumulative lengths."""
+        starts = self.offsets.values[rows]
+        lengths = self.offsets.values[rows + 1] - starts
+        ends = np.cumsum(lengths)
+        slots = np.repeat(starts - (ends - lengths), lengths) + np.arange(int(ends[-1]) if len(ends) else 0)
+        return slots, lengths, ends
+
+    def take(self, rows: np.ndarray) -> "ListColumn":
+        """Get a new column holding the lists of the given rows, renumbered from 0."""
+        slots, lengths, ends = self._slots(rows)
+        column = ListColumn(self.categories)
+        column.offsets.extend(ends)
+        column.codes.extend(self.codes.values[slots])
+        column.rows.extend(np.repeat(np.arange(len(rows), dtype=np.int32), lengths))
+        column.present.extend(self.present.values[rows])
+        return column
+
+    def lists(self, rows: np.ndarray) -> List[Optional[List[str]]]:
+        """Get the lists of the given rows."""
+        # Decode the codes of every selected row at once, then split them by row
+        slots, lengths, ends = self._slots(rows)
+        values = self.categories.values
+        flat = [values[code] for code in self.codes.values[slots].tolist()]
+        bounds = ends.tolist()
+        present = self.present.values[rows].tolist()
+        return [
+            flat[end - length:end] if has else None
+            for end, length, has in zip(bounds, lengths.tolist(), present)
+        ]
+
+
+class _Key(NamedTuple):
+    """The fields of a row that the listing sort orders use."""
+    id: str
+    userGroupId: str
+    workflowPhase: str
+    row: int
+
+
+class NeedTable:
+    """Columnar store of user needs, kept in sync through apply_need_change.
+
+    Answers the list_user_needs filters, the /api/statistics aggregates and
+    the /api/statistics/pivot cross-tabulations.
+    Results are returned in the DataStore's list order.
+    """
+
+    def __init__(self, needs: Iterable[UserNeed], user_groups: Iterable[UserGroup]):
+        """Load the needs (read once, in list order) and the superGroup of each user group."""
+        self._lock = threading.RLock()
+        self.user_groups = Categories()
+        self.workflow_phases = Categories()
+        self.entities = Categories()
+        self.constraints = Categories()
+        self.slas = Categories()
+        self.states = Categories()
+        self.user_groups_by_super_group: Dict[str, Set[str]] = {}
+        # Counts of the live rows by value, adjusted as rows are added and killed
+        self._by_user_group: Dict[str, int] = {}
+        self._by_workflow_phase: Dict[str, int] = {}
+        self._by_entity: Dict[str, int] = {}
+        self._reset()
+        self._load((need, position) for position, need in enumerate(needs))
+        self._next_position = len(self._ids)
+        for user_group in user_groups:
+            _add(self.user_groups_by_super_group, user_group.superGroup, user_group.id)
+
+    def _reset(self):
+        """Start with empty columns (the categories and positions carry over)."""
+        # Row -> need ID (None once the row is dead) and need ID -> live row
+        self._ids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self._dead = 0
+        self._alive = Column(np.bool_)
+        # List positions: increasing in list order, kept by updates
+        self._position = Column(np.int64)
+        self._titles: List[str] = []
+        self._descriptions: List[str] = []
+        self._user_group = Column(np.int32)
+        self._workflow_phase = Column(np.int32)
+        self._sla = Column(np.int32)
+        self._from_state = Column(np.int32)
+        self._to_state = Column(np.int32)
+        self._flags = {flag: Column(np.int8) for flag in FLAGS}
+        self._entities = ListColumn(self.entities)
+        self._constraints = ListColumn(self.constraints)
+
+    def _load(self, needs: Iterable[Tuple[UserNeed, int]]):
+        """Append (need, list position) rows, filling the columns in bulk."""
+        first_row = len(self._ids)
+        positions, user_groups, workflow_phases, slas, from_states, to_states = [], [], [], [], [], []
+        entities, constraints = [], []
+        flags: Dict[str, list] = {flag: [] for flag in FLAGS}
+        row = first_row
+        for need, position in needs:
+            self._ids.append(need.id)
+            self.rows[need.id] = row
+            row += 1
+            positions.append(position)
+            self._titles.append(need.title)
+            self._descriptions.append(need.description)
+            user_groups.append(self.user_groups.encode(need.userGroupId))
+            workflow_phases.append(self.workflow_phases.encode(need.workflowPhase))
+            slas.append(self.slas.encode(need.sla))
+            from_states.append(self.states.encode(need.fromState))
+            to_states.append(self.states.encode(need.toState))
+            for flag in FLAGS:
+                value = getattr(need, flag)
+                flags[flag].append(-1 if value is None else int(value))
+            entities.append(need.entities)
+            constraints.append(need.constraints)
+
+        self._alive.extend([True] * len(positions))
+        self._position.extend(positions)
+        self._user_group.extend(user_groups)
+        self._workflow_phase.extend(workflow_phases)
+        self._sla.extend(slas)
+        self._from_state.extend(from_states)
+        self._to_state.extend(to_states)
+        for flag in FLAGS:
+            self._flags[flag].extend(flags[flag])
+        first_entity = self._entities.codes.size
+        self._entities.extend(entities, first_row)
+        self._constraints.extend(constraints, first_row)
+
+        for counts, categories, codes in (
+            (self._by_user_group, self.user_groups, self._user_group.values[first_row:]),
+            (self._by_workflow_phase, self.workflow_phases, self._workflow_phase.values[first_row:]),
+            (self._by_entity, self.entities, self._entities.codes.values[first_entity:]),
+        ):
+            for value, count in categories.counts(codes).items():
+                _increment(counts, value, count)
+
+    def _append(self, need: UserNeed, position: Optional[int] = None):
+        """Add a need as a new row (at the end of the list unless a position is given)."""
+        if position is None:
+            position = self._next_position
+            self._next_position += 1
+        self._load([(need, position)])
+
+    def _kill(self, need_id: str) -> int:
+        """Mark the row of a need dead, returning its list position."""
+        row = self.rows.pop(need_id)
+        self._ids[row] = None
+        self._alive.values[row] = False
+        self._dead += 1
+        _increment(self._by_user_group, self.user_groups.values[self._user_group.values[row]], -1)
+        _increment(self._by_workflow_phase, self.workflow_phases.values[self._workflow_phase.values[row]], -1)
+        offsets = self._entities.offsets.values
+        for code in self._entities.codes.values[offsets[row]:offsets[row + 1]].tolist():
+            _increment(self._by_entity, self.entities.values[code], -1)
+        return int(self._position.values[row])
+
+    def _compact(self):
+        """Rebuild the columns from the live rows, in list order."""
+        rows = self._live_rows()
+        ids, titles, descriptions = self._ids, self._titles, self._descriptions
+        columns = {
+            name: getattr(self, name).take(rows)
+            for name in ("_position", "_user_group", "_workflow_phase", "_sla", "_from_state", "_to_state")
+        }
+        flags = {flag: column.take(rows) for flag, column in self._flags.items()}
+        entities, constraints = self._entities.take(rows), self._constraints.take(rows)
+
+        self._reset()
+        selected = rows.tolist()
+        self._ids = [ids[row] for row in selected]
+        self._titles = [titles[row] for row in selected]
+        self._descriptions = [descriptions[row] for row in selected]
+        self.rows = {need_id: row for row, need_id in enumerate(self._ids)}
+        self._alive.extend(np.ones(len(selected), dtype=np.bool_))
+        for name, column in columns.items():
+            setattr(self, name, column)
+        self._flags = flags
+        self._entities, self._constraints = entities, constraints
+
+    def _live_rows(self) -> np.ndarray:
+        """Get the live rows in list order."""
+        rows = np.flatnonzero(self._alive.values)
+        return rows[np.argsort(self._position.values[rows], kind="stable")]
+
+    def _records(self, rows: np.ndarray) -> List[dict]:
+        """Rebuild the fields of the given rows, as UserNeed dicts."""
+        selected = rows.tolist()
+        ids, titles, descriptions = self._ids, self._titles, self._descriptions
+        flags = {flag: [_FLAG_VALUES[v] for v in self._flags[flag].values[rows].tolist()] for flag in FLAGS}
+        columns = zip(
+            [ids[row] for row in selected],
+            self.user_groups.decode(self._user_group.values[rows]),
+            [titles[row] for row in selected],
+            [descriptions[row] for row in selected],
+            self._entities.lists(rows),
+            self.workflow_phases.decode(self._workflow_phase.values[rows]),
+            flags["refined"],
+            self.slas.decode(self._sla.values[rows]),
+            flags["triggersStateChange"],
+            self.states.decode(self._from_state.values[rows]),
+            self.states.decode(self._to_state.values[rows]),
+            flags["optional"],
+            flags["futureFeature"],
+            self._constraints.lists(rows),
+        )
+        fields = tuple(UserNeed.model_fields)
+        return [dict(zip(fields, values)) for values in columns]
+
+    def _needs(self, rows) -> List[UserNeed]:
+        """Build the UserNeed models of the given rows."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return []
+        return _NEEDS.validate_python(self._records(rows))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get(self, need_id: str) -> Optional[UserNeed]:
+        """Look up a need by ID."""
+        with self._lock:
+            row = self.rows.get(need_id)
+            return self._needs([row])[0] if row is not None else None
+
+    def position(self, need_id: str) -> int:
+        """Get the list position of a need (increasing in list order)."""
+        with self._lock:
+            return int(self._position.values[self.rows[need_id]])
+
+    def needs(self) -> List[UserNeed]:
+        """Get every need, in list order."""
+        with self._lock:
+            return self._needs(self._live_rows())
+
+    def records(self) -> List[dict]:
+        """Get every need as a dict (as UserNeed.model_dump would), in list order."""
+        with self._lock:
+            return self._records(self._live_rows())
+
+    def apply_need_change(self, old: Optional[UserNeed], new: Optional[UserNeed]):
+        """Update the table for a created (old=None), updated or deleted (new=None) need."""
+        with self._lock:
+            position = self._kill(old.id) if old is not None else None
+            if new is not None:
+                self._append(new, position)
+            if self._dead > len(self.rows) + COMPACT_MIN_DEAD:
+                self._compact()
+
+    def apply_user_group_change(self, old: Optional[UserGroup], new: Optional[UserGroup]):
+        """Update the superGroup -> userGroups mapping for a changed user group."""
+        with self._lock:
+            if old is not None:
+                _discard(self.user_groups_by_super_group, old.superGroup, old.id)
+            if new is not None:
+                _add(self.user_groups_by_super_group, new.superGroup, new.id)
+
+    def _mask(
+        self,
+        userGroupId: Optional[str] = None,
+        entity: Optional[str] = None,
+        workflowPhase: Optional[str] = None,
+        superGroup: Optional[str] = None,
+        refined: Optional[str] = None
+    ) -> np.ndarray:
+        """Get a boolean mask of the live rows matching all given filters."""
+        mask = self._alive.values.copy()
+        if userGroupId:
+            mask &= self._user_group.values == self.user_groups.codes.get(userGroupId, -1)
+        if workflowPhase:
+            mask &= self._workflow_phase.values == self.workflow_phases.codes.get(workflowPhase, -1)
+        if entity:
+            code = self.entities.codes.get(entity, -1)
+            with_entity = np.zeros(len(mask), dtype=np.bool_)
+            with_entity[self._entities.rows.values[self._entities.codes.values == code]] = True
+            mask &= with_entity
+        if superGroup:
+            codes = [
+                self.user_groups.codes[group_id]
+                for group_id in self.user_groups_by_super_group.get(superGroup, ())
+                if group_id in self.user_groups.codes
+            ]
+            mask &= np.isin(self._user_group.values, codes)
+        if refined == 'refined':
+            mask &= self._flags["refined"].values == 1
+        elif refined == 'needsRefinement':
+            mask &= self._flags["refined"].values != 1
+        return mask
+
+    def _rows(self, **filters) -> np.ndarray:
+        """Get the rows matching the filters, in list order."""
+        rows = np.flatnonzero(self._mask(**filters))
+        return rows[np.argsort(self._position.values[rows], kind="stable")]
+
+    def filter_ids(self, **filters) -> Set[str]:
+        """Get the IDs of needs matching all given filters (unordered).
+
+        Takes the same arguments as filter.
+        """
+        with self._lock:
+            ids = self._ids
+            return {ids[row] for row in np.flatnonzero(self._mask(**filters)).tolist()}
+
+    def filter(
+        self,
+        userGroupId: Optional[str] = None,
+        entity: Optional[str] = None,
+        workflowPhase: Optional[str] = None,
+        superGroup: Optional[str] = None,
+        refined: Optional[str] = None
+    ) -> List[UserNeed]:
+        """Get needs matching all given filters, in list order.
+
+        Args:
+            userGroupId: Filter by user group ID
+            entity: Filter by entity ID
+            workflowPhase: Filter by workflow phase ID
+            superGroup: Filter by super group
+            refined: Filter by refinement status ('refined' or 'needsRefinement')
+
+        Returns:
+            List of matching user needs
+        """
+        with self._lock:
+            return self._needs(self._rows(
+                userGroupId=userGroupId,
+                entity=entity,
+                workflowPhase=workflowPhase,
+                superGroup=superGroup,
+                refined=refined
+            ))
+
+    def page(
+        self,
+        phase_order: Dict[str, int],
+        sort: Optional[str] = None,
+        after: Optional[SortKey] = None,
+        limit: Optional[int] = None,
+        **filters
+    ) -> Tuple[List[UserNeed], Optional[SortKey]]:
+        """Get a page of the needs matching the filters (see pagination.page_needs).
+
+        Only the needs on the page are built, and the sort keys are read under
+        the same lock, so they stay consistent under concurrent writes.
+
+        Args:
+            phase_order: Workflow phase ID -> order, for the workflowPhase sort
+            sort: One of pagination.SORT_ORDERS, or None for list order
+            after: Sort key of the last item of the previous page
+            limit: Maximum page size, or None for no limit
+            **filters: Same keyword filters as filter
+
+        Returns:
+            The page and, if more items follow, the sort key of its last item
+        """
+        with self._lock:
+            rows = self._rows(**filters)
+            ids = self._ids
+            user_groups = self.user_groups.decode(self._user_group.values[rows])
+            workflow_phases = self.workflow_phases.decode(self._workflow_phase.values[rows])
+            selected = rows.tolist()
+            keys = [
+                (_Key(ids[row], user_group, workflow_phase, row), position)
+                for row, user_group, workflow_phase, position in zip(
+                    selected, user_groups, workflow_phases, self._position.values[rows].tolist()
+                )
+            ]
+            page, last_key = page_needs(keys, phase_order, sort, after, limit)
+            return self._needs([key.row for key in page]), last_key
+
+    def _dimension(self, dimension: str, rows: np.ndarray, slots: np.ndarray) -> Tuple[np.ndarray, list]:
+        """Get the per-record codes of a crosstab dimension and the value of each code."""
+        if dimension == "userGroup":
+            return self._user_group.values[rows], self.user_groups.values
+        if dimension == "workflowPhase":
+            return self._workflow_phase.values[rows], self.workflow_phases.values
+        if dimension == "entity":
+            return self._entities.codes.values[slots], self.entities.values
+        if dimension == "superGroup":
+            # Map user group codes to super groups; None for groups without one
+            super_groups = list(self.user_groups_by_super_group)
+            lookup = np.full(len(self.user_groups.values), len(super_groups), dtype=np.int64)
+            for i, super_group in enumerate(super_groups):
+                for group_id in self.user_groups_by_super_group[super_group]:
+                    code = self.user_groups.codes.get(group_id)
+                    if code is not None:
+                        lookup[code] = i
+            return lookup[self._user_group.values[rows]], super_groups + [None]
+        # Flags: code 0 is True, code 1 is False or None
+        return (self._flags[dimension].values[rows] != 1).astype(np.int64), [True, False]
+
+    def crosstab(self, dimensions: List[str], orders: Dict[str, list]) -> Tuple[np.ndarray, List[list], int]:
+        """Count the live needs by every combination of the given dimensions.
+
+        With "entity" among the dimensions each (need, entity) pair is counted,
+        so needs without entities are left out and needs with several are
+        counted once per entity.
+
+        Args:
+            dimensions: Dimensions from DIMENSIONS, one per axis of the result
+            orders: Axis values per dimension in the order to report them; values
+                the needs use but the order lacks are appended. Dimensions
+                without an order report the values the needs use.
+
+        Returns:
+            Dense count array with one axis per dimension, the values along
+            each axis, and the number of distinct needs counted
+        """
+        with self._lock:
+            alive = self._alive.values
+            slots = None
+            if "entity" in dimensions:
+                slots = np.flatnonzero(alive[self._entities.rows.values])
+                rows = self._entities.rows.values[slots]
+                needs = int(np.count_nonzero(np.bincount(rows)))
+            else:
+                rows = np.flatnonzero(alive)
+                needs = len(rows)
+
+            # Fold the axis indexes of each record into one flat index (row-major)
+            flat = np.zeros(len(rows), dtype=np.int64)
+            axes = []
+            for dimension in dimensions:
+                codes, values = self._dimension(dimension, rows, slots)
+                used = np.bincount(codes, minlength=len(values)) > 0
+                axis = list(orders.get(dimension, ()))
+                positions = {value: i for i, value in enumerate(axis)}
+                lookup = np.zeros(len(values), dtype=np.int64)
+                for code, value in enumerate(values):
+                    i = positions.get(value)
+                    if i is None:
+                        if not used[code]:
+                            continue
+                        i = positions[value] = len(axis)
+                        axis.append(value)
+                    lookup[code] = i
+                flat = flat * len(axis) + lookup[codes]
+                axes.append(axis)
+
+        shape = [len(axis) for axis in axes]
+        counts = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+        return counts, axes, needs
+
+    def snapshot(self, removed: Iterable[UserNeed] = (), added: Iterable[UserNeed] = ()) -> dict:
+        """Get the statistics in the /api/statistics response shape.
+
+        Args:
+            removed: Needs to leave out of the counts
+            added: Needs to count in addition to the table's rows
+        """
+        with self._lock:
+            total = len(self.rows)
+            by_user_group = dict(self._by_user_group)
+            by_workflow_phase = dict(self._by_workflow_phase)
+            by_entity = dict(self._by_entity)
+        for needs, delta in ((removed, -1), (added, 1)):
+            for need in needs:
+                total += delta
+                _increment(by_user_group, need.userGroupId, delta)
+                _increment(by_workflow_phase, need.workflowPhase, delta)
+                for entity in need.entities:
+                    _increment(by_entity, entity, delta)
+        return {
+            "totalNeeds": total,
+            "byUserGroup": by_user_group,
+            "byWorkflowPhase": by_workflow_phase,
+            "byEntity": by_entity
+        }
+
+
+class TableDataStore:
+    """The collections of a DataStore, with the user needs held by a NeedTable.
+
+    Deliberately not a DataStore: there is no userNeeds list that could be
+    read as empty by mistake. The needs are read through table, and
+    to_dict and to_data_store give the whole dataset.
+    """
+
+    def __init__(self, userSuperGroups: List[UserSuperGroup], userGroups: List[UserGroup],
+                 entities: List[Entity], workflowPhases: List[WorkflowPhase], userNeeds: Iterable[UserNeed]):
+        self.userSuperGroups = userSuperGroups
+        self.userGroups = userGroups
+        self.entities = entities
+        self.workflowPhases = workflowPhases
+        # The needs are read once, into the table
+        self.table = NeedTable(userNeeds, userGroups)
+
+    @classmethod
+    def from_data_store(cls, data: DataStore) -> "TableDataStore":
+        """Build from a DataStore, which is left unchanged."""
+        return cls(**{name: getattr(data, name) for name in DataStore.model_fields})
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, BaseModel]]) -> "TableDataStore":
+        """Build from (collection, record) pairs in DataStore order, user needs last.
+
+        The needs go into the table one at a time; no list of them is built.
+
+        Raises:
+            ValueError: If a record of another collection follows a user need
+        """
+        collections: Dict[str, list] = {name: [] for name in DataStore.model_fields if name != "userNeeds"}
+        records = iter(records)
+        first: List[UserNeed] = []
+        for collection, record in records:
+            if collection == "userNeeds":
+                first.append(record)
+                break
+            collections[collection].append(record)
+
+        def needs() -> Iterator[UserNeed]:
+            yield from first
+            for collection, record in records:
+                if collection != "userNeeds":
+                    raise ValueError(f"{collection} record after the user needs")
+                yield record
+
+        return cls(**collections, userNeeds=needs())
+
+    def to_dict(self) -> dict:
+        """Get the dataset as DataStore.model_dump would, in document order."""
+        return {
+            name: self.table.records() if name == "userNeeds"
+            else [record.model_dump() for record in getattr(self, name)]
+            for name in DataStore.model_fields
+        }
+
+    def to_data_store(self) -> DataStore:
+        """Get a plain DataStore with the needs built as models."""
+        return DataStore.model_construct(
+            **{name: getattr(self, name) for name in DataStore.model_fields if name != "userNeeds"},
+            userNeeds=self.table.needs()
+        )
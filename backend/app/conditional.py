@@ -0,0 +1,91 @@
+"""ETag support: conditional GETs (If-None-Match) and optimistic concurrency (If-Match).
+
+ETags are derived from the storage backend's per-collection versions, so
+checking one costs a version lookup instead of loading and serialising data.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from fastapi import HTTPException, Request, Response
+
+from .changes import ChangeRecorder
+from .database import StorageBackend
+from .response_cache import response_cache
+
+
+def make_etag(backend: StorageBackend, *collections: str) -> str:
+    """Build the ETag for a representation derived from the given collections."""
+    return f'"{backend.get_version(collections)}"'
+
+
+def _matches(header: Optional[str], etag: str) -> bool:
+    """Check an If-Match / If-None-Match header value against etag."""
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" matches "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(request: Request, response: Response, backend: StorageBackend,
+                 *collections: str) -> Optional[Response]:
+    """Handle If-None-Match for a GET endpoint.
+
+    Call before loading any data. Sets the ETag header on response.
+
+    Args:
+        request: Incoming request
+        response: Response the endpoint will return
+        backend: Backend serving the request
+        *collections: Collections the response is derived from
+
+    Returns:
+        A 304 response to return as-is if the client's copy is current, else None
+    """
+    return not_modified_etag(request, response, make_etag(backend, *collections))
+
+
+def not_modified_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Handle If-None-Match for a representation whose ETag is known, e.g. of a fixed history version.
+
+    Returns:
+        A 304 response to return as-is if the client's copy is current, else None
+    """
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
+
+@contextmanager
+def guarded_write(request: Request, response: Response, backend: StorageBackend,
+                  *collections: str) -> Iterator[ChangeRecorder]:
+    """Serialise a write endpoint's check-then-write and enforce If-Match.
+
+    Yields a ChangeRecorder for the endpoint to record the records it
+    changed. On success these are published to the dataset's change feed,
+    cached responses derived from the collections are evicted and the ETag
+    of the updated collections is set on response.
+
+    Args:
+        request: Incoming request
+        response: Response the endpoint will return
+        backend: Backend serving the request
+        *collections: Collections the endpoint writes to
+
+    Raises:
+        HTTPException: 412 if If-Match does not match the current ETag
+    """
+    with backend.mutation_lock:
+        if_match = request.headers.get("if-match")
+        if if_match is not None and not _matches(if_match, make_etag(backend, *collections)):
+            raise HTTPException(status_code=412, detail="Precondition failed: data has changed")
+        recorder = ChangeRecorder()
+        yield recorder
+        # Published under the lock so events are in commit order
+        versions = {c: backend.get_version((c,)) for c in recorder.collections()}
+        backend.changes.publish(recorder.events(versions))
+    response_cache.evict(collections)
+    response.headers["ETag"] = make_etag(backend, *collections)
@@ -16,6 +16,55 @@ class Settings(BaseSettings):
     demo_mode_only: bool = False
     demo_storage_dir: str = str(BASE_DIR / "demo-storage")
 
+    # Storage backend: "json" (data.json, default) or "sqlite" (data.db)
+    storage_backend: str = "json"
+    sqlite_file: str = str(BASE_DIR / "data.db")
+
+    # JSON storage mode: "file" rewrites the data file on every change, "journal"
+    # appends changes to data.json.journal and compacts it in the background
+    storage_mode: str = "file"
+    journal_compact_threshold: int = 500
+    journal_compact_interval_seconds: float = 60.0
+
+    # Version history (JSON storage backend only, opt-in): every write is
+    # recorded as per-record deltas in data.json.history, with a full
+    # checkpoint every N versions; versions older than the newest
+    # history_max_versions are pruned a segment at a time (0 keeps all)
+    history_enabled: bool = False
+    history_checkpoint_interval: int = 100
+    history_max_versions: int = 10000
+
+    # Write-behind: acknowledge changes once applied in memory and flush them
+    # to disk in batches, after at most the latency window or batch size
+    write_behind: bool = False
+    write_behind_latency_ms: int = 200
+    write_behind_batch_size: int = 50
+
+    # Pre-serialised list responses kept per dataset version (LRU bounds)
+    response_cache_max_entries: int = 256
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # Named workspaces, each a directory holding its own data files, and the
+    # bounds of the in-memory cache of loaded datasets (least recently used
+    # datasets are evicted; bytes are approximated by data file sizes)
+    workspaces_dir: str = str(BASE_DIR / "workspaces")
+    workspace_cache_max_entries: int = 16
+    workspace_cache_max_bytes: int = 512 * 1024 * 1024
+
+    # Demo mode serves each visitor session a copy-on-write sandbox over the
+    # example data; sandboxes idle for longer than the TTL are discarded, and
+    # beyond the maximum count the least recently used one is
+    demo_session_ttl_seconds: float = 3600.0
+    demo_max_sessions: int = 1000
+
+    # Graphs with more nodes than this are refused by GET /api/graph?layout=true
+    layout_max_nodes: int = 20000
+
+    # Change events kept for GET /api/changes clients resuming with Last-Event-ID,
+    # and the interval of keep-alive comments on idle streams
+    change_feed_size: int = 1000
+    change_feed_keepalive_seconds: float = 15.0
+
     # CORS origins
     cors_origins: List[str] = [
         "http://localhost:5173",  # Vite dev server
@@ -42,9 +91,21 @@ DEMO_STORAGE_DIR = Path(settings.demo_storage_dir)
 DEMO_STORAGE_DIR.mkdir(parents=True, exist_ok=True)
 DEMO_DATA_FILE = DEMO_STORAGE_DIR / "data.demomode.json"
 
+# SQLite databases used by the sqlite storage backend
+SQLITE_DATA_FILE = Path(settings.sqlite_file)
+SQLITE_DEMO_DATA_FILE = DEMO_STORAGE_DIR / "data.demomode.db"
+
+# Workspace directories, created on demand by POST /api/workspaces
+WORKSPACES_DIR = Path(settings.workspaces_dir)
+
 EXAMPLE_DATA_FILE = BASE_DIR / "data.example.json"
 TEMPLATE_DATA_FILE = BASE_DIR / "data.template.json"
 
 # Export for backwards compatibility
 CORS_ORIGINS = settings.cors_origins
 DEMO_MODE_ONLY = settings.demo_mode_only
+STORAGE_BACKEND = settings.storage_backend
+STORAGE_MODE = settings.storage_mode
+WRITE_BEHIND = settings.write_behind
+# Only the JSON storage backend records a version history
+HISTORY_ENABLED = settings.history_enabled and settings.storage_backend == "json"
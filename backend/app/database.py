@@ -1,29 +1,423 @@
 """Database access layer for User Needs Management API."""
 
 import json
+import os
 import shutil
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from pathlib import Path
-from .models import DataStore
-from .config import DATA_FILE, DEMO_DATA_FILE, EXAMPLE_DATA_FILE, TEMPLATE_DATA_FILE
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from .models import (
+    DataStore, Entity, UserGroup, UserNeed, UserSuperGroup, WorkflowPhase
+)
+from .columnar import NeedTable, TableDataStore
+from .search import SearchHit, SearchIndex
+from .id_allocator import IdAllocator, format_need_id
+from .changes import ChangeFeed
+from .single_writer import SingleWriter
+from .fileio import write_durably
+from .journal import ChangeJournal, JournalCompactor, make_change
+from .history import DatasetHistory, make_delta
+from .write_behind import WriteBehindFlusher
+from .pagination import SortKey
+from .metrics import add_bytes, timed
+from .state import current_demo_session
+from .config import (
+    DATA_FILE, DEMO_DATA_FILE, EXAMPLE_DATA_FILE, TEMPLATE_DATA_FILE, WORKSPACES_DIR,
+    STORAGE_BACKEND, STORAGE_MODE, WRITE_BEHIND, HISTORY_ENABLED, settings
+)
 
 
-def get_data_file_path(demo_mode: bool = False) -> Path:
+# File signature used to detect changes made outside the app: (mtime_ns, size, inode)
+# of the data file, followed by the same for its journal in journal storage mode
+FileSignature = Tuple[int, ...]
+
+# DataStore collections, each versioned separately
+COLLECTIONS = tuple(DataStore.model_fields)
+
+T = TypeVar("T")
+
+# Identifies this process's in-memory version counters, so versions handed out
+# before a restart never match the restarted counters
+_EPOCH = uuid.uuid4().hex[:8]
+
+
+class _CacheEntry:
+    """Parsed DataStore for a single data file, tagged with the file signature it was read from."""
+
+    def __init__(self, data: TableDataStore, signature: FileSignature):
+        self.data = data
+        self.signature = signature
+        # Full-text index, built lazily and kept in sync through record_change
+        self.search: Optional[SearchIndex] = None
+        # Journal and history records for changes not yet written by save_data
+        self.pending: List[dict] = []
+        self.history: List[dict] = []
+
+
+class DataStoreCache:
+    """Process-resident cache of parsed DataStores, one entry per data file.
+
+    An entry is reused as long as the file's mtime, size and inode are unchanged.
+    Saving through save_data refreshes the entry in place, so local writes never
+    force a re-parse. Cached DataStores hold their user needs in a NeedTable
+    (see TableDataStore).
+
+    With many workspaces the entries are kept in least recently used order and
+    bounded by count and by the total size of their data files (a proxy for
+    their in-memory size). Evicting an entry with unflushed write-behind
+    changes flushes them first.
+    """
+
+    def __init__(self, max_entries: int = 16, max_bytes: int = 512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Keyed by data file, or by a (history directory, history ID, version)
+        # tuple for materialised history versions (see put_state)
+        self._entries: "OrderedDict[Union[Path, tuple], _CacheEntry]" = OrderedDict()
+        # Per-collection change counters; they outlive entries so they only grow
+        self._versions: Dict[Path, Dict[str, int]] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, file_path: Path, signature: FileSignature,
+            allow_stale: bool = False) -> Optional[TableDataStore]:
+        """Return the cached DataStore for file_path if its signature still matches.
+
+        With allow_stale the entry is returned regardless of the signature, for
+        files whose in-memory state has not been flushed yet.
+        """
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None and (allow_stale or entry.signature == signature):
+                self.hits += 1
+                self._entries.move_to_end(file_path)
+                return entry.data
+            self.misses += 1
+            return None
+
+    def put(self, file_path: Path, data: Union[DataStore, TableDataStore],
+            signature: FileSignature) -> TableDataStore:
+        """Store (or replace) the cached dataset for file_path.
+
+        Re-saving the cached instance only refreshes the signature, keeping its
+        derived views. Any other dataset counts as a change to every collection;
+        a plain DataStore is cached as a TableDataStore built from it.
+
+        Returns:
+            The cached DataStore
+        """
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None and entry.data is data:
+                entry.signature = signature
+            else:
+                if not isinstance(data, TableDataStore):
+                    data = TableDataStore.from_data_store(data)
+                entry = self._entries[file_path] = _CacheEntry(data, signature)
+                self._bump(file_path, COLLECTIONS)
+        self._evict(keep=file_path)
+        return entry.data
+
+    def get_state(self, key: tuple) -> Optional[TableDataStore]:
+        """Get a materialised history version stored with put_state."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry.data
+
+    def put_state(self, key: tuple, data: TableDataStore, size: int):
+        """Store a materialised history version, counted against the cache bounds.
+
+        Args:
+            key: (history directory, history ID, version)
+            data: The dataset at that version
+            size: Approximate size in bytes (of its nearest checkpoint file)
+        """
+        with self._lock:
+            self._entries[key] = _CacheEntry(data, (0, size, 0))
+        self._evict(keep=key)
+
+    def discard_state(self, key: tuple):
+        """Drop a materialised history version."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _size(self) -> int:
+        # The data file size is the signature's second field
+        return sum(entry.signature[1] for entry in self._entries.values())
+
+    def _evict(self, keep: Union[Path, tuple]):
+        """Drop least recently used entries until the cache is within its bounds.
+
+        The entry just stored is never evicted. Unflushed write-behind changes
+        are flushed outside the cache lock, since the flusher reads the cache.
+        """
+        while True:
+            with self._lock:
+                if len(self._entries) <= self.max_entries and self._size() <= self.max_bytes:
+                    return
+                victim = next(iter(self._entries))
+                if victim == keep:
+                    return
+                if not (WRITE_BEHIND and write_behind.is_dirty(victim)):
+                    del self._entries[victim]
+                    self.evictions += 1
+                    continue
+            write_behind.flush(victim)
+
+    def _bump(self, file_path: Path, collections: Iterable[str]):
+        versions = self._versions.setdefault(file_path, {})
+        for collection in collections:
+            versions[collection] = versions.get(collection, 0) + 1
+
+    def versions(self, file_path: Path, collections: Iterable[str]) -> List[int]:
+        """Get the change counters of the given collections of file_path."""
+        with self._lock:
+            versions = self._versions.get(file_path, {})
+            return [versions.get(collection, 0) for collection in collections]
+
+    def peek(self, file_path: Path, signature: Optional[FileSignature] = None) -> Optional[TableDataStore]:
+        """Return the cached DataStore without counting a hit or miss.
+
+        If a signature is given, the entry is only returned if it still matches.
+        """
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None and (signature is None or entry.signature == signature):
+                return entry.data
+            return None
+
+    def get_search(self, file_path: Path, data: TableDataStore) -> SearchIndex:
+        """Get the full-text index for the cached DataStore, building it on first use."""
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None or entry.data is not data:
+                # The cache moved on since data was loaded; index it standalone
+                return SearchIndex(data.table.needs(), data.table.get)
+            if entry.search is None:
+                entry.search = SearchIndex(data.table.needs(), data.table.get)
+            return entry.search
+
+    def record_change(self, file_path: Path, collection: str,
+                      old: Optional[BaseModel], new: Optional[BaseModel]):
+        """Apply a single-record mutation to the derived views of file_path."""
+        with self._lock:
+            self._bump(file_path, (collection,))
+            entry = self._entries.get(file_path)
+            if entry is None:
+                return
+            if STORAGE_MODE == "journal":
+                entry.pending.append(make_change(collection, old, new))
+            if HISTORY_ENABLED:
+                entry.history.append(make_delta(collection, old, new))
+            if collection == "userNeeds":
+                if entry.search is not None:
+                    entry.search.apply_need_change(old, new)
+            elif collection == "userGroups":
+                entry.data.table.apply_user_group_change(old, new)
+
+    def take_pending(self, file_path: Path, data: TableDataStore) -> Optional[List[dict]]:
+        """Take the journal records recorded for data since the last save.
+
+        Returns None if data is not the cached instance, in which case the
+        changes are unknown and the whole DataStore has to be written.
+        """
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None or entry.data is not data:
+                return None
+            pending, entry.pending = entry.pending, []
+            return pending
+
+    def take_history(self, file_path: Path, data: TableDataStore) -> Optional[List[dict]]:
+        """Take the history records recorded for data since the last save.
+
+        Returns None if data is not the cached instance, in which case it is
+        recorded as replacing the whole dataset.
+        """
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None or entry.data is not data:
+                return None
+            history, entry.history = entry.history, []
+            return history
+
+    def evict(self, file_path: Path):
+        """Drop the entry for file_path, flushing its unwritten write-behind changes first."""
+        while True:
+            with self._lock:
+                if file_path not in self._entries:
+                    return
+                if not (WRITE_BEHIND and write_behind.is_dirty(file_path)):
+                    del self._entries[file_path]
+                    self.evictions += 1
+                    return
+            write_behind.flush(file_path)
+
+    def invalidate(self, file_path: Optional[Path] = None):
+        """Drop the entry for file_path, or every entry if no path is given."""
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(file_path, None)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for the cache."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._size(),
+                "evictions": self.evictions,
+            }
+
+
+# Global cache instance shared by all request handlers
+data_cache = DataStoreCache(
+    max_entries=settings.workspace_cache_max_entries,
+    max_bytes=settings.workspace_cache_max_bytes,
+)
+
+
+# Journals and their compactor, used in journal storage mode
+_journals: Dict[Path, ChangeJournal] = {}
+_journals_lock = threading.Lock()
+compactor = JournalCompactor(
+    threshold=settings.journal_compact_threshold,
+    interval=settings.journal_compact_interval_seconds,
+)
+
+
+def _flush_file(file_path: Path):
+    """Write the cached in-memory DataStore of file_path to disk."""
+    data = data_cache.peek(file_path)
+    if data is not None:
+        _write_data(file_path, data)
+
+
+# Write-behind flusher, used when WRITE_BEHIND is enabled
+write_behind = WriteBehindFlusher(
+    _flush_file,
+    latency=settings.write_behind_latency_ms / 1000,
+    batch_size=settings.write_behind_batch_size,
+)
+
+
+def _file_signature(file_path: Path) -> FileSignature:
+    """Get the signature used to detect changes to a data file (and its journal)."""
+    stat = os.stat(file_path)
+    signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    if STORAGE_MODE == "journal":
+        try:
+            journal_stat = os.stat(_get_journal(file_path).path)
+            signature += (journal_stat.st_mtime_ns, journal_stat.st_size, journal_stat.st_ino)
+        except FileNotFoundError:
+            pass
+    return signature
+
+
+def _get_journal(file_path: Path) -> ChangeJournal:
+    """Get the change journal for a data file, registering it for compaction."""
+    with _journals_lock:
+        journal = _journals.get(file_path)
+        if journal is None:
+            journal = _journals[file_path] = ChangeJournal(file_path)
+            compactor.register(journal, lambda: _compact_journal(file_path))
+        return journal
+
+
+# Version histories, used when HISTORY_ENABLED is set
+_histories: Dict[Path, DatasetHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def _history_signature(signature: FileSignature) -> FileSignature:
+    """Get the data file's own part of a signature, which the history tracks.
+
+    Journal appends are recorded as versions already, and loading restarts
+    an empty journal, so the journal's part would only cause false changes.
+    """
+    return signature[:3]
+
+
+def _get_history(file_path: Path) -> DatasetHistory:
+    """Get the version history of a data file."""
+    with _histories_lock:
+        history = _histories.get(file_path)
+        if history is None:
+            history = _histories[file_path] = DatasetHistory(
+                file_path, settings.history_checkpoint_interval, settings.history_max_versions,
+                state_cache=data_cache
+            )
+        return history
+
+
+def _compact_journal(file_path: Path):
+    """Fold the journal of file_path into a new snapshot of the cached DataStore."""
+    journal = _get_journal(file_path)
+    data = data_cache.peek(file_path, _file_signature(file_path))
+    if data is None:
+        # Not loaded, or changed on disk since; the next load replays the journal
+        return
+    journal.compact(data)
+    signature = _file_signature(file_path)
+    data_cache.put(file_path, data, signature)
+    if HISTORY_ENABLED:
+        _get_history(file_path).touch(_history_signature(signature))
+
+
+def release_data_file(file_path: Path):
+    """Flush file_path and drop everything kept in memory for it.
+
+    Used when its backend is evicted; the next load reads it again.
+    """
+    data_cache.evict(file_path)
+    with _journals_lock:
+        if _journals.pop(file_path, None) is not None:
+            # Changes not compacted yet stay in the journal file for the next load
+            compactor.unregister(file_path)
+    with _histories_lock:
+        history = _histories.pop(file_path, None)
+    if history is not None:
+        history.release()
+
+
+def get_data_file_path(demo_mode: bool = False, workspace: Optional[str] = None) -> Path:
     """Get the appropriate data file path based on mode.
 
     Args:
         demo_mode: If True, use demo mode data file
+        workspace: Named workspace, or None for the default dataset
 
     Returns:
         Path to the data file to use
     """
+    if workspace is not None:
+        directory = WORKSPACES_DIR / workspace
+        demo_file, data_file = directory / DEMO_DATA_FILE.name, directory / DATA_FILE.name
+    else:
+        demo_file, data_file = DEMO_DATA_FILE, DATA_FILE
     if demo_mode:
         # In demo mode, use data.demomode.json
         # If it doesn't exist, copy from data.example.json
-        if not DEMO_DATA_FILE.exists() and EXAMPLE_DATA_FILE.exists():
-            shutil.copy(EXAMPLE_DATA_FILE, DEMO_DATA_FILE)
-        return DEMO_DATA_FILE
+        if not demo_file.exists() and EXAMPLE_DATA_FILE.exists():
+            shutil.copy(EXAMPLE_DATA_FILE, demo_file)
+        return demo_file
     else:
-        return DATA_FILE
+        return data_file
 
 
 def initialize_data_file(file_path: Path):
@@ -44,32 +438,759 @@ def initialize_data_file(file_path: Path):
         shutil.copy(TEMPLATE_DATA_FILE, file_path)
 
 
-def load_data(demo_mode: bool = False) -> DataStore:
+def load_data(demo_mode: bool = False, workspace: Optional[str] = None) -> TableDataStore:
     """Load data from the appropriate data file.
 
+    The parsed DataStore is cached per file and only re-read when the file
+    changes on disk. Callers share the cached instance, so mutations must be
+    followed by save_data. Its user needs are held by its need table, which
+    is changed through apply_need_change instead of a list.
+
     Args:
         demo_mode: If True, load from demo mode data file
+        workspace: Named workspace, or None for the default dataset
 
     Returns:
-        DataStore containing all data
+        TableDataStore containing all data
     """
-    file_path = get_data_file_path(demo_mode)
+    file_path = get_data_file_path(demo_mode, workspace)
 
     # Initialize if doesn't exist
     initialize_data_file(file_path)
 
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    return DataStore(**data)
+    signature = _file_signature(file_path)
+    # Unflushed write-behind changes make the in-memory copy authoritative
+    dirty = WRITE_BEHIND and write_behind.is_dirty(file_path)
+    cached = data_cache.get(file_path, signature, allow_stale=dirty)
+    if cached is not None:
+        return cached
+
+    if STORAGE_MODE == "journal":
+        # Replay snapshot plus journal; loading may start a fresh journal
+        data = _get_journal(file_path).load()
+        signature = _file_signature(file_path)
+    else:
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        add_bytes("read", len(content))
+        with timed("parse"):
+            raw = json.loads(content)
+        with timed("validate"):
+            data = DataStore(**raw)
+    data = data_cache.put(file_path, data, signature)
+    if HISTORY_ENABLED:
+        # Starts the history, or records a file changed outside the app as a new version
+        _get_history(file_path).sync(data, _history_signature(signature))
+    return data
+
+
+def is_cached(demo_mode: bool = False, workspace: Optional[str] = None) -> bool:
+    """Check whether load_data would be answered from the cache without reading the file."""
+    file_path = get_data_file_path(demo_mode, workspace)
+    if not file_path.exists():
+        return False
+    if WRITE_BEHIND and write_behind.is_dirty(file_path):
+        return data_cache.peek(file_path) is not None
+    return data_cache.peek(file_path, _file_signature(file_path)) is not None
 
 
-def save_data(data: DataStore, demo_mode: bool = False):
+def _write_data(file_path: Path, data: Union[DataStore, TableDataStore]):
+    """Write data to file_path using the configured storage mode, then record it in the history."""
+    if not isinstance(data, TableDataStore):
+        # Not the cached instance, so it is written and recorded in full
+        data = TableDataStore.from_data_store(data)
+    history = data_cache.take_history(file_path, data) if HISTORY_ENABLED else None
+    if STORAGE_MODE == "journal":
+        journal = _get_journal(file_path)
+        changes = data_cache.take_pending(file_path, data)
+        if changes is None:
+            journal.compact(data)
+        else:
+            journal.append(changes)
+        signature = _file_signature(file_path)
+        data_cache.put(file_path, data, signature)
+        compactor.notify(journal)
+    else:
+        with timed("serialise"):
+            content = json.dumps(data.to_dict(), indent=2).encode()
+        # Renamed into place, so a concurrent reload never sees a partial file
+        write_durably(file_path, content)
+        signature = _file_signature(file_path)
+        data_cache.put(file_path, data, signature)
+    if HISTORY_ENABLED:
+        if history is None:
+            _get_history(file_path).replace(data, _history_signature(signature))
+        else:
+            _get_history(file_path).commit(data, history, _history_signature(signature))
+
+
+def save_data(data: Union[DataStore, TableDataStore], demo_mode: bool = False, workspace: Optional[str] = None):
     """Save data to the appropriate data file.
 
+    In journal storage mode only the changes recorded through record_change
+    are appended to the journal; the full DataStore is written only when those
+    changes are unknown. In write-behind mode changes to the cached DataStore
+    are only scheduled here and written by the flusher (see flush_data).
+
     Args:
         data: DataStore to save
         demo_mode: If True, save to demo mode data file
+        workspace: Named workspace, or None for the default dataset
+    """
+    file_path = get_data_file_path(demo_mode, workspace)
+    if WRITE_BEHIND and data_cache.peek(file_path) is data:
+        write_behind.schedule(file_path)
+    else:
+        _write_data(file_path, data)
+
+
+def flush_data(demo_mode: Optional[bool] = None, workspace: Optional[str] = None):
+    """Write any buffered write-behind changes to disk before returning.
+
+    Args:
+        demo_mode: Flush only the main (False) or demo (True) data file;
+            None flushes every data file
+        workspace: Named workspace of the data file to flush
+    """
+    if demo_mode is None:
+        write_behind.flush()
+    else:
+        write_behind.flush(get_data_file_path(demo_mode, workspace))
+
+
+def shutdown_storage():
+    """Flush buffered changes and stop background writers on shutdown."""
+    for backend in list(_backends.values()):
+        backend.writer.shutdown()
+    write_behind.stop()
+
+
+def get_index(demo_mode: bool = False, workspace: Optional[str] = None) -> NeedTable:
+    """Get the columnar need table used for filtering and statistics.
+
+    Args:
+        demo_mode: If True, use the demo mode data file
+        workspace: Named workspace, or None for the default dataset
+
+    Returns:
+        NeedTable holding the user needs of the cached DataStore
+    """
+    return load_data(demo_mode, workspace).table
+
+
+def get_statistics(demo_mode: bool = False, workspace: Optional[str] = None) -> dict:
+    """Get the user need statistics for the current data file.
+
+    Args:
+        demo_mode: If True, use the demo mode data file
+        workspace: Named workspace, or None for the default dataset
+
+    Returns:
+        Counts in the /api/statistics response shape, aggregated over the need table
+    """
+    return get_index(demo_mode, workspace).snapshot()
+
+
+def get_history(demo_mode: bool = False, workspace: Optional[str] = None) -> Optional[DatasetHistory]:
+    """Get the version history of the current data file.
+
+    Args:
+        demo_mode: If True, use the demo mode data file
+        workspace: Named workspace, or None for the default dataset
+
+    Returns:
+        DatasetHistory up to date with the data file, or None if HISTORY_ENABLED is off
+    """
+    if not HISTORY_ENABLED:
+        return None
+    # Loading syncs the history with a data file changed on disk
+    load_data(demo_mode, workspace)
+    return _get_history(get_data_file_path(demo_mode, workspace))
+
+
+def get_search_index(demo_mode: bool = False, workspace: Optional[str] = None) -> SearchIndex:
+    """Get the full-text search index for the current data file.
+
+    Args:
+        demo_mode: If True, use the demo mode data file
+        workspace: Named workspace, or None for the default dataset
+
+    Returns:
+        SearchIndex kept in sync with the cached DataStore
+    """
+    data = load_data(demo_mode, workspace)
+    return data_cache.get_search(get_data_file_path(demo_mode, workspace), data)
+
+
+def record_change(collection: str, old: Optional[BaseModel], new: Optional[BaseModel],
+                  demo_mode: bool = False, workspace: Optional[str] = None):
+    """Record a mutation of the cached DataStore so derived indexes and statistics stay in sync.
+
+    Call after changing the DataStore returned by load_data and before save_data.
+    In journal storage mode this is also what save_data appends to the journal,
+    and with the history enabled what it records as the new version.
+
+    Args:
+        collection: DataStore field that changed (e.g. "userNeeds")
+        old: Record before the change, or None when created
+        new: Record after the change, or None when deleted
+        demo_mode: If True, the change applies to the demo mode data file
+        workspace: Named workspace, or None for the default dataset
+    """
+    data_cache.record_change(get_data_file_path(demo_mode, workspace), collection, old, new)
+
+
+def get_cache_stats() -> dict:
+    """Get hit/miss counters for the DataStore cache.
+
+    Returns:
+        Dictionary with hits, misses, hitRate and number of cached entries
+    """
+    return data_cache.stats()
+
+
+class StorageBackend(ABC):
+    """Interface between the routers and a storage implementation.
+
+    Each backend instance serves one dataset (main or demo). Read methods
+    return Pydantic models; write methods assume the caller has already
+    validated references and uniqueness.
+
+    Routers hold mutation_lock around their check-then-write sequences so
+    that validation (including If-Match checks) and the write are atomic.
+
+    Async endpoints run their reads through read() and their check-then-write
+    sequences through write(), which queues them on the dataset's single
+    writer. Reads never take mutation_lock: writes replace records and
+    lists rather than leaving them half-updated.
+
+    Subclasses set id_allocator to the need ID counters of their dataset.
+    Write endpoints publish what they changed to the changes feed.
+    """
+
+    id_allocator: IdAllocator
+
+    def __init__(self):
+        self.mutation_lock = threading.RLock()
+        self.changes = ChangeFeed(settings.change_feed_size)
+        self.writer = SingleWriter()
+
+    async def read(self, fn: Callable[[], T]) -> T:
+        """Run a read-only function without blocking the event loop.
+
+        Runs in the threadpool by default; backends answering reads from
+        memory run it inline.
+        """
+        return await run_in_threadpool(fn)
+
+    async def write(self, fn: Callable[[], T]) -> T:
+        """Run a mutating function on the single writer, after the writes queued before it."""
+        return await self.writer.submit(fn)
+
+    @property
+    def idle(self) -> bool:
+        """Whether no write is queued and no change stream is waiting on the dataset."""
+        return self.writer.idle and not self.changes.listeners
+
+    def close(self):
+        """Release the writer thread and the memory held for the dataset.
+
+        The backend stays usable; it starts them again when next used.
+        """
+        self.writer.close()
+
+    @abstractmethod
+    def has_data(self) -> bool:
+        """Check whether the dataset has been created yet."""
+
+    @abstractmethod
+    def load(self) -> DataStore:
+        """Load the complete dataset."""
+
+    @abstractmethod
+    def replace_all(self, data: DataStore):
+        """Replace the complete dataset with data."""
+
+    def import_records(self, records: Iterable[Tuple[str, BaseModel]]):
+        """Replace the complete dataset with validated (collection, record) pairs.
+
+        Records come in DataStore order, user needs last, and are read once.
+        By default they are collected into a DataStore for replace_all;
+        backends that can take them one at a time override this.
+        """
+        collections: Dict[str, list] = {collection: [] for collection in COLLECTIONS}
+        for collection, record in records:
+            collections[collection].append(record)
+        self.replace_all(DataStore.model_construct(**collections))
+
+    def iter_records(self, page_size: int = 1000) -> Iterator[Tuple[str, BaseModel]]:
+        """Iterate over every record as (collection, record), in dependency order.
+
+        User needs are read a page at a time, so backends that do not hold the
+        dataset in memory never materialise all of them at once.
+        """
+        for collection, records in (
+            ("userSuperGroups", self.list_user_super_groups()),
+            ("userGroups", self.list_user_groups()),
+            ("entities", self.list_entities()),
+            ("workflowPhases", self.list_workflow_phases()),
+        ):
+            for record in records:
+                yield collection, record
+        after = None
+        while True:
+            needs, after = self.page_user_needs(after=after, limit=page_size)
+            for need in needs:
+                yield "userNeeds", need
+            if after is None:
+                return
+
+    @abstractmethod
+    def get_version(self, collections: Iterable[str]) -> str:
+        """Get an opaque token that changes whenever any of the collections change.
+
+        Tokens differ between datasets, so main and demo data never share one.
+
+        Args:
+            collections: DataStore collection names (see COLLECTIONS)
+        """
+
+    @abstractmethod
+    def list_user_needs(
+        self,
+        userGroupId: Optional[str] = None,
+        entity: Optional[str] = None,
+        workflowPhase: Optional[str] = None,
+        superGroup: Optional[str] = None,
+        refined: Optional[str] = None
+    ) -> List[UserNeed]:
+        """Get user needs matching all given filters, in insertion order."""
+
+    @abstractmethod
+    def page_user_needs(
+        self,
+        sort: Optional[str] = None,
+        after: Optional[SortKey] = None,
+        limit: Optional[int] = None,
+        **filters
+    ) -> Tuple[List[UserNeed], Optional[SortKey]]:
+        """Get a page of user needs matching the list_user_needs filters.
+
+        Args:
+            sort: One of pagination.SORT_ORDERS, or None for insertion order
+            after: Sort key of the last item of the previous page
+            limit: Maximum page size, or None for no limit
+            **filters: Same keyword filters as list_user_needs
+
+        Returns:
+            The page and, if more items follow, the sort key of its last item
+        """
+
+    @abstractmethod
+    def search_user_needs(self, query: str, limit: int = 20, **filters) -> List[SearchHit]:
+        """Full-text search over user needs, best match first.
+
+        Takes the same filters as list_user_needs; only matching needs are ranked.
+        """
+
+    @abstractmethod
+    def get_user_need(self, need_id: str) -> Optional[UserNeed]:
+        """Get a user need by ID."""
+
+    @abstractmethod
+    def list_user_need_ids(self, prefix: str) -> List[str]:
+        """Get the IDs of all user needs starting with prefix."""
+
+    def next_need_number(self, prefix: str) -> int:
+        """Get the number the next ID reservation for prefix would start at."""
+        return self.id_allocator.peek(
+            prefix,
+            lambda: self.list_user_need_ids(f"{prefix}-"),
+            lambda need_id: self.get_user_need(need_id) is not None
+        )
+
+    def reserve_need_numbers(self, prefix: str, count: int = 1) -> int:
+        """Reserve count consecutive need numbers for prefix, returning the first."""
+        return self.id_allocator.reserve(
+            prefix,
+            count,
+            lambda: self.list_user_need_ids(f"{prefix}-"),
+            lambda need_id: self.get_user_need(need_id) is not None
+        )
+
+    def need_id_prefix(self, user_group_id: str) -> str:
+        """Get the need ID prefix of a user group, which is its super group's prefix.
+
+        Raises:
+            KeyError: If the user group does not exist
+            ValueError: If the user group has no super group, or it does not exist
+        """
+        user_group = self.get_user_group(user_group_id)
+        if user_group is None:
+            raise KeyError(user_group_id)
+        if not user_group.superGroup:
+            raise ValueError("User group has no super group assigned")
+        super_group = self.get_user_super_group(user_group.superGroup)
+        if super_group is None:
+            raise ValueError("Super group not found")
+        return super_group.prefix
+
+    def allocate_need_id(self, user_group_id: str) -> str:
+        """Reserve the next need ID of a user group (raises like need_id_prefix)."""
+        prefix = self.need_id_prefix(user_group_id)
+        return format_need_id(prefix, self.reserve_need_numbers(prefix))
+
+    @abstractmethod
+    def create_user_need(self, need: UserNeed):
+        """Add a new user need."""
+
+    @abstractmethod
+    def update_user_need(self, need_id: str, need: UserNeed):
+        """Replace the user need with ID need_id."""
+
+    @abstractmethod
+    def delete_user_need(self, need_id: str) -> Optional[UserNeed]:
+        """Delete a user need, returning it (or None if it did not exist)."""
+
+    @abstractmethod
+    def apply_user_need_changes(self, changes: List[Tuple[Optional[str], Optional[UserNeed]]]):
+        """Apply several user need changes in one atomic write.
+
+        Each change is (None, need) to create, (need_id, need) to update or
+        (need_id, None) to delete, applied in order.
+        """
+
+    @abstractmethod
+    def list_user_groups(self) -> List[UserGroup]:
+        """Get all user groups."""
+
+    @abstractmethod
+    def get_user_group(self, user_group_id: str) -> Optional[UserGroup]:
+        """Get a user group by ID."""
+
+    @abstractmethod
+    def create_user_group(self, user_group: UserGroup):
+        """Add a new user group."""
+
+    @abstractmethod
+    def list_user_super_groups(self) -> List[UserSuperGroup]:
+        """Get all user super groups."""
+
+    @abstractmethod
+    def get_user_super_group(self, super_group_id: str) -> Optional[UserSuperGroup]:
+        """Get a user super group by ID."""
+
+    @abstractmethod
+    def create_user_super_group(self, super_group: UserSuperGroup):
+        """Add a new user super group."""
+
+    @abstractmethod
+    def update_user_super_group(self, super_group_id: str, super_group: UserSuperGroup):
+        """Replace the super group with ID super_group_id.
+
+        If the ID changes, user groups referring to the old ID are updated in
+        the same write.
+        """
+
+    @abstractmethod
+    def delete_user_super_group(self, super_group_id: str) -> Optional[UserSuperGroup]:
+        """Delete a super group, returning it (or None if it did not exist)."""
+
+    @abstractmethod
+    def list_entities(self) -> List[Entity]:
+        """Get all entities."""
+
+    @abstractmethod
+    def get_entity(self, entity_id: str) -> Optional[Entity]:
+        """Get an entity by ID."""
+
+    @abstractmethod
+    def list_workflow_phases(self) -> List[WorkflowPhase]:
+        """Get all workflow phases."""
+
+    @abstractmethod
+    def get_workflow_phase(self, phase_id: str) -> Optional[WorkflowPhase]:
+        """Get a workflow phase by ID."""
+
+    @abstractmethod
+    def get_statistics(self) -> dict:
+        """Get user need counts in the /api/statistics response shape."""
+
+    def get_history(self) -> Optional[DatasetHistory]:
+        """Get the version history of the dataset, or None if this backend keeps none."""
+        return None
+
+    def get_need_table(self) -> NeedTable:
+        """Get a columnar table of the current user needs, for cross-tabulation.
+
+        Builds one from the listed needs and user groups; backends that keep a
+        table up to date return that instead.
+        """
+        return NeedTable(self.list_user_needs(), self.list_user_groups())
+
+    def flush(self):
+        """Make every acknowledged change durable before returning."""
+
+
+def _find(records: list, record_id: str):
+    """Find a record by ID in a DataStore collection."""
+    return next((r for r in records if r.id == record_id), None)
+
+
+class JsonFileBackend(StorageBackend):
+    """Backend storing the dataset as a JSON document (optionally journalled).
+
+    Reads are served from the cached DataStore and its indexes; every write
+    goes through record_change and save_data.
     """
-    file_path = get_data_file_path(demo_mode)
-    with open(file_path, 'w') as f:
-        json.dump(data.model_dump(), f, indent=2)
+
+    def __init__(self, demo_mode: bool = False, workspace: Optional[str] = None):
+        super().__init__()
+        self.demo_mode = demo_mode
+        self.workspace = workspace
+        data_file = get_data_file_path(demo_mode, workspace)
+        self.id_allocator = IdAllocator(data_file.with_name(data_file.name + ".ids"))
+
+    def has_data(self) -> bool:
+        return get_data_file_path(self.demo_mode, self.workspace).exists()
+
+    async def read(self, fn: Callable[[], T]) -> T:
+        # Reads are answered from the cached DataStore; only (re)loading the
+        # file is blocking work
+        if not is_cached(self.demo_mode, self.workspace):
+            await run_in_threadpool(load_data, self.demo_mode, self.workspace)
+        return fn()
+
+    def load(self) -> DataStore:
+        return load_data(self.demo_mode, self.workspace).to_data_store()
+
+    def iter_records(self, page_size: int = 1000) -> Iterator[Tuple[str, BaseModel]]:
+        # The dataset is in memory already; shallow copies of the lists and
+        # the table's needs give a consistent snapshot without paging
+        data = load_data(self.demo_mode, self.workspace)
+        for collection in COLLECTIONS:
+            records = data.table.needs() if collection == "userNeeds" else list(getattr(data, collection))
+            for record in records:
+                yield collection, record
+
+    def replace_all(self, data: DataStore):
+        # A DataStore other than the cached one is written in full
+        save_data(data, self.demo_mode, self.workspace)
+        self.id_allocator.reset()
+
+    def import_records(self, records: Iterable[Tuple[str, BaseModel]]):
+        # The needs go straight into the new need table, never into a list of models
+        save_data(TableDataStore.from_records(records), self.demo_mode, self.workspace)
+        self.id_allocator.reset()
+
+    def get_version(self, collections: Iterable[str]) -> str:
+        # A cache hit costs one stat; a file changed on disk is reloaded,
+        # which bumps every collection
+        load_data(self.demo_mode, self.workspace)
+        versions = data_cache.versions(get_data_file_path(self.demo_mode, self.workspace), collections)
+        dataset = "demo" if self.demo_mode else "main"
+        if self.workspace is not None:
+            dataset = f"{self.workspace}.{dataset}"
+        return f"{dataset}-{_EPOCH}-{'.'.join(map(str, versions))}"
+
+    def _apply(self, collection: str, old: Optional[BaseModel], new: Optional[BaseModel]):
+        """Apply a single-record change to the cached DataStore and save it."""
+        self._apply_all([(collection, old, new)])
+
+    def _apply_all(self, changes: List[Tuple[str, Optional[BaseModel], Optional[BaseModel]]]):
+        """Apply (collection, old, new) changes to the cached DataStore and save them together."""
+        data = load_data(self.demo_mode, self.workspace)
+        # Work on copies so readers never see a list mid-change, then swap
+        # each changed list in whole. User needs live in the need table,
+        # which applies each change atomically.
+        copies: Dict[str, list] = {}
+        for collection, old, new in changes:
+            if collection == "userNeeds":
+                data.table.apply_need_change(old, new)
+            else:
+                records = copies.get(collection)
+                if records is None:
+                    records = copies[collection] = list(getattr(data, collection))
+                if old is None:
+                    records.append(new)
+                elif new is None:
+                    records.remove(old)
+                else:
+                    records[records.index(old)] = new
+            record_change(collection, old, new, self.demo_mode, self.workspace)
+        for collection, records in copies.items():
+            setattr(data, collection, records)
+        save_data(data, self.demo_mode, self.workspace)
+
+    def list_user_needs(self, userGroupId=None, entity=None, workflowPhase=None,
+                        superGroup=None, refined=None) -> List[UserNeed]:
+        return get_index(self.demo_mode, self.workspace).filter(
+            userGroupId=userGroupId,
+            entity=entity,
+            workflowPhase=workflowPhase,
+            superGroup=superGroup,
+            refined=refined
+        )
+
+    def page_user_needs(self, sort=None, after=None, limit=None, **filters):
+        phase_order = {wp.id: wp.order for wp in self.list_workflow_phases()}
+        return get_index(self.demo_mode, self.workspace).page(phase_order, sort, after, limit, **filters)
+
+    def search_user_needs(self, query: str, limit: int = 20, **filters) -> List[SearchHit]:
+        candidates = None
+        if any(filters.values()):
+            candidates = get_index(self.demo_mode, self.workspace).filter_ids(**filters)
+        return get_search_index(self.demo_mode, self.workspace).search(query, limit, candidates)
+
+    def get_user_need(self, need_id: str) -> Optional[UserNeed]:
+        return get_index(self.demo_mode, self.workspace).get(need_id)
+
+    def list_user_need_ids(self, prefix: str) -> List[str]:
+        return [need_id for need_id in get_index(self.demo_mode, self.workspace).rows if need_id.startswith(prefix)]
+
+    def create_user_need(self, need: UserNeed):
+        self._apply("userNeeds", None, need)
+
+    def update_user_need(self, need_id: str, need: UserNeed):
+        self._apply("userNeeds", self.get_user_need(need_id), need)
+
+    def delete_user_need(self, need_id: str) -> Optional[UserNeed]:
+        need = self.get_user_need(need_id)
+        if need is not None:
+            self._apply("userNeeds", need, None)
+        return need
+
+    def apply_user_need_changes(self, changes: List[Tuple[Optional[str], Optional[UserNeed]]]):
+        data = load_data(self.demo_mode, self.workspace)
+        for need_id, need in changes:
+            old = data.table.get(need_id) if need_id is not None else None
+            data.table.apply_need_change(old, need)
+            record_change("userNeeds", old, need, self.demo_mode, self.workspace)
+        save_data(data, self.demo_mode, self.workspace)
+
+    def list_user_groups(self) -> List[UserGroup]:
+        return load_data(self.demo_mode, self.workspace).userGroups
+
+    def get_user_group(self, user_group_id: str) -> Optional[UserGroup]:
+        return _find(load_data(self.demo_mode, self.workspace).userGroups, user_group_id)
+
+    def create_user_group(self, user_group: UserGroup):
+        self._apply("userGroups", None, user_group)
+
+    def list_user_super_groups(self) -> List[UserSuperGroup]:
+        return load_data(self.demo_mode, self.workspace).userSuperGroups
+
+    def get_user_super_group(self, super_group_id: str) -> Optional[UserSuperGroup]:
+        return _find(load_data(self.demo_mode, self.workspace).userSuperGroups, super_group_id)
+
+    def create_user_super_group(self, super_group: UserSuperGroup):
+        self._apply("userSuperGroups", None, super_group)
+
+    def update_user_super_group(self, super_group_id: str, super_group: UserSuperGroup):
+        changes = [("userSuperGroups", self.get_user_super_group(super_group_id), super_group)]
+        if super_group.id != super_group_id:
+            changes += [
+                ("userGroups", user_group, user_group.model_copy(update={"superGroup": super_group.id}))
+                for user_group in self.list_user_groups() if user_group.superGroup == super_group_id
+            ]
+        self._apply_all(changes)
+
+    def delete_user_super_group(self, super_group_id: str) -> Optional[UserSuperGroup]:
+        super_group = self.get_user_super_group(super_group_id)
+        if super_group is not None:
+            self._apply("userSuperGroups", super_group, None)
+        return super_group
+
+    def list_entities(self) -> List[Entity]:
+        return load_data(self.demo_mode, self.workspace).entities
+
+    def get_entity(self, entity_id: str) -> Optional[Entity]:
+        return _find(load_data(self.demo_mode, self.workspace).entities, entity_id)
+
+    def list_workflow_phases(self) -> List[WorkflowPhase]:
+        return load_data(self.demo_mode, self.workspace).workflowPhases
+
+    def get_workflow_phase(self, phase_id: str) -> Optional[WorkflowPhase]:
+        return _find(load_data(self.demo_mode, self.workspace).workflowPhases, phase_id)
+
+    def get_statistics(self) -> dict:
+        return get_statistics(self.demo_mode, self.workspace)
+
+    def get_need_table(self) -> NeedTable:
+        return get_index(self.demo_mode, self.workspace)
+
+    def get_history(self) -> Optional[DatasetHistory]:
+        return get_history(self.demo_mode, self.workspace)
+
+    def flush(self):
+        flush_data(self.demo_mode, self.workspace)
+
+    def close(self):
+        super().close()
+        release_data_file(get_data_file_path(self.demo_mode, self.workspace))
+
+
+# Backend instances, one per dataset (keyed by workspace and demo mode), least
+# recently used first. A single backend per file keeps a single writer per
+# file. Idle workspace backends beyond WORKSPACE_CACHE_MAX_ENTRIES are closed
+# and dropped, like the cached DataStores; the default dataset's never is.
+_backends: "OrderedDict[Tuple[Optional[str], bool], StorageBackend]" = OrderedDict()
+_backends_lock = threading.Lock()
+
+
+def _evict_backends(keep: Tuple[Optional[str], bool]) -> List[StorageBackend]:
+    """Drop idle workspace backends beyond the cache bound, least recently used
+    first (caller holds _backends_lock; it closes the returned backends)."""
+    excess = len(_backends) - max(1, data_cache.max_entries)
+    evicted = []
+    for key in list(_backends):
+        if excess <= 0:
+            break
+        if key == keep or key[0] is None or not _backends[key].idle:
+            continue
+        evicted.append(_backends.pop(key))
+        excess -= 1
+    return evicted
+
+
+def get_backend(demo_mode: bool = False, workspace: Optional[str] = None) -> StorageBackend:
+    """Get the storage backend selected by the STORAGE_BACKEND setting.
+
+    The demo mode dataset is the current demo session's sandbox (see
+    sandbox.py) whatever the storage backend.
+
+    Args:
+        demo_mode: If True, get the backend for the demo mode dataset
+        workspace: Named workspace, or None for the default dataset
+
+    Returns:
+        StorageBackend for the requested dataset
+
+    Raises:
+        ValueError: If STORAGE_BACKEND is not a known backend
+    """
+    if demo_mode:
+        from .sandbox import sandboxes
+        session = current_demo_session.get()
+        return sandboxes.get(workspace, session.ensure() if session is not None else None)
+
+    key = (workspace, demo_mode)
+    evicted = []
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            if STORAGE_BACKEND == "json":
+                backend = JsonFileBackend(demo_mode, workspace)
+            elif STORAGE_BACKEND == "sqlite":
+                from .sqlite_backend import SqliteBackend
+                backend = SqliteBackend.for_mode(demo_mode, workspace)
+            else:
+                raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+            _backends[key] = backend
+            evicted = _evict_backends(key)
+        else:
+            _backends.move_to_end(key)
+    # Closing flushes files, so it happens outside the lock
+    for old in evicted:
+        old.close()
+    return backend
@@ -0,0 +1,33 @@
+"""Durable file writes shared by the storage modules."""
+
+import os
+from pathlib import Path
+
+from .metrics import add_bytes, timed
+
+
+def write_durably(file_path: Path, content: bytes):
+    """Write content to file_path via a temporary file and atomic rename.
+
+    Falls back to an in-place write when the target cannot be replaced, e.g.
+    when it is a single-file bind mount in Docker.
+    """
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        with timed("write"):
+            f.write(content)
+            f.flush()
+        with timed("fsync"):
+            os.fsync(f.fileno())
+    add_bytes("written", len(content))
+    try:
+        os.replace(tmp_path, file_path)
+    except OSError:
+        os.unlink(tmp_path)
+        with open(file_path, 'wb') as f:
+            with timed("write"):
+                f.write(content)
+                f.flush()
+            with timed("fsync"):
+                os.fsync(f.fileno())
+        add_bytes("written", len(content))
@@ -0,0 +1,97 @@
+"""Compact node/edge payload for the network graph view.
+
+Nodes are addressed by integer index. Node attributes are parallel arrays,
+labels are interned into a string table, and each edge type is a flat list of
+[source, target, source, target, ...] node indices.
+"""
+
+from typing import Dict, List
+
+from .models import Entity, UserGroup, UserNeed, WorkflowPhase
+
+NODE_TYPES = ["userNeed", "userGroup", "entity", "workflowPhase"]
+EDGE_TYPES = ["belongsTo", "inPhase", "uses"]
+
+
+class _StringTable:
+    """Interns strings, handing out one index per distinct value."""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def build_graph(
+    user_needs: List[UserNeed],
+    user_groups: List[UserGroup],
+    entities: List[Entity],
+    workflow_phases: List[WorkflowPhase]
+) -> dict:
+    """Build the graph payload.
+
+    Node order matches the client-side graph: user needs, then user groups,
+    entities and workflow phases. Edges to records that do not exist are
+    dropped.
+
+    Args:
+        user_needs: User needs to include (already filtered)
+        user_groups: All user groups
+        entities: All entities
+        workflow_phases: All workflow phases
+
+    Returns:
+        Dictionary with nodeTypes, edgeTypes, ids, types, labels, strings and edges
+    """
+    strings = _StringTable()
+    ids: List[str] = []
+    types: List[int] = []
+    labels: List[int] = []
+    # Node index by (type, id); IDs are only unique within a collection
+    index: Dict[tuple, int] = {}
+
+    def add_node(node_type: int, node_id: str, label: str):
+        index[(node_type, node_id)] = len(ids)
+        ids.append(node_id)
+        types.append(node_type)
+        labels.append(strings.intern(label))
+
+    for need in user_needs:
+        add_node(0, need.id, need.title)
+    for group in user_groups:
+        add_node(1, group.id, group.name)
+    for entity in entities:
+        add_node(2, entity.id, entity.name)
+    for phase in workflow_phases:
+        add_node(3, phase.id, phase.name)
+
+    belongs_to: List[int] = []
+    in_phase: List[int] = []
+    uses: List[int] = []
+    for source, need in enumerate(user_needs):
+        target = index.get((1, need.userGroupId))
+        if target is not None:
+            belongs_to += (source, target)
+        target = index.get((3, need.workflowPhase))
+        if target is not None:
+            in_phase += (source, target)
+        for entity_id in need.entities:
+            target = index.get((2, entity_id))
+            if target is not None:
+                uses += (source, target)
+
+    return {
+        "nodeTypes": NODE_TYPES,
+        "edgeTypes": EDGE_TYPES,
+        "ids": ids,
+        "types": types,
+        "labels": labels,
+        "strings": strings.strings,
+        "edges": {"belongsTo": belongs_to, "inPhase": in_phase, "uses": uses},
+    }
@@ -0,0 +1,541 @@
+"""Version history of a data file: per-record deltas with periodic checkpoints.
+
+Every write of a data file is a new version. The history lives in a
+directory next to the data file (``data.json.history``):
+
+- ``checkpoint-<version>.json``: the full DataStore at that version.
+- ``deltas-<version>.jsonl``: one line per following version, holding the
+  per-record changes it made (see make_delta). Updates only store the
+  fields that changed.
+
+A new delta segment is started every checkpoint_interval versions and its
+checkpoint is written in the background, from the previous checkpoint and
+the deltas. Reading a version loads the nearest checkpoint at or before it
+and replays only the versions after that checkpoint.
+
+With max_versions set, whole segments older than the newest max_versions
+versions are deleted once a later checkpoint can serve the versions still
+kept; the oldest checkpoint left is the oldest readable version.
+
+Versions that replace the dataset as a whole (an import, or a data file
+changed outside the app) are stored as checkpoints. ``head.json`` records
+the data file signature of the latest version, so a file changed while the
+app was not running is picked up as a new version on the next load.
+"""
+
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from pydantic import BaseModel
+
+from .columnar import NeedTable, TableDataStore
+from .fileio import write_durably
+from .metrics import add_bytes, timed
+from .models import DataStore
+
+logger = logging.getLogger(__name__)
+
+# DataStore collections, in document order
+COLLECTIONS = tuple(DataStore.model_fields)
+
+# Materialised versions kept (per history) for repeated point-in-time reads
+STATE_CACHE_SIZE = 2
+
+
+def make_delta(collection: str, old: Optional[BaseModel], new: Optional[BaseModel]) -> dict:
+    """Build the history record of a single-record change.
+
+    Args:
+        collection: DataStore field that changed (e.g. "userNeeds")
+        old: Record before the change, or None when created
+        new: Record after the change, or None when deleted
+
+    Returns:
+        Change with op, collection and id (the ID before the change), plus the
+        record when created or the changed fields ("set") when updated
+    """
+    if new is None:
+        return {"op": "delete", "collection": collection, "id": old.id}
+    record = new.model_dump()
+    if old is None:
+        return {"op": "create", "collection": collection, "id": new.id, "record": record}
+    before = old.model_dump()
+    return {
+        "op": "update",
+        "collection": collection,
+        "id": old.id,
+        "set": {field: value for field, value in record.items() if before.get(field) != value},
+    }
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+class _State:
+    """A raw DataStore being replayed: records in list order, deleted slots left as None."""
+
+    def __init__(self, data: dict):
+        self.records: Dict[str, List[Optional[dict]]] = {c: list(data.get(c, [])) for c in COLLECTIONS}
+        self.positions: Dict[str, Dict[str, int]] = {
+            c: {record["id"]: i for i, record in enumerate(records)} for c, records in self.records.items()
+        }
+        # Size of the checkpoint file it was loaded from, as an estimate of its own
+        self.size = 0
+
+    def copy(self) -> "_State":
+        state = _State.__new__(_State)
+        state.size = self.size
+        state.records = {c: list(records) for c, records in self.records.items()}
+        state.positions = {c: dict(positions) for c, positions in self.positions.items()}
+        return state
+
+    def apply(self, change: dict):
+        """Apply a change; records are replaced, never modified, so copies stay independent."""
+        records, positions = self.records[change["collection"]], self.positions[change["collection"]]
+        position = positions.pop(change["id"], None)
+        if change["op"] == "delete":
+            if position is not None:
+                records[position] = None
+            return
+        if change["op"] == "update":
+            record = {**(records[position] if position is not None else {}), **change["set"]}
+        else:
+            record = change["record"]
+        if position is None:
+            position = positions.pop(record["id"], None)
+        if position is None:
+            position = len(records)
+            records.append(record)
+        else:
+            records[position] = record
+        positions[record["id"]] = position
+
+    def get(self, collection: str, record_id: str) -> Optional[dict]:
+        position = self.positions[collection].get(record_id)
+        return self.records[collection][position] if position is not None else None
+
+    def to_dict(self) -> dict:
+        return {c: [record for record in records if record is not None] for c, records in self.records.items()}
+
+
+class DatasetHistory:
+    """Versions of a single data file.
+
+    The storage layer reports each write through commit (known changes) or
+    replace (whole dataset) and each load through sync; the read methods
+    serve any version up to the current one. Materialised versions are kept
+    in state_cache (the dataset cache, so they count against its bounds).
+    """
+
+    def __init__(self, data_file: Path, checkpoint_interval: int, max_versions: int = 0,
+                 state_cache=None):
+        self.directory = data_file.with_name(data_file.name + ".history")
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        # Versions kept readable behind the current one (0 keeps all)
+        self.max_versions = max(0, max_versions)
+        self._lock = threading.Lock()
+        self._opened = False
+        # Identifies this history, so versions of a recreated one never look the same
+        self.id: Optional[str] = None
+        self.created_at: Optional[str] = None
+        self.version = 0
+        self._signature: Optional[list] = None
+        # First versions of the delta segments, and the versions with a checkpoint
+        self._segments: List[int] = []
+        self._checkpoints: Set[int] = set()
+        self._checkpointing = False
+        self.state_cache = state_cache
+        # Keys of this history's versions in state_cache, least recently read first
+        self._state_keys: List[tuple] = []
+
+    def etag(self, *parts) -> str:
+        """Build the ETag of a representation of fixed versions (it never changes)."""
+        return '"' + "-".join(["history", str(self.id), *map(str, parts)]) + '"'
+
+    def _checkpoint_path(self, version: int) -> Path:
+        return self.directory / f"checkpoint-{version:010d}.json"
+
+    def _segment_path(self, start: int) -> Path:
+        return self.directory / f"deltas-{start:010d}.jsonl"
+
+    def _open(self):
+        """Read the directory listing and head on first use (caller holds the lock)."""
+        if self._opened:
+            return
+        self._opened = True
+        try:
+            head = json.loads((self.directory / "head.json").read_text())
+        except (FileNotFoundError, ValueError):
+            head = {}
+        if not self.directory.exists():
+            return
+        self.id = head.get("id") or uuid.uuid4().hex[:8]
+        self.created_at = head.get("createdAt")
+        self._signature = head.get("signature")
+        self._checkpoints = {int(path.stem.split("-")[1]) for path in self.directory.glob("checkpoint-*.json")}
+        self._segments = sorted(int(path.stem.split("-")[1]) for path in self.directory.glob("deltas-*.jsonl"))
+        if self._segments:
+            self.version = self._segments[-1] + self._repair(self._segment_path(self._segments[-1]))
+        elif self._checkpoints:
+            self.version = max(self._checkpoints)
+
+    @staticmethod
+    def _repair(path: Path) -> int:
+        """Drop a torn final line left by a crash, returning the number of complete lines."""
+        with open(path, 'rb+') as f:
+            content = f.read()
+            end = content.rfind(b"\n") + 1
+            if end < len(content):
+                f.truncate(end)
+        return content.count(b"\n", 0, end)
+
+    def _write_head(self):
+        head = {"id": self.id, "createdAt": self.created_at, "version": self.version, "signature": self._signature}
+        # Not fsynced: a stale head only makes the next load record a redundant checkpoint
+        (self.directory / "head.json").write_text(json.dumps(head))
+
+    def _write_checkpoint(self, version: int, data: dict):
+        with timed("serialise"):
+            content = json.dumps(data).encode()
+        write_durably(self._checkpoint_path(version), content)
+
+    def _start_segment(self, start: int):
+        self._segment_path(start).touch()
+        self._segments.append(start)
+
+    def _prune(self):
+        """Delete segments and checkpoints no longer needed to read the newest
+        max_versions versions (caller holds the lock)."""
+        if not self.max_versions:
+            return
+        # The newest checkpoint at or before the oldest version to keep becomes the oldest one
+        oldest = max((v for v in self._checkpoints if v <= self.version - self.max_versions), default=None)
+        if oldest is None:
+            return
+        # The segment holding the oldest version's own line stays, for its timestamp
+        keep = max((start for start in self._segments if start < oldest), default=oldest)
+        for version in [v for v in self._checkpoints if v < oldest]:
+            self._checkpoint_path(version).unlink(missing_ok=True)
+            self._checkpoints.discard(version)
+        for start in [start for start in self._segments if start < keep]:
+            self._segment_path(start).unlink(missing_ok=True)
+            self._segments.remove(start)
+
+    def _start(self, data: TableDataStore, signature: Sequence[int]):
+        """Create the history with data as version 0 (caller holds the lock)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.id = uuid.uuid4().hex[:8]
+        self.created_at = _now()
+        self.version = 0
+        self._write_checkpoint(0, data.to_dict())
+        self._checkpoints = {0}
+        self._segments = []
+        self._start_segment(0)
+        self._signature = list(signature)
+        self._write_head()
+
+    def _append(self, entry: dict):
+        payload = (json.dumps(entry) + "\n").encode()
+        with open(self._segment_path(self._segments[-1]), 'ab') as f:
+            with timed("write"):
+                f.write(payload)
+        add_bytes("written", len(payload))
+
+    def sync(self, data: TableDataStore, signature: Sequence[int]):
+        """Record a freshly loaded data file: start the history, or add a version if it changed."""
+        with self._lock:
+            self._open()
+            if not self._checkpoints:
+                self._start(data, signature)
+            elif self._signature != list(signature):
+                self._replace(data, signature)
+
+    def commit(self, data: TableDataStore, changes: List[dict], signature: Sequence[int]):
+        """Record a write of data that made the given changes (built with make_delta)."""
+        with self._lock:
+            self._open()
+            if not self._checkpoints:
+                self._start(data, signature)
+                return
+            if changes:
+                self.version += 1
+                self._append({"version": self.version, "at": _now(), "changes": changes})
+                if self.version - self._segments[-1] >= self.checkpoint_interval:
+                    self._start_segment(self.version)
+                    self._schedule_checkpoint()
+            self._signature = list(signature)
+            self._write_head()
+
+    def replace(self, data: TableDataStore, signature: Sequence[int]):
+        """Record a write that replaced the whole dataset."""
+        with self._lock:
+            self._open()
+            if not self._checkpoints:
+                self._start(data, signature)
+            else:
+                self._replace(data, signature)
+
+    def _replace(self, data: TableDataStore, signature: Sequence[int]):
+        version = self.version + 1
+        # The checkpoint goes first: a version line without its checkpoint could not be read
+        self._write_checkpoint(version, data.to_dict())
+        self._checkpoints.add(version)
+        self._append({"version": version, "at": _now(), "replace": True})
+        self.version = version
+        self._start_segment(version)
+        self._signature = list(signature)
+        self._write_head()
+        self._prune()
+
+    def touch(self, signature: Sequence[int]):
+        """Record that the data file was rewritten without changing its content (e.g. compacted)."""
+        with self._lock:
+            self._open()
+            if self._checkpoints:
+                self._signature = list(signature)
+                self._write_head()
+
+    def _schedule_checkpoint(self):
+        """Write the checkpoint of the newest segment in the background (caller holds the lock)."""
+        if not self._checkpointing:
+            self._checkpointing = True
+            threading.Thread(target=self._run_checkpoints, name="history-checkpoint", daemon=True).start()
+
+    def _run_checkpoints(self):
+        # Only the newest segment matters: older ones are replayed from their predecessors
+        while True:
+            with self._lock:
+                start = self._segments[-1]
+                if start in self._checkpoints:
+                    self._checkpointing = False
+                    return
+            try:
+                self._write_checkpoint(start, self._replay(start).to_dict())
+            except Exception:
+                logger.exception("Writing history checkpoint %s failed", start)
+                with self._lock:
+                    self._checkpointing = False
+                return
+            with self._lock:
+                self._checkpoints.add(start)
+                self._prune()
+
+    def _view(self) -> Tuple[int, List[int], List[int]]:
+        """Snapshot the current version, segments and checkpoints for a lock-free read."""
+        with self._lock:
+            self._open()
+            return self.version, list(self._segments), sorted(self._checkpoints)
+
+    @staticmethod
+    def _check(version: int, head: int, checkpoints: List[int]):
+        # Versions before the oldest checkpoint were pruned
+        if not checkpoints or not checkpoints[0] <= version <= head:
+            raise KeyError(version)
+
+    def _lines(self, after: int, upto: int, segments: List[int]) -> Iterator[dict]:
+        """Read the version entries after version `after` up to and including `upto`."""
+        for i, start in enumerate(segments):
+            end = segments[i + 1] if i + 1 < len(segments) else upto
+            if end <= after or start >= upto:
+                continue
+            try:
+                with open(self._segment_path(start), 'rb') as f:
+                    content = f.read()
+            except FileNotFoundError:
+                # Pruned since the caller's snapshot
+                raise KeyError(after)
+            add_bytes("read", len(content))
+            lines = content.split(b"\n")
+            # Line n of a segment holds version start + n + 1
+            for line in lines[max(0, after - start):min(end, upto) - start]:
+                with timed("parse"):
+                    entry = json.loads(line)
+                yield entry
+
+    def _load_checkpoint(self, version: int) -> _State:
+        try:
+            content = self._checkpoint_path(version).read_bytes()
+        except FileNotFoundError:
+            # Pruned since the caller's snapshot
+            raise KeyError(version)
+        add_bytes("read", len(content))
+        with timed("parse"):
+            state = _State(json.loads(content))
+        state.size = len(content)
+        return state
+
+    def _advance(self, state: _State, after: int, upto: int, segments: List[int],
+                 touched: Optional[Dict[str, Set[str]]] = None) -> Tuple[_State, bool]:
+        """Replay versions after..upto onto state.
+
+        Returns:
+            The new state and whether a version in the range replaced the dataset
+        """
+        replaced = False
+        for entry in self._lines(after, upto, segments):
+            if entry.get("replace"):
+                state, replaced = self._load_checkpoint(entry["version"]), True
+                continue
+            for change in entry["changes"]:
+                state.apply(change)
+                if touched is not None:
+                    ids = touched.setdefault(change["collection"], set())
+                    ids.add(change["id"])
+                    ids.add((change.get("record") or change.get("set") or {}).get("id", change["id"]))
+        return state, replaced
+
+    def _replay(self, version: int) -> _State:
+        """Materialise a version from the nearest checkpoint at or before it."""
+        head, segments, checkpoints = self._view()
+        self._check(version, head, checkpoints)
+        checkpoint = max(v for v in checkpoints if v <= version)
+        with timed("replay"):
+            state, _ = self._advance(self._load_checkpoint(checkpoint), checkpoint, version, segments)
+        return state
+
+    def read(self, version: int) -> Tuple[TableDataStore, NeedTable]:
+        """Get the dataset of a version, with the need table holding its needs.
+
+        Raises:
+            KeyError: If the version does not exist or was pruned
+        """
+        head, _, checkpoints = self._view()
+        self._check(version, head, checkpoints)
+        key = (self.directory, self.id, version)
+        if self.state_cache is not None:
+            data = self.state_cache.get_state(key)
+            if data is not None:
+                self._touch(key)
+                return data, data.table
+        state = self._replay(version)
+        with timed("validate"):
+            data = TableDataStore.from_data_store(DataStore(**state.to_dict()))
+        if self.state_cache is not None:
+            self._touch(key)
+            self.state_cache.put_state(key, data, state.size)
+        return data, data.table
+
+    def release(self):
+        """Drop this history's versions from state_cache."""
+        with self._lock:
+            keys, self._state_keys = self._state_keys, []
+        for key in keys:
+            self.state_cache.discard_state(key)
+
+    def _touch(self, key: tuple):
+        """Mark key as this history's most recently read version, dropping the
+        least recently read ones beyond STATE_CACHE_SIZE from state_cache."""
+        with self._lock:
+            if key in self._state_keys:
+                self._state_keys.remove(key)
+            self._state_keys.append(key)
+            stale = self._state_keys[:-STATE_CACHE_SIZE]
+            del self._state_keys[:-STATE_CACHE_SIZE]
+        for old in stale:
+            self.state_cache.discard_state(old)
+
+    def versions(self, limit: int = 50, before: Optional[int] = None) -> List[dict]:
+        """List versions, newest first.
+
+        Args:
+            limit: Maximum number of versions
+            before: Only list versions older than this one
+
+        Returns:
+            version, at, whether it replaced the dataset, whether a checkpoint
+            of it is stored, and the (op, collection, id) of each change
+        """
+        head, segments, checkpoints = self._view()
+        if not checkpoints:
+            return []
+        upto = head if before is None else min(head, before - 1)
+        result: List[dict] = []
+        for i in range(len(segments) - 1, -1, -1):
+            if len(result) >= limit:
+                break
+            start = segments[i]
+            if start >= upto:
+                continue
+            end = min(upto, segments[i + 1]) if i + 1 < len(segments) else upto
+            entries = list(self._lines(start, end, segments))
+            for entry in reversed(entries):
+                if entry["version"] < checkpoints[0]:
+                    # Pruned: only kept for the oldest version's line
+                    break
+                result.append({
+                    "version": entry["version"],
+                    "at": entry["at"],
+                    "replace": bool(entry.get("replace")),
+                    "checkpoint": entry["version"] in checkpoints,
+                    "changes": [
+                        {"op": c["op"], "collection": c["collection"], "id": c["id"]}
+                        for c in entry.get("changes", ())
+                    ],
+                })
+                if len(result) >= limit:
+                    break
+        if len(result) < limit and upto >= 0 and checkpoints[0] == 0:
+            result.append({"version": 0, "at": self.created_at, "replace": True, "checkpoint": 0 in checkpoints,
+                           "changes": []})
+        return result
+
+    def diff(self, from_version: int, to_version: int) -> dict:
+        """Compare two versions record by record.
+
+        Only the records changed in between are compared, unless a version in
+        between replaced the dataset. A record whose ID changed shows as
+        deleted under its old ID and created under its new one.
+
+        Returns:
+            Per changed collection: created and deleted records, and updated
+            records as {id, before, after, fields}
+
+        Raises:
+            KeyError: If either version does not exist or was pruned
+        """
+        if from_version > to_version:
+            forward = self.diff(to_version, from_version)
+            return {
+                collection: {
+                    "created": changes["deleted"],
+                    "deleted": changes["created"],
+                    "updated": [
+                        {**update, "before": update["after"], "after": update["before"]}
+                        for update in changes["updated"]
+                    ],
+                }
+                for collection, changes in forward.items()
+            }
+
+        head, segments, checkpoints = self._view()
+        self._check(to_version, head, checkpoints)
+        before = self._replay(from_version)
+        touched: Dict[str, Set[str]] = {}
+        with timed("replay"):
+            after, replaced = self._advance(before.copy(), from_version, to_version, segments, touched)
+
+        result = {}
+        for collection in COLLECTIONS:
+            if replaced:
+                ids = set(before.positions[collection]) | set(after.positions[collection])
+            else:
+                ids = touched.get(collection, set())
+            created, deleted, updated = [], [], []
+            for record_id in sorted(ids):
+                old, new = before.get(collection, record_id), after.get(collection, record_id)
+                if old is None and new is not None:
+                    created.append(new)
+                elif new is None and old is not None:
+                    deleted.append(old)
+                elif old is not None and old != new:
+                    fields = [field for field in {**old, **new} if old.get(field) != new.get(field)]
+                    updated.append({"id": record_id, "before": old, "after": new, "fields": fields})
+            if created or deleted or updated:
+                result[collection] = {"created": created, "deleted": deleted, "updated": updated}
+        return result
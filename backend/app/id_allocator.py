@@ -0,0 +1,102 @@
+"""Allocation of sequential user need IDs (``PREFIX-NNN``) per super group prefix.
+
+Each prefix has a counter holding the next number to hand out. A counter is
+seeded from the existing IDs the first time its prefix is used and from then
+on only moves forward, so reserved or deleted numbers are never handed out
+again. Counters are kept in a small JSON file next to the data file, or
+only in memory for datasets that are not persisted.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from .fileio import write_durably
+
+
+def format_need_id(prefix: str, number: int) -> str:
+    """Format a need ID; numbers are padded to three digits and grow past 999."""
+    return f"{prefix}-{number:03d}"
+
+
+def parse_need_number(prefix: str, need_id: str) -> Optional[int]:
+    """Get the number of a PREFIX-NNN ID, or None if need_id has another shape."""
+    head = f"{prefix}-"
+    if not need_id.startswith(head):
+        return None
+    digits = need_id[len(head):]
+    return int(digits) if digits.isdigit() else None
+
+
+class IdAllocator:
+    """Persistent per-prefix counters for need numbers.
+
+    Callers pass how to list existing IDs (used once per prefix to seed the
+    counter) and how to check whether an ID is taken; numbers of IDs created
+    by hand are skipped.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._counters: Optional[Dict[str, int]] = None
+
+    def _load(self) -> Dict[str, int]:
+        if self._counters is None and self.path is None:
+            self._counters = {}
+        if self._counters is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._counters = {prefix: int(n) for prefix, n in json.load(f).items()}
+            except (FileNotFoundError, ValueError):
+                self._counters = {}
+        return self._counters
+
+    def _start(self, prefix: str, existing_ids: Callable[[], Iterable[str]]) -> int:
+        """Get the counter for prefix, seeding it from the existing IDs if new."""
+        counters = self._load()
+        if prefix not in counters:
+            numbers = (parse_need_number(prefix, need_id) for need_id in existing_ids())
+            counters[prefix] = max((n for n in numbers if n is not None), default=0) + 1
+        return counters[prefix]
+
+    def peek(self, prefix: str, existing_ids: Callable[[], Iterable[str]],
+             is_taken: Callable[[str], bool]) -> int:
+        """Get the number the next reservation would start at, without reserving it."""
+        with self._lock:
+            number = self._start(prefix, existing_ids)
+            while is_taken(format_need_id(prefix, number)):
+                number += 1
+            return number
+
+    def reserve(self, prefix: str, count: int, existing_ids: Callable[[], Iterable[str]],
+                is_taken: Callable[[str], bool]) -> int:
+        """Reserve count consecutive free numbers and advance the counter past them.
+
+        Args:
+            prefix: Super group prefix
+            count: Size of the block
+            existing_ids: Lists the IDs starting with the prefix (only called to seed)
+            is_taken: Whether an ID is already in use
+
+        Returns:
+            First number of the reserved block
+        """
+        with self._lock:
+            start = end = self._start(prefix, existing_ids)
+            while end - start < count:
+                if is_taken(format_need_id(prefix, end)):
+                    start = end + 1
+                end += 1
+            self._counters[prefix] = end
+            if self.path is not None:
+                write_durably(self.path, json.dumps(self._counters).encode())
+            return start
+
+    def reset(self):
+        """Forget every counter, e.g. after the dataset was replaced."""
+        with self._lock:
+            self._counters = {}
+            if self.path is not None:
+                self.path.unlink(missing_ok=True)
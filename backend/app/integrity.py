@@ -0,0 +1,143 @@
+"""Referential integrity checks over a whole dataset or single records.
+
+Records are checked in dependency order (super groups, user groups,
+entities, workflow phases, user needs) against hash sets of the IDs seen
+before them, so a whole dataset is checked in one linear pass.
+"""
+
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from .database import COLLECTIONS, StorageBackend
+from .models import IntegrityIssue, IntegrityReport
+
+# Collections other records refer to
+REFERENCE_COLLECTIONS = ("userSuperGroups", "userGroups", "entities", "workflowPhases")
+
+# Issues listed in a report; further issues are only counted
+MAX_REPORTED_ISSUES = 1000
+
+
+class IntegrityChecker:
+    """ID sets of the records seen so far, checked against by each new record."""
+
+    def __init__(self):
+        self.ids: Dict[str, Set[str]] = {c: set() for c in COLLECTIONS}
+        self.prefixes: Set[str] = set()
+
+    def add(self, collection: str, record: BaseModel):
+        """Make record visible to the checks of later records."""
+        self.ids[collection].add(record.id)
+        if collection == "userSuperGroups":
+            self.prefixes.add(record.prefix)
+
+    def check(self, collection: str, record: BaseModel) -> List[IntegrityIssue]:
+        """Check a record for a duplicate ID or prefix and unknown references."""
+        issues = []
+
+        def issue(field: str, value: str, message: str):
+            issues.append(IntegrityIssue(
+                collection=collection, id=record.id, field=field, value=value, message=message
+            ))
+
+        if record.id in self.ids[collection]:
+            issue("id", record.id, f"Duplicate {collection} ID: {record.id}")
+        if collection == "userSuperGroups" and record.prefix in self.prefixes:
+            issue("prefix", record.prefix, f"Duplicate super group prefix: {record.prefix}")
+        elif collection == "userGroups" and record.superGroup is not None \
+                and record.superGroup not in self.ids["userSuperGroups"]:
+            issue("superGroup", record.superGroup, f"Unknown superGroup: {record.superGroup}")
+        elif collection == "userNeeds":
+            if record.userGroupId not in self.ids["userGroups"]:
+                issue("userGroupId", record.userGroupId, f"Unknown userGroupId: {record.userGroupId}")
+            if record.workflowPhase not in self.ids["workflowPhases"]:
+                issue("workflowPhase", record.workflowPhase, f"Unknown workflowPhase: {record.workflowPhase}")
+            for entity_id in record.entities:
+                if entity_id not in self.ids["entities"]:
+                    issue("entities", entity_id, f"Unknown entity: {entity_id}")
+        return issues
+
+    def user_group_error(self, superGroup: Optional[str]) -> Optional[str]:
+        """Check the references of a user group being written, in API error form."""
+        if superGroup is not None and superGroup not in self.ids["userSuperGroups"]:
+            return "Invalid superGroup"
+        return None
+
+    def need_error(self, userGroupId: Optional[str], workflowPhase: Optional[str],
+                   entities: Optional[Iterable[str]]) -> Optional[str]:
+        """Check the references of a user need being written, in API error form.
+
+        Fields passed as None are not checked, so partial updates can be
+        validated as they are.
+        """
+        if userGroupId is not None and userGroupId not in self.ids["userGroups"]:
+            return "Invalid userGroupId"
+        if workflowPhase is not None and workflowPhase not in self.ids["workflowPhases"]:
+            return "Invalid workflowPhase"
+        for entity_id in entities or []:
+            if entity_id not in self.ids["entities"]:
+                return f"Invalid entity: {entity_id}"
+        return None
+
+
+# Reference checker per backend, with the version of the collections it was built from
+_references: "weakref.WeakKeyDictionary[StorageBackend, Tuple[str, IntegrityChecker]]" = \
+    weakref.WeakKeyDictionary()
+_references_lock = threading.Lock()
+
+
+def reference_checker(backend: StorageBackend) -> IntegrityChecker:
+    """Get a checker holding the IDs of the reference collections (not user needs).
+
+    The checker is rebuilt only when one of those collections changed. Treat
+    it as read-only.
+
+    Args:
+        backend: Backend of the dataset being written
+
+    Returns:
+        IntegrityChecker to validate records about to be written
+    """
+    version = backend.get_version(REFERENCE_COLLECTIONS)
+    with _references_lock:
+        cached = _references.get(backend)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    checker = IntegrityChecker()
+    for super_group in backend.list_user_super_groups():
+        checker.add("userSuperGroups", super_group)
+    for user_group in backend.list_user_groups():
+        checker.add("userGroups", user_group)
+    for entity in backend.list_entities():
+        checker.add("entities", entity)
+    for phase in backend.list_workflow_phases():
+        checker.add("workflowPhases", phase)
+    with _references_lock:
+        _references[backend] = (version, checker)
+    return checker
+
+
+def check_dataset(backend: StorageBackend) -> IntegrityReport:
+    """Check every record of a dataset in one pass.
+
+    Args:
+        backend: Backend of the dataset to check
+
+    Returns:
+        Record counts and the issues found
+    """
+    checker = IntegrityChecker()
+    counts = {collection: 0 for collection in COLLECTIONS}
+    issue_count = 0
+    issues: List[IntegrityIssue] = []
+    for collection, record in backend.iter_records():
+        counts[collection] += 1
+        found = checker.check(collection, record)
+        issue_count += len(found)
+        issues.extend(found[:MAX_REPORTED_ISSUES - len(issues)])
+        checker.add(collection, record)
+    return IntegrityReport(ok=issue_count == 0, counts=counts, issueCount=issue_count, issues=issues)
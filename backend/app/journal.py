@@ -0,0 +1,229 @@
+"""Append-only change journal with background compaction.
+
+In journal storage mode a data file is stored as a snapshot (the usual
+DataStore JSON document) plus a journal of single-record changes next to it
+(``data.json.journal``). Each change is appended and fsynced instead of
+rewriting the whole snapshot; compaction periodically folds the journal back
+into a new snapshot.
+
+The first journal line names the SHA-256 of the snapshot it applies to. If a
+crash happens after a compacted snapshot is written but before the journal is
+reset, the stale journal no longer matches and is ignored.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .fileio import write_durably
+from .metrics import add_bytes, timed
+from .columnar import TableDataStore
+from .models import DataStore
+
+logger = logging.getLogger(__name__)
+
+
+def make_change(collection: str, old: Optional[BaseModel], new: Optional[BaseModel]) -> dict:
+    """Build a journal record for a single-record change.
+
+    Args:
+        collection: DataStore field that changed (e.g. "userNeeds")
+        old: Record before the change, or None when created
+        new: Record after the change, or None when deleted
+
+    Returns:
+        Journal record with op, collection, id and (unless deleted) the new record
+    """
+    if new is None:
+        return {"op": "delete", "collection": collection, "id": old.id}
+    return {
+        "op": "create" if old is None else "update",
+        "collection": collection,
+        "id": new.id if old is None else old.id,
+        "record": new.model_dump(),
+    }
+
+
+def replay_changes(data: dict, changes: List[dict]):
+    """Apply journal records to a raw (unvalidated) DataStore dictionary.
+
+    Replay is idempotent: creates and updates replace an existing record with
+    the same ID instead of appending a duplicate, and deletes of missing
+    records are ignored. Records are found through an ID to position map per
+    collection, so replay is linear in the number of records and changes.
+    """
+    positions: Dict[str, Dict[str, int]] = {}
+    for change in changes:
+        collection = change["collection"]
+        records = data.setdefault(collection, [])
+        if collection not in positions:
+            positions[collection] = {r.get("id"): i for i, r in enumerate(records)}
+        ids = positions[collection]
+        position = ids.pop(change["id"], None)
+
+        if change["op"] == "delete":
+            if position is not None:
+                # Leave a hole so later positions stay valid; holes are dropped below
+                records[position] = None
+            continue
+
+        record = change["record"]
+        if position is None:
+            position = ids.pop(record.get("id"), None)
+        if position is None:
+            position = len(records)
+            records.append(record)
+        else:
+            records[position] = record
+        ids[record.get("id")] = position
+
+    for collection in positions:
+        data[collection] = [r for r in data[collection] if r is not None]
+
+
+class ChangeJournal:
+    """Snapshot plus append-only journal for a single data file."""
+
+    def __init__(self, data_file: Path):
+        self.data_file = data_file
+        self.path = data_file.with_name(data_file.name + ".journal")
+        self._lock = threading.Lock()
+        # Number of changes appended since the last compaction
+        self.pending = 0
+
+    def _start(self, snapshot_hash: str):
+        """Replace the journal with an empty one based on the given snapshot."""
+        header = json.dumps({"base": snapshot_hash}) + "\n"
+        write_durably(self.path, header.encode())
+        self.pending = 0
+
+    def load(self) -> DataStore:
+        """Read the snapshot and replay the journal on top of it.
+
+        Returns:
+            DataStore including every journalled change
+        """
+        with self._lock:
+            content = self.data_file.read_bytes()
+            add_bytes("read", len(content))
+            snapshot_hash = hashlib.sha256(content).hexdigest()
+            with timed("parse"):
+                data = json.loads(content)
+
+            changes: List[dict] = []
+            if self.path.exists():
+                with open(self.path, 'r') as f:
+                    journal = f.read()
+                add_bytes("read", len(journal))
+                with timed("parse"):
+                    lines = journal.splitlines()
+                    header = json.loads(lines[0]) if lines else {}
+                    if header.get("base") == snapshot_hash:
+                        for line in lines[1:]:
+                            try:
+                                changes.append(json.loads(line))
+                            except json.JSONDecodeError:
+                                # Torn final write from a crash; nothing after it was acknowledged
+                                break
+
+            if changes:
+                replay_changes(data, changes)
+                self.pending = len(changes)
+            else:
+                # Missing, empty or stale journal: start a fresh one for this snapshot
+                self._start(snapshot_hash)
+            with timed("validate"):
+                return DataStore(**data)
+
+    def append(self, changes: List[dict]):
+        """Append changes to the journal and fsync it.
+
+        Args:
+            changes: Journal records built with make_change
+        """
+        if not changes:
+            return
+        with timed("serialise"):
+            payload = "".join(json.dumps(change) + "\n" for change in changes).encode()
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                with timed("write"):
+                    f.write(payload)
+                    f.flush()
+                with timed("fsync"):
+                    os.fsync(f.fileno())
+            add_bytes("written", len(payload))
+            self.pending += len(changes)
+
+    def compact(self, data: TableDataStore):
+        """Write data as the new snapshot and reset the journal.
+
+        Args:
+            data: Current dataset, including every journalled change
+        """
+        with self._lock:
+            with timed("serialise"):
+                content = json.dumps(data.to_dict(), indent=2).encode()
+            write_durably(self.data_file, content)
+            self._start(hashlib.sha256(content).hexdigest())
+
+
+class JournalCompactor:
+    """Background thread that folds journals into their snapshots.
+
+    A journal is compacted as soon as it reaches the configured number of
+    changes, and otherwise every interval seconds if it has any changes.
+    """
+
+    def __init__(self, threshold: int, interval: float):
+        self.threshold = threshold
+        self.interval = interval
+        self._journals: Dict[Path, Tuple[ChangeJournal, Callable[[], None]]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, journal: ChangeJournal, compact: Callable[[], None]):
+        """Track a journal; compact folds it using the current in-memory DataStore."""
+        with self._lock:
+            self._journals[journal.data_file] = (journal, compact)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="journal-compactor", daemon=True
+                )
+                self._thread.start()
+
+    def unregister(self, data_file: Path):
+        """Stop tracking the journal of data_file."""
+        with self._lock:
+            self._journals.pop(data_file, None)
+
+    def notify(self, journal: ChangeJournal):
+        """Wake the compactor early if the journal has grown past the threshold."""
+        if journal.pending >= self.threshold:
+            self._wakeup.set()
+
+    def compact_all(self, force: bool = False):
+        """Compact every journal that is due (or that has any changes, if force)."""
+        with self._lock:
+            journals = list(self._journals.values())
+        for journal, compact in journals:
+            if journal.pending == 0 or (not force and journal.pending < self.threshold):
+                continue
+            compact()
+
+    def _run(self):
+        while True:
+            woken = self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                # A timeout means the interval elapsed: fold whatever is pending
+                self.compact_all(force=not woken)
+            except Exception:
+                logger.exception("Journal compaction failed")
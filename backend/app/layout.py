@@ -0,0 +1,438 @@
+"""Server-side force-directed layout for the network graph, vectorised with NumPy.
+
+Mirrors the client's d3 simulation (link distance 100, charge -300, collision
+radius 40, velocity decay 0.4) so positions look the same as a settled browser
+layout. The many-body term is a Barnes-Hut approximation over a linear
+quadtree rebuilt every tick, so a tick costs O(n log n): nearby nodes repel
+(and collide) exactly, distant cells act through their centroid.
+
+Layouts are cached per dataset and filter set. When the dataset changes, the
+next layout starts from the previous positions and runs a short, low-energy
+simulation instead of starting over.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+
+LINK_DISTANCE = 100.0
+CHARGE = -300.0
+COLLISION_RADIUS = 40.0
+VELOCITY_DECAY = 0.4
+ALPHA_MIN = 0.001
+# d3's default decay: alpha goes from 1 to ALPHA_MIN in 300 ticks
+COLD_TICKS = 300
+ALPHA_DECAY = 1 - ALPHA_MIN ** (1 / COLD_TICKS)
+# Node-ticks a cold start may spend; larger graphs cool down in fewer ticks,
+# but never fewer than MIN_COLD_TICKS
+COLD_TICK_BUDGET = 1_500_000
+MIN_COLD_TICKS = 60
+# Starting energy and tick budget for a warm start from previous positions
+WARM_ALPHA = 0.05
+WARM_TICKS = 60
+# Above this share of new nodes a warm start is not worth it
+WARM_MAX_NEW_FRACTION = 0.25
+# Barnes-Hut accuracy (d3's default): a cell acts through its centroid once
+# its width is below THETA times its distance
+THETA = 0.9
+# Cells with at most this many nodes are not subdivided any further
+LEAF_SIZE = 8
+# Quadtree depth; nodes closer than size / 2 ** MAX_DEPTH share a deepest cell
+MAX_DEPTH = 16
+# Nodes walking the tree together, bounding the size of the per-tick pair arrays
+WALK_CHUNK = 16384
+
+# Node keys are (node type, id) pairs, matching graph.build_graph
+NodeKey = Tuple[int, str]
+
+
+def _phyllotaxis(count: int, start: int = 0) -> np.ndarray:
+    """Initial positions on d3's phyllotaxis spiral."""
+    i = np.arange(start, start + count, dtype=float)
+    radius = 10 * np.sqrt(0.5 + i)
+    angle = i * math.pi * (3 - math.sqrt(5))
+    return np.column_stack((radius * np.cos(angle), radius * np.sin(angle)))
+
+
+def _interleave(v: np.ndarray) -> np.ndarray:
+    """Spread the low 16 bits of v to the even bit positions (half a Morton code)."""
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    return (v | (v << 1)) & 0x55555555
+
+
+def _runs(lengths: np.ndarray) -> np.ndarray:
+    """Offsets 0..length-1 of each run, concatenated."""
+    return np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+
+class _QuadTree:
+    """Linear quadtree over node positions, flattened into per-cell arrays.
+
+    Nodes are sorted by the Morton code of their position, so every cell is a
+    contiguous run of sorted nodes, and prefix sums give its mass and
+    centroid. Cells of all levels share one numbering, root first; cells with
+    at most LEAF_SIZE nodes are leaves and are not subdivided.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray):
+        n = len(x)
+        x0, y0 = x.min(), y.min()
+        self.size = max(x.max() - x0, y.max() - y0, 1.0) * (1 + 1e-9)
+        cells = 1 << MAX_DEPTH
+        scale = cells / self.size
+        ix = np.minimum(((x - x0) * scale).astype(np.int64), cells - 1)
+        iy = np.minimum(((y - y0) * scale).astype(np.int64), cells - 1)
+        code = _interleave(ix) | (_interleave(iy) << 1)
+
+        self.order = np.argsort(code, kind="stable")
+        code = code[self.order]
+        rank = np.empty(n, dtype=np.int64)
+        rank[self.order] = np.arange(n)
+        sum_x = np.concatenate(([0.0], np.cumsum(x[self.order])))
+        sum_y = np.concatenate(([0.0], np.cumsum(y[self.order])))
+
+        starts: List[np.ndarray] = []
+        # Cell of every node at each level, numbered across all levels
+        self.node_cells: List[np.ndarray] = []
+        offset = 0
+        for level in range(MAX_DEPTH + 1):
+            prefix = code >> (2 * (MAX_DEPTH - level))
+            boundary = np.concatenate(([True], prefix[1:] != prefix[:-1]))
+            starts.append(np.flatnonzero(boundary))
+            self.node_cells.append(offset + (np.cumsum(boundary) - 1)[rank])
+            offset += len(starts[-1])
+            if np.diff(np.append(starts[-1], n)).max() <= LEAF_SIZE:
+                break
+
+        self.start = np.concatenate(starts)
+        self.count = np.concatenate([np.diff(np.append(level, n)) for level in starts])
+        end = self.start + self.count
+        self.cx = (sum_x[end] - sum_x[self.start]) / self.count
+        self.cy = (sum_y[end] - sum_y[self.start]) / self.count
+        # Bounding box of the nodes of each cell, tighter than the cell itself
+        sorted_x, sorted_y = x[self.order], y[self.order]
+        self.x0, self.x1, self.y0, self.y1 = (
+            np.concatenate([reduce.reduceat(values, level) for level in starts])
+            for reduce, values in (
+                (np.minimum, sorted_x), (np.maximum, sorted_x),
+                (np.minimum, sorted_y), (np.maximum, sorted_y),
+            )
+        )
+        self.width = np.maximum(self.x1 - self.x0, self.y1 - self.y0)
+        self.leaf = self.count <= LEAF_SIZE
+        self.leaf[-len(starts[-1]):] = True
+        # Children are the cells of the next level starting inside the parent's run
+        self.first_child = np.zeros(len(self.start), dtype=np.int64)
+        self.children = np.zeros(len(self.start), dtype=np.int64)
+        offset = 0
+        for level, child_level in zip(starts, starts[1:]):
+            cells = slice(offset, offset + len(level))
+            offset += len(level)
+            first = np.searchsorted(child_level, level)
+            self.first_child[cells] = offset + first
+            self.children[cells] = np.diff(np.append(first, len(child_level)))
+        self.children[self.leaf] = 0
+
+
+class _Simulation:
+    """State of one force simulation; coordinates are kept as separate x/y arrays."""
+
+    def __init__(self, pos: np.ndarray, edges: np.ndarray):
+        self.x = np.ascontiguousarray(pos[:, 0], dtype=float)
+        self.y = np.ascontiguousarray(pos[:, 1], dtype=float)
+        self.vx = np.zeros_like(self.x)
+        self.vy = np.zeros_like(self.y)
+        n = len(self.x)
+        self.source = np.ascontiguousarray(edges[:, 0]) if len(edges) else np.empty(0, dtype=int)
+        self.target = np.ascontiguousarray(edges[:, 1]) if len(edges) else np.empty(0, dtype=int)
+        degree = np.bincount(np.concatenate((self.source, self.target)), minlength=n).astype(float)
+        ds, dt = degree[self.source], degree[self.target]
+        self.strength = 1 / np.maximum(np.minimum(ds, dt), 1)
+        self.bias = ds / np.maximum(ds + dt, 1)
+
+    def _add(self, into: np.ndarray, index: np.ndarray, values: np.ndarray):
+        """into[index] += values, summing repeated indices."""
+        into += np.bincount(index, weights=values, minlength=len(into))
+
+    def links(self, alpha: float):
+        """Pull linked nodes towards LINK_DISTANCE, using next-tick positions like d3."""
+        s, t = self.source, self.target
+        dx = self.x[t] + self.vx[t] - self.x[s] - self.vx[s]
+        dy = self.y[t] + self.vy[t] - self.y[s] - self.vy[s]
+        length = np.maximum(np.sqrt(dx * dx + dy * dy), 1e-6)
+        k = (length - LINK_DISTANCE) / length * alpha * self.strength
+        dx *= k
+        dy *= k
+        self._add(self.vx, t, -dx * self.bias)
+        self._add(self.vy, t, -dy * self.bias)
+        self._add(self.vx, s, dx * (1 - self.bias))
+        self._add(self.vy, s, dy * (1 - self.bias))
+
+    def many_body(self, alpha: float):
+        """Apply charge (to velocities) and collision (to positions) with a dual-tree Barnes-Hut walk.
+
+        Pairs of quadtree cells are walked from (root, root). Once two cells
+        are far apart for their size (THETA) and certainly hold no nodes
+        within collision range of each other, the source cell acts on the
+        target cell through its centroid, as a force and its gradient at the
+        target's centroid; otherwise the larger cell is opened. Pairs of leaf
+        cells interact node by node. Exact pairs are visited from both ends,
+        so each end applies its own half of a collision.
+        """
+        x, y = self.x, self.y
+        n = len(x)
+        tree = _QuadTree(x, y)
+        cells = len(tree.count)
+        charge = CHARGE * alpha
+        diameter = 2 * COLLISION_RADIUS
+        # Per target cell: force at its centroid and that force's gradient
+        field = np.zeros((5, cells))
+        # Collisions are applied after the walk, which reads the old positions
+        shift_x, shift_y = np.zeros(n), np.zeros(n)
+
+        pending = [(np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64))]
+        while pending:
+            a, b = pending.pop()
+            if len(a) > WALK_CHUNK:
+                pending.append((a[WALK_CHUNK:], b[WALK_CHUNK:]))
+                a, b = a[:WALK_CHUNK], b[:WALK_CHUNK]
+            rx = tree.cx[b] - tree.cx[a]
+            ry = tree.cy[b] - tree.cy[a]
+            dist2 = rx * rx + ry * ry
+            span = tree.width[a] + tree.width[b]
+            # Gap between the bounding boxes, which must exceed the collision range
+            gap_x = np.maximum(np.maximum(tree.x0[b] - tree.x1[a], tree.x0[a] - tree.x1[b]), 0)
+            gap_y = np.maximum(np.maximum(tree.y0[b] - tree.y1[a], tree.y0[a] - tree.y1[b]), 0)
+            far = (span * span < THETA * THETA * dist2) & (gap_x * gap_x + gap_y * gap_y > diameter * diameter)
+
+            if far.any():
+                rx, ry, dist2 = rx[far], ry[far], dist2[far]
+                k = tree.count[b[far]] * charge / dist2
+                k2 = 2 * k / dist2
+                target = a[far]
+                for row, values in enumerate((rx * k, ry * k, k - k2 * rx * rx, -k2 * rx * ry, k - k2 * ry * ry)):
+                    field[row] += np.bincount(target, weights=values, minlength=cells)
+
+            near = ~far
+            both = near & tree.leaf[a] & tree.leaf[b]
+            if both.any():
+                self._exact(tree, a[both], b[both], charge, shift_x, shift_y)
+
+            split = near & ~both
+            a, b = a[split], b[split]
+            # Open the wider of the two cells (a leaf never opens)
+            open_a = ~tree.leaf[a] & (tree.leaf[b] | (tree.width[a] >= tree.width[b]))
+            children = np.where(open_a, tree.children[a], tree.children[b])
+            child = np.repeat(np.where(open_a, tree.first_child[a], tree.first_child[b]), children)
+            child += _runs(children)
+            a, b, open_a = np.repeat(a, children), np.repeat(b, children), np.repeat(open_a, children)
+            if len(a):
+                pending.append((np.where(open_a, child, a), np.where(open_a, b, child)))
+
+        # Every node takes the field of each cell it is in, moved to its own position
+        for node_cell in tree.node_cells:
+            fx, fy, jxx, jxy, jyy = field[:, node_cell]
+            dx = x - tree.cx[node_cell]
+            dy = y - tree.cy[node_cell]
+            self.vx += fx - jxx * dx - jxy * dy
+            self.vy += fy - jxy * dx - jyy * dy
+
+        x += shift_x
+        y += shift_y
+
+    def _exact(self, tree: _QuadTree, a: np.ndarray, b: np.ndarray, charge: float,
+               shift_x: np.ndarray, shift_y: np.ndarray):
+        """Apply the exact repulsion and collision of every node of cell a with every node of cell b."""
+        count_a, count_b = tree.count[a], tree.count[b]
+        pairs = count_a * count_b
+        pair = np.repeat(np.arange(len(a)), pairs)
+        offset = _runs(pairs)
+        per_b = count_b[pair]
+        i = tree.order[tree.start[a][pair] + offset // per_b]
+        j = tree.order[tree.start[b][pair] + offset % per_b]
+        other = i != j
+        i, j = i[other], j[other]
+        if not len(i):
+            return
+        dx = self.x[j] - self.x[i]
+        dy = self.y[j] - self.y[i]
+        dist2 = np.maximum(dx * dx + dy * dy, 1.0)
+        w = charge / dist2
+        self._add(self.vx, i, dx * w)
+        self._add(self.vy, i, dy * w)
+
+        close = np.nonzero(dist2 < (2 * COLLISION_RADIUS) ** 2)[0]
+        if len(close):
+            dist = np.sqrt(dist2[close])
+            # Each end moves half of the overlap
+            k = (2 * COLLISION_RADIUS - dist) / dist * 0.5
+            self._add(shift_x, i[close], -dx[close] * k)
+            self._add(shift_y, i[close], -dy[close] * k)
+
+    def step(self):
+        """Apply velocity decay and move the nodes."""
+        self.vx *= 1 - VELOCITY_DECAY
+        self.vy *= 1 - VELOCITY_DECAY
+        self.x += self.vx
+        self.y += self.vy
+
+
+def cold_alpha_decay(node_count: int) -> float:
+    """Get the alpha decay of a cold start, cooling large graphs in fewer ticks.
+
+    Graphs of up to COLD_TICK_BUDGET / COLD_TICKS nodes get d3's 300 ticks.
+    """
+    ticks = max(MIN_COLD_TICKS, min(COLD_TICKS, COLD_TICK_BUDGET // max(node_count, 1)))
+    return 1 - ALPHA_MIN ** (1 / ticks)
+
+
+def force_layout(
+    node_count: int,
+    edges: np.ndarray,
+    initial: Optional[np.ndarray] = None,
+    alpha: float = 1.0,
+    max_ticks: Optional[int] = None,
+    alpha_decay: float = ALPHA_DECAY
+) -> np.ndarray:
+    """Run the force simulation until it cools down.
+
+    Args:
+        node_count: Number of nodes
+        edges: (m, 2) array of linked node indices
+        initial: (n, 2) start positions, or None for the phyllotaxis spiral
+        alpha: Starting energy; 1 for a cold start, lower to refine a layout
+        max_ticks: Stop after this many ticks even if not cooled down
+        alpha_decay: Share of alpha lost per tick (see cold_alpha_decay)
+
+    Returns:
+        (n, 2) array of positions centred on the origin
+    """
+    pos = _phyllotaxis(node_count) if initial is None else initial
+    if node_count == 0:
+        return pos
+    sim = _Simulation(pos, edges)
+
+    ticks = 0
+    while alpha >= ALPHA_MIN and (max_ticks is None or ticks < max_ticks):
+        ticks += 1
+        alpha += -alpha * alpha_decay
+        if len(edges):
+            sim.links(alpha)
+        sim.many_body(alpha)
+        sim.step()
+
+    result = np.column_stack((sim.x, sim.y))
+    return result - result.mean(axis=0)
+
+
+class LayoutCache:
+    """Last layout per (dataset, filter set), used to warm-start the next one.
+
+    Graphs with more than max_nodes nodes are not laid out.
+    """
+
+    def __init__(self, max_entries: int = 32, max_nodes: int = 20000):
+        self.max_entries = max_entries
+        self.max_nodes = max_nodes
+        self._entries: "OrderedDict[Hashable, Tuple[str, Dict[NodeKey, Tuple[float, float]]]]" = OrderedDict()
+        # Layouts being computed, per (key, version)
+        self._running: Dict[Tuple[Hashable, str], "Future[np.ndarray]"] = {}
+        self._lock = threading.Lock()
+
+    def layout(self, key: Hashable, version: str, nodes: List[NodeKey],
+               edges: np.ndarray) -> np.ndarray:
+        """Get positions for a graph, reusing or refining the cached layout.
+
+        Args:
+            key: Dataset and filter set the graph was built for
+            version: Dataset version the graph was built from
+            nodes: Node keys in node index order
+            edges: (m, 2) array of linked node indices
+
+        Returns:
+            (n, 2) array of positions
+
+        Raises:
+            ValueError: If the graph has more than max_nodes nodes
+        """
+        if len(nodes) > self.max_nodes:
+            raise ValueError(
+                f"Graph has {len(nodes)} nodes; server-side layout is limited to {self.max_nodes}"
+            )
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                if cached[0] == version:
+                    previous = cached[1]
+                    return np.array([previous[node] for node in nodes], dtype=float).reshape(-1, 2)
+            # Concurrent requests for the same graph wait for the first one
+            # instead of repeating the work; other layouts run alongside
+            running = self._running.get((key, version))
+            if running is None:
+                future = self._running[(key, version)] = Future()
+        if running is not None:
+            return running.result()
+
+        try:
+            initial = None
+            if cached is not None:
+                initial = self._warm_start(cached[1], nodes, edges)
+            if initial is None:
+                positions = force_layout(len(nodes), edges, alpha_decay=cold_alpha_decay(len(nodes)))
+            else:
+                positions = force_layout(len(nodes), edges, initial, WARM_ALPHA, WARM_TICKS)
+        except BaseException as e:
+            with self._lock:
+                del self._running[(key, version)]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._running[(key, version)]
+            self._entries[key] = (version, dict(zip(nodes, map(tuple, positions.tolist()))))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(positions)
+        return positions
+
+    def _warm_start(self, previous: Dict[NodeKey, Tuple[float, float]], nodes: List[NodeKey],
+                    edges: np.ndarray) -> Optional[np.ndarray]:
+        """Start positions from a previous layout, or None if a cold start is better.
+
+        New nodes are placed at the centroid of their already placed neighbours,
+        or on the spiral if they have none.
+        """
+        known = np.array([node in previous for node in nodes], dtype=bool)
+        if not len(nodes) or 1 - known.mean() > WARM_MAX_NEW_FRACTION:
+            return None
+
+        pos = _phyllotaxis(len(nodes))
+        pos[known] = [previous[node] for node, k in zip(nodes, known) if k]
+        new = np.nonzero(~known)[0]
+        if len(new) and len(edges):
+            both = np.concatenate((edges, edges[:, ::-1]))
+            both = both[np.isin(both[:, 0], new) & known[both[:, 1]]]
+            sums = np.column_stack([
+                np.bincount(both[:, 0], weights=pos[both[:, 1], axis], minlength=len(nodes))
+                for axis in (0, 1)
+            ])
+            counts = np.bincount(both[:, 0], minlength=len(nodes))
+            placed = new[counts[new] > 0]
+            # Small deterministic offset so new nodes do not sit exactly on top of each other
+            jitter = _phyllotaxis(len(placed)) * 0.1
+            pos[placed] = sums[placed] / counts[placed, None] + jitter
+        return pos
+
+
+# Global cache instance shared by all request handlers
+layout_cache = LayoutCache(max_nodes=settings.layout_max_nodes)
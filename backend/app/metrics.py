@@ -0,0 +1,204 @@
+"""Request and storage-layer metrics in the Prometheus text format.
+
+MetricsMiddleware records a latency histogram per route. Storage and
+request code wraps its phases (parse, validate, filter, search, serialise,
+write, fsync) in timed() and counts file I/O with add_bytes(); GET /metrics
+renders all of it together with the cache counters.
+
+Requests sent with ``X-Server-Timing: 1`` also get their own phase timings
+back in a ``Server-Timing`` response header, which browser dev tools show
+next to the network timings.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Request header that opts a request into the Server-Timing response header
+SERVER_TIMING_HEADER = "x-server-timing"
+
+# Label value for requests that matched no route (404s)
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Phase durations of the current request, when it asked for Server-Timing.
+# Worker threads get a copy of the context, so they add to the same dict.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+# (name, type, help, [(labels, value)])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def samples(self, name: str, labels: Dict[str, str]) -> Iterator[str]:
+        """Prometheus sample lines for this histogram."""
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}"
+        yield f"{name}_sum{_labels(labels)} {self.sum!r}"
+        yield f"{name}_count{_labels(labels)} {self.count}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Metrics:
+    """Thread-safe registry of the request and storage metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, str], Histogram] = {}
+        self.phases: Dict[str, Histogram] = {}
+        self.bytes = {"read": 0, "written": 0}
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, str(status))
+        with self._lock:
+            histogram = self.requests.get(key)
+            if histogram is None:
+                histogram = self.requests[key] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_phase(self, phase: str, seconds: float):
+        with self._lock:
+            histogram = self.phases.get(phase)
+            if histogram is None:
+                histogram = self.phases[phase] = Histogram()
+            histogram.observe(seconds)
+
+    def add_bytes(self, direction: str, count: int):
+        with self._lock:
+            self.bytes[direction] += count
+
+    def render(self, families: Iterable[Family] = ()) -> str:
+        """Render the metrics in the Prometheus text exposition format.
+
+        Args:
+            families: Additional gauges and counters (e.g. cache statistics)
+
+        Returns:
+            The exposition text, ending with a newline
+        """
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP userneeds_request_duration_seconds Request latency by route",
+                "# TYPE userneeds_request_duration_seconds histogram",
+            ]
+            for (method, route, status), histogram in sorted(self.requests.items()):
+                labels = {"method": method, "route": route, "status": status}
+                lines += histogram.samples("userneeds_request_duration_seconds", labels)
+            lines += [
+                "# HELP userneeds_phase_duration_seconds Time spent per request/storage phase",
+                "# TYPE userneeds_phase_duration_seconds histogram",
+            ]
+            for phase, histogram in sorted(self.phases.items()):
+                lines += histogram.samples("userneeds_phase_duration_seconds", {"phase": phase})
+            lines += [
+                "# HELP userneeds_storage_bytes_total Bytes read from and written to data files",
+                "# TYPE userneeds_storage_bytes_total counter",
+            ]
+            for direction, count in self.bytes.items():
+                lines.append(f"userneeds_storage_bytes_total{_labels({'direction': direction})} {count}")
+
+        for name, kind, description, samples in families:
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{_labels(labels)} {value!r}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+# Global registry shared by the middleware, the storage layer and GET /metrics
+metrics = Metrics()
+
+
+@contextmanager
+def timed(phase: str):
+    """Record the duration of the enclosed block as a phase of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe_phase(phase, elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0.0) + elapsed
+
+
+def add_bytes(direction: str, count: int):
+    """Count bytes read from ("read") or written to ("written") data files."""
+    metrics.add_bytes(direction, count)
+
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    """Format phase durations (in seconds) as a Server-Timing header value."""
+    entries = [f"{phase};dur={seconds * 1000:.3f}" for phase, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """Time every request by route template and add Server-Timing when asked.
+
+    Added before the other middleware so it runs innermost and sees the
+    route the router matched. Streaming responses are timed until the
+    stream closes.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = {} if Headers(scope=scope).get(SERVER_TIMING_HEADER) == "1" else None
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timings is not None:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(timings, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            metrics.observe_request(scope["method"], route, status, time.perf_counter() - start)
+            _request_timings.reset(token)
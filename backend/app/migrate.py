@@ -0,0 +1,66 @@
+"""One-shot migration from a JSON data file to a SQLite database.
+
+Usage (from the backend directory):
+
+    python -m app.migrate                          # data.json -> data.db
+    python -m app.migrate data.example.json demo.db
+    python -m app.migrate data.json data.db --force
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from .config import DATA_FILE, SQLITE_DATA_FILE
+from .models import DataStore
+from .sqlite_backend import SqliteBackend
+
+
+def migrate_json_to_sqlite(json_file: Path, db_file: Path, force: bool = False) -> DataStore:
+    """Copy a data.json-format file into a SQLite database.
+
+    Args:
+        json_file: Source data file (data.json / data.example.json format)
+        db_file: Target SQLite database
+        force: Replace the content of an existing database
+
+    Returns:
+        The migrated DataStore
+
+    Raises:
+        FileExistsError: If db_file exists and force is not set
+    """
+    if db_file.exists() and not force:
+        raise FileExistsError(f"{db_file} already exists; use --force to replace its content")
+
+    with open(json_file, 'r') as f:
+        data = DataStore(**json.load(f))
+    SqliteBackend(db_file).import_data(data)
+    return data
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("json_file", nargs="?", type=Path, default=DATA_FILE)
+    parser.add_argument("db_file", nargs="?", type=Path, default=SQLITE_DATA_FILE)
+    parser.add_argument("--force", action="store_true", help="replace an existing database")
+    args = parser.parse_args(argv)
+
+    try:
+        data = migrate_json_to_sqlite(args.json_file, args.db_file, args.force)
+    except (FileNotFoundError, FileExistsError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(
+        f"Migrated {args.json_file} -> {args.db_file}: "
+        f"{len(data.userSuperGroups)} super groups, {len(data.userGroups)} user groups, "
+        f"{len(data.entities)} entities, {len(data.workflowPhases)} workflow phases, "
+        f"{len(data.userNeeds)} user needs"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
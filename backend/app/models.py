@@ -1,7 +1,7 @@
 """Pydantic models for User Needs Management API."""
 
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 
 class UserSuperGroup(BaseModel):
@@ -52,8 +52,8 @@ class UserNeed(BaseModel):
 
 
 class UserNeedCreate(BaseModel):
-    """User need creation model."""
-    id: str
+    """User need creation model (without an ID, the next one of its user group is allocated)."""
+    id: Optional[str] = None
     userGroupId: str
     title: str
     description: str
@@ -86,6 +86,55 @@ class UserNeedUpdate(BaseModel):
     constraints: Optional[List[str]] = None
 
 
+class UserNeedBatchCreate(BaseModel):
+    """Batch operation creating a user need."""
+    op: Literal["create"]
+    need: UserNeedCreate
+
+
+class UserNeedBatchUpdate(BaseModel):
+    """Batch operation updating a user need."""
+    op: Literal["update"]
+    id: str
+    need: UserNeedUpdate
+
+
+class UserNeedBatchDelete(BaseModel):
+    """Batch operation deleting a user need."""
+    op: Literal["delete"]
+    id: str
+
+
+class UserNeedBatchRequest(BaseModel):
+    """Batch of user need operations applied all-or-nothing."""
+    operations: List[Union[UserNeedBatchCreate, UserNeedBatchUpdate, UserNeedBatchDelete]] = Field(
+        discriminator="op"
+    )
+
+
+class UserNeedBatchResult(BaseModel):
+    """Outcome of a single batch operation."""
+    index: int
+    op: str
+    id: Optional[str]
+    ok: bool
+    error: Optional[str] = None
+    need: Optional[UserNeed] = None
+
+
+class UserNeedBatchResponse(BaseModel):
+    """Batch outcome: applied is False if any operation failed validation."""
+    applied: bool
+    results: List[UserNeedBatchResult]
+
+
+class UserNeedSearchHit(BaseModel):
+    """Full-text search result: highlights maps a field to matched [start, end) ranges."""
+    need: UserNeed
+    score: float
+    highlights: Dict[str, List[Tuple[int, int]]]
+
+
 class DataStore(BaseModel):
     """Data store model containing all collections."""
     userSuperGroups: List[UserSuperGroup]
@@ -93,3 +142,47 @@ class DataStore(BaseModel):
     entities: List[Entity]
     workflowPhases: List[WorkflowPhase]
     userNeeds: List[UserNeed]
+
+
+class IntegrityIssue(BaseModel):
+    """A duplicate ID/prefix or unknown reference found by an integrity check."""
+    collection: str
+    id: str
+    field: str
+    value: str
+    message: str
+
+
+class IntegrityReport(BaseModel):
+    """Outcome of a whole-dataset integrity check."""
+    ok: bool
+    counts: Dict[str, int]
+    issueCount: int
+    issues: List[IntegrityIssue]
+
+
+class ImportLineError(BaseModel):
+    """Error for a single line of an NDJSON import."""
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    """Outcome of an NDJSON import."""
+    applied: bool
+    lines: int
+    imported: Dict[str, int]
+    errorCount: int
+    errors: List[ImportLineError] = []
+
+
+class ImportProgress(BaseModel):
+    """Progress of a running or recently finished NDJSON import."""
+    id: str
+    state: str
+    startedAt: str
+    bytesRead: int
+    bytesTotal: Optional[int] = None
+    lines: int
+    imported: Dict[str, int]
+    errorCount: int
@@ -0,0 +1,121 @@
+"""Cursor pagination and sparse fieldsets for user need listings."""
+
+import base64
+import heapq
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .models import UserNeed
+
+# Sort orders supported by GET /api/user-needs. None keeps insertion order.
+# Every order ends with a unique component so cursors are unambiguous.
+SORT_ORDERS = ("id", "workflowPhase", "userGroupId")
+
+# Sort key of the last item on a page, e.g. (phase order, need ID)
+SortKey = Tuple[Any, ...]
+
+# Types of the sort key components for each sort order (None: insertion position)
+SORT_KEY_TYPES = {
+    None: (int,),
+    "id": (str,),
+    "workflowPhase": (int, str),
+    "userGroupId": (str, str),
+}
+
+# Sorts needs whose workflow phase is unknown after every known phase
+UNKNOWN_PHASE_ORDER = 2 ** 31
+
+
+def encode_cursor(sort: Optional[str], key: SortKey) -> str:
+    """Encode the sort key of the last returned item as an opaque cursor."""
+    payload = json.dumps({"s": sort, "k": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: Optional[str]) -> SortKey:
+    """Decode a cursor produced by encode_cursor for the same sort order.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort order
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key = tuple(payload["k"])
+        cursor_sort = payload["s"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    types = SORT_KEY_TYPES[sort]
+    if len(key) != len(types) or not all(type(k) is t for k, t in zip(key, types)):
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Set[str]]:
+    """Parse a comma-separated fields= parameter into UserNeed attribute names.
+
+    The id is always included so sparse records stay addressable.
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(UserNeed.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested | {"id"}
+
+
+def sparse(needs: List[UserNeed], fields: Set[str]) -> List[Dict[str, Any]]:
+    """Serialise needs keeping only the requested fields."""
+    return [need.model_dump(include=fields) for need in needs]
+
+
+def page_needs(
+    needs: Iterable[Tuple[Any, int]],
+    phase_order: Dict[str, int],
+    sort: Optional[str] = None,
+    after: Optional[SortKey] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[Any], Optional[SortKey]]:
+    """Select a page of in-memory needs.
+
+    Args:
+        needs: The filtered needs with their insertion positions (for the
+            default order) as (need, position) pairs, in any order. Items
+            only need id, userGroupId and workflowPhase attributes, so
+            stand-ins can be paged before the needs themselves are built
+        phase_order: Workflow phase ID -> order, for the workflowPhase sort
+        sort: One of SORT_ORDERS, or None for insertion order
+        after: Sort key of the last item of the previous page
+        limit: Maximum page size, or None for no limit
+
+    Returns:
+        The page and, if more items follow, the sort key of its last item
+    """
+    def sort_key(need, position: int) -> SortKey:
+        if sort == "id":
+            return (need.id,)
+        if sort == "workflowPhase":
+            return (phase_order.get(need.workflowPhase, UNKNOWN_PHASE_ORDER), need.id)
+        if sort == "userGroupId":
+            return (need.userGroupId, need.id)
+        return (position,)
+
+    keyed = ((sort_key(need, position), need) for need, position in needs)
+    if after is not None:
+        keyed = (item for item in keyed if item[0] > after)
+
+    # Only the page (plus one to detect more) is ever sorted
+    first = lambda item: item[0]
+    if limit is None:
+        page = sorted(keyed, key=first)
+    else:
+        page = heapq.nsmallest(limit + 1, keyed, key=first)
+    more = limit is not None and len(page) > limit
+    page = page[:limit]
+    return [need for _, need in page], (page[-1][0] if more else None)
@@ -0,0 +1,90 @@
+"""Cross-tabulated user need counts for the statistics pivot view.
+
+Counts come from NeedTable.crosstab as a dense array with one axis per
+requested dimension. Each axis lists the dimension's reference records in
+their own order (workflow phases by their order field), followed by any
+values the needs use without a matching record, so axes are stable while
+the data changes and every cell is present even when its count is zero.
+Flags are split into Yes and No, with unset flags counted as No.
+"""
+
+from typing import Dict, List, Optional
+
+from .columnar import DIMENSIONS, FLAGS, NeedTable
+from .models import Entity, UserGroup, UserSuperGroup, WorkflowPhase
+
+# Label of the superGroup value of user groups without a super group
+NO_SUPER_GROUP = "No super group"
+
+FLAG_LABELS = {True: "Yes", False: "No"}
+
+
+def parse_dimensions(rows: str, cols: Optional[str] = None, split: Optional[str] = None) -> List[str]:
+    """Validate the requested dimensions.
+
+    Raises:
+        ValueError: If rows is missing, a dimension is unknown or repeated, or
+            split is given without cols
+    """
+    if not rows:
+        raise ValueError("rows is required")
+    if split and not cols:
+        raise ValueError("split requires cols")
+    dimensions = [dimension for dimension in (rows, cols, split) if dimension]
+    for dimension in dimensions:
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension '{dimension}', expected one of: {', '.join(DIMENSIONS)}")
+    if len(set(dimensions)) != len(dimensions):
+        raise ValueError("Each dimension can only be used once")
+    return dimensions
+
+
+def build_pivot(
+    table: NeedTable,
+    dimensions: List[str],
+    user_groups: List[UserGroup],
+    super_groups: List[UserSuperGroup],
+    entities: List[Entity],
+    workflow_phases: List[WorkflowPhase]
+) -> dict:
+    """Build the pivot payload.
+
+    Args:
+        table: Need table of the dataset
+        dimensions: Validated rows, cols and split dimensions (cols and split optional)
+        user_groups: All user groups, for axis order and names
+        super_groups: All super groups, for axis order and names
+        entities: All entities, for axis order and names
+        workflow_phases: All workflow phases, for axis order and names
+
+    Returns:
+        rows, cols and split axes ({dimension, labels: [{id, name}]}, or None
+        when not requested), counts as nested lists indexed [row][col][split]
+        and totalNeeds, the number of needs counted
+    """
+    phases = sorted(workflow_phases, key=lambda phase: phase.order)
+    references = {
+        "userGroup": user_groups,
+        "superGroup": super_groups,
+        "entity": entities,
+        "workflowPhase": phases,
+    }
+    orders: Dict[str, list] = {dimension: [record.id for record in records] for dimension, records in references.items()}
+    names: Dict[str, Dict] = {
+        dimension: {record.id: record.name for record in records} for dimension, records in references.items()
+    }
+    names["superGroup"][None] = NO_SUPER_GROUP
+    for flag in FLAGS:
+        orders[flag] = [True, False]
+        names[flag] = FLAG_LABELS
+
+    counts, axes, total = table.crosstab(dimensions, orders)
+    result = dict.fromkeys(("rows", "cols", "split"))
+    for key, dimension, values in zip(("rows", "cols", "split"), dimensions, axes):
+        result[key] = {
+            "dimension": dimension,
+            "labels": [{"id": value, "name": names[dimension].get(value, value)} for value in values],
+        }
+    result["counts"] = counts.tolist()
+    result["totalNeeds"] = total
+    return result
@@ -0,0 +1,151 @@
+"""Cache of pre-serialised JSON responses for the list endpoints.
+
+Bodies are encoded once per dataset version and request, then served as raw
+Responses, skipping response_model validation and jsonable_encoder. Lists of
+models are encoded by pydantic-core; other payloads use orjson if installed.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import BaseModel, TypeAdapter
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+# Encoded body plus the extra headers (e.g. X-Next-Cursor) that go with it
+Rendered = Tuple[bytes, Dict[str, str]]
+
+_adapters: Dict[type, TypeAdapter] = {}
+
+
+def encode_models(models: List[BaseModel]) -> bytes:
+    """Encode a list of models of one type as a JSON array."""
+    if not models:
+        return b"[]"
+    model_type = type(models[0])
+    adapter = _adapters.get(model_type)
+    if adapter is None:
+        adapter = _adapters[model_type] = TypeAdapter(List[model_type])
+    return adapter.dump_json(models)
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode plain JSON-compatible data."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":")).encode()
+
+
+class _Entry:
+    def __init__(self, collections: Tuple[str, ...], body: bytes, headers: Dict[str, str]):
+        self.collections = collections
+        self.body = body
+        self.headers = headers
+
+
+class ResponseCache:
+    """LRU of encoded response bodies, bounded by entry count and total size.
+
+    Keys include the ETag of the data a body was rendered from, so a body is
+    never served for another dataset version; entries depending on a written
+    collection are also evicted eagerly to free their memory.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: _Entry):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._entries[key] = entry
+            self._size += len(entry.body)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+
+    def evict(self, collections: Iterable[str]):
+        """Drop every entry rendered from any of the given collections."""
+        written = set(collections)
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if written.intersection(e.collections)]:
+                self._size -= len(self._entries.pop(key).body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+
+# Global cache instance shared by all request handlers
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    max_bytes=settings.response_cache_max_bytes,
+)
+
+
+def cached_response(request: Request, response: Response, collections: Tuple[str, ...],
+                    render: Callable[[], Rendered]) -> Response:
+    """Serve a JSON body from the response cache, rendering it on a miss.
+
+    Call after conditional.not_modified, which sets the ETag the cache key is
+    based on.
+
+    Args:
+        request: Incoming request; its path and query string are part of the key
+        response: Response carrying the ETag header
+        collections: Collections the body is derived from
+        render: Produces the encoded body and any extra headers
+
+    Returns:
+        Raw JSON Response with the ETag and extra headers
+    """
+    etag = response.headers["ETag"]
+    key = (etag, request.url.path, request.url.query)
+    entry = response_cache.get(key)
+    if entry is None:
+        body, headers = render()
+        entry = _Entry(collections, body, headers)
+        response_cache.put(key, entry)
+    return Response(
+        content=entry.body,
+        media_type="application/json",
+        headers={**entry.headers, "ETag": etag},
+    )
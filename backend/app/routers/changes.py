@@ -0,0 +1,79 @@
+"""Server-Sent Events stream of data changes."""
+
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
+
+from ..changes import RESET, ChangeFeed
+from ..config import settings
+from ..database import get_backend
+from ..state import app_state
+
+router = APIRouter(prefix="/api", tags=["changes"])
+
+
+def _frame(feed: ChangeFeed, seq: int, event: dict) -> str:
+    """Format an event as an SSE message."""
+    kind = "reset" if event["op"] == RESET else "change"
+    return f"id: {feed.event_id(seq)}\nevent: {kind}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _stream(last_event_id: Optional[str]) -> AsyncIterator[str]:
+    """Yield change events of the current dataset until the client disconnects."""
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+    feed = backend.changes
+    seq = feed.last_seq
+    if last_event_id:
+        resumed = feed.parse_event_id(last_event_id)
+        if resumed is not None and feed.since(resumed) is not None:
+            seq = resumed
+        else:
+            yield _frame(feed, seq, {"op": RESET})
+
+    while True:
+        # Switching demo mode swaps the whole dataset
+        current = get_backend(app_state.demo_mode, app_state.workspace)
+        if current is not backend:
+            backend, feed = current, current.changes
+            seq = feed.last_seq
+            yield _frame(feed, seq, {"op": RESET})
+
+        events = feed.since(seq)
+        if events is None:
+            # Fell behind the ring buffer
+            seq = feed.last_seq
+            yield _frame(feed, seq, {"op": RESET})
+            continue
+        for seq, event in events:
+            yield _frame(feed, seq, event)
+        if not await feed.wait(seq, settings.change_feed_keepalive_seconds):
+            yield ": keep-alive\n\n"
+
+
+@router.get("/changes")
+async def stream_changes(
+    lastEventId: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    """Stream changes to the current dataset as Server-Sent Events.
+
+    Each write publishes one "change" event per record, with data
+    {"collection", "op" (create/update/delete), "id", "version"} plus
+    "previousId" when an update changed the ID; version is the collection's
+    new ETag value. A "reset" event means the client's copy can no longer be
+    patched (import, demo mode switch, or missed events) and must be refetched.
+
+    Args:
+        lastEventId: ID of the last event seen, for clients that cannot send headers
+        last_event_id: Last-Event-ID header, sent by EventSource on reconnect
+
+    Returns:
+        text/event-stream response that stays open
+    """
+    return StreamingResponse(
+        _stream(last_event_id or lastEventId),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
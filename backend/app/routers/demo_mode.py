@@ -3,6 +3,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
+from ..changes import RESET
+from ..database import COLLECTIONS, get_backend
 from ..state import app_state
 
 router = APIRouter(prefix="/api/demo-mode", tags=["demo-mode"])
@@ -20,7 +22,7 @@ class DemoModeRequest(BaseModel):
 
 
 @router.get("", response_model=DemoModeResponse)
-def get_demo_mode():
+async def get_demo_mode():
     """Get current demo mode state.
 
     Returns:
@@ -33,7 +35,7 @@ def get_demo_mode():
 
 
 @router.post("", response_model=DemoModeResponse)
-def set_demo_mode(request: DemoModeRequest):
+async def set_demo_mode(request: DemoModeRequest):
     """Set demo mode state.
 
     Args:
@@ -45,11 +47,19 @@ def set_demo_mode(request: DemoModeRequest):
     Raises:
         HTTPException: If demo mode is locked and cannot be changed
     """
+    previous = get_backend(app_state.demo_mode, app_state.workspace)
     try:
         app_state.demo_mode = request.enabled
     except ValueError as e:
         raise HTTPException(status_code=403, detail=str(e))
 
+    # Open change streams must refetch: wake the ones on the dataset being
+    # left, and reset clients that resume on the one being switched to
+    current = get_backend(app_state.demo_mode, app_state.workspace)
+    if current is not previous:
+        for backend in (previous, current):
+            backend.changes.publish([{"op": RESET, "version": backend.get_version(COLLECTIONS)}])
+
     return DemoModeResponse(
         enabled=app_state.demo_mode,
         locked=app_state.locked
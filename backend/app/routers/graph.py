@@ -0,0 +1,90 @@
+"""Network graph endpoint."""
+
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from ..conditional import not_modified
+from ..database import COLLECTIONS, get_backend
+from ..graph import build_graph
+from ..layout import layout_cache
+from ..response_cache import cached_response, encode_json
+from ..state import app_state
+
+router = APIRouter(prefix="/api", tags=["graph"])
+
+
+# Building (and laying out) the graph is CPU-bound, so this stays a sync
+# handler and runs in the threadpool
+@router.get("/graph")
+def get_graph(
+    request: Request,
+    response: Response,
+    userGroupId: Optional[str] = None,
+    entity: Optional[str] = None,
+    workflowPhase: Optional[str] = None,
+    superGroup: Optional[str] = None,
+    refined: Optional[str] = None,
+    layout: bool = False
+):
+    """Get the need/group/entity/phase graph as a compact, index-based payload.
+
+    Takes the same filters as GET /api/user-needs; they select the user need
+    nodes, while every user group, entity and workflow phase is included.
+    With layout=true the payload also carries precomputed node positions.
+
+    Args:
+        userGroupId: Filter by user group ID
+        entity: Filter by entity ID
+        workflowPhase: Filter by workflow phase ID
+        superGroup: Filter by super group
+        refined: Filter by refinement status ('refined' or 'needsRefinement')
+        layout: Include positions, a flat [x0, y0, x1, y1, ...] list centred on 0
+
+    Returns:
+        nodeTypes, edgeTypes, ids, types, labels, strings and edges (see app.graph),
+        plus positions if requested
+
+    Raises:
+        HTTPException: 400 if a layout is requested for a graph above LAYOUT_MAX_NODES nodes
+    """
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+    cached = not_modified(request, response, backend, *COLLECTIONS)
+    if cached is not None:
+        return cached
+
+    def render():
+        graph = build_graph(
+            backend.list_user_needs(
+                userGroupId=userGroupId,
+                entity=entity,
+                workflowPhase=workflowPhase,
+                superGroup=superGroup,
+                refined=refined
+            ),
+            backend.list_user_groups(),
+            backend.list_entities(),
+            backend.list_workflow_phases()
+        )
+        if layout:
+            edges = np.array(
+                [i for edge_type in graph["edgeTypes"] for i in graph["edges"][edge_type]],
+                dtype=int
+            ).reshape(-1, 2)
+            try:
+                positions = layout_cache.layout(
+                    key=(
+                        app_state.workspace, app_state.demo_mode,
+                        userGroupId, entity, workflowPhase, superGroup, refined
+                    ),
+                    version=response.headers["ETag"],
+                    nodes=list(zip(graph["types"], graph["ids"])),
+                    edges=edges
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            graph["positions"] = np.round(positions, 1).ravel().tolist()
+        return encode_json(graph), {}
+
+    return cached_response(request, response, COLLECTIONS, render)
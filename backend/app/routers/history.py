@@ -0,0 +1,116 @@
+"""Dataset version history endpoints."""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from ..config import HISTORY_ENABLED
+from ..conditional import not_modified_etag
+from ..database import StorageBackend, get_backend
+from ..history import DatasetHistory
+from ..response_cache import cached_response, encode_json
+from ..state import app_state
+
+router = APIRouter(prefix="/api/history", tags=["history"])
+
+
+def require_history(backend: StorageBackend) -> DatasetHistory:
+    """Get the version history of a dataset.
+
+    Raises:
+        HTTPException: 404 if HISTORY_ENABLED is off (it only applies to the
+            JSON storage backend) or the dataset is a demo sandbox
+    """
+    if not HISTORY_ENABLED:
+        raise HTTPException(
+            status_code=404,
+            detail="Version history is disabled (HISTORY_ENABLED, JSON storage backend only)"
+        )
+    history = backend.get_history()
+    if history is None:
+        raise HTTPException(status_code=404, detail="Version history is not recorded for demo sandboxes")
+    return history
+
+
+def _history() -> DatasetHistory:
+    return require_history(get_backend(app_state.demo_mode, app_state.workspace))
+
+
+# Reads history files, so these stay sync handlers and run in the threadpool
+@router.get("")
+def get_history(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    before: Optional[int] = Query(None, ge=0)
+):
+    """List the versions of the current dataset, newest first.
+
+    Every write is a version. Version 0 is the dataset as it was when the
+    history started.
+
+    Args:
+        limit: Maximum number of versions to return
+        before: Only list versions older than this one (the last version of the previous page)
+
+    Returns:
+        version (the current one), checkpointInterval and versions, each with
+        its version, at, replace (whether it replaced the whole dataset),
+        checkpoint (whether it is stored in full) and changes ({op, collection, id})
+
+    Raises:
+        HTTPException: 404 if the dataset keeps no history (see require_history)
+    """
+    history = _history()
+    version = history.version
+    cached = not_modified_etag(request, response, history.etag(version))
+    if cached is not None:
+        return cached
+
+    def render():
+        return encode_json({
+            "version": version,
+            "checkpointInterval": history.checkpoint_interval,
+            "versions": history.versions(limit, before if before is not None else version + 1),
+        }), {}
+
+    return cached_response(request, response, (), render)
+
+
+@router.get("/diff")
+def get_history_diff(
+    request: Request,
+    response: Response,
+    from_version: int = Query(..., alias="from", ge=0),
+    to_version: Optional[int] = Query(None, alias="to", ge=0)
+):
+    """Compare two versions of the current dataset record by record.
+
+    Args:
+        from_version: Version to compare from (query parameter from)
+        to_version: Version to compare to (query parameter to), default the current version
+
+    Returns:
+        from, to and the changed collections, each with created and deleted
+        records and updated records as {id, before, after, fields}. A record
+        whose ID changed is listed as deleted and created.
+
+    Raises:
+        HTTPException: 404 if a version does not exist or the dataset keeps
+            no history (see require_history)
+    """
+    history = _history()
+    if to_version is None:
+        to_version = history.version
+    cached = not_modified_etag(request, response, history.etag("diff", from_version, to_version))
+    if cached is not None:
+        return cached
+
+    def render():
+        try:
+            changes = history.diff(from_version, to_version)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Version not found")
+        return encode_json({"from": from_version, "to": to_version, "collections": changes}), {}
+
+    return cached_response(request, response, (), render)
@@ -1,32 +1,52 @@
 """Metadata endpoints for entities and workflow phases."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from typing import List
 
 from ..models import Entity, WorkflowPhase
-from ..database import load_data
+from ..conditional import not_modified
+from ..database import get_backend
+from ..response_cache import cached_response, encode_models
 from ..state import app_state
 
 router = APIRouter(prefix="/api", tags=["metadata"])
 
 
 @router.get("/entities", response_model=List[Entity])
-def get_entities():
+async def get_entities(request: Request, response: Response):
     """Get all entities.
 
     Returns:
         List of all entities
     """
-    data = load_data(app_state.demo_mode)
-    return data.entities
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def read():
+        cached = not_modified(request, response, backend, "entities")
+        if cached is not None:
+            return cached
+        return cached_response(
+            request, response, ("entities",), lambda: (encode_models(backend.list_entities()), {})
+        )
+
+    return await backend.read(read)
 
 
 @router.get("/workflow-phases", response_model=List[WorkflowPhase])
-def get_workflow_phases():
+async def get_workflow_phases(request: Request, response: Response):
     """Get all workflow phases.
 
     Returns:
         List of all workflow phases
     """
-    data = load_data(app_state.demo_mode)
-    return data.workflowPhases
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def read():
+        cached = not_modified(request, response, backend, "workflowPhases")
+        if cached is not None:
+            return cached
+        return cached_response(
+            request, response, ("workflowPhases",), lambda: (encode_models(backend.list_workflow_phases()), {})
+        )
+
+    return await backend.read(read)
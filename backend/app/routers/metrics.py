@@ -0,0 +1,59 @@
+"""Prometheus metrics endpoint."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..database import get_cache_stats
+from ..metrics import metrics
+from ..response_cache import response_cache
+from ..sandbox import sandboxes
+
+router = APIRouter(tags=["metrics"])
+
+# Content type of the Prometheus text exposition format (charset=utf-8 is appended)
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _cache_families(cache: str, stats: dict) -> list:
+    labels = {"cache": cache}
+    total = stats["hits"] + stats["misses"]
+    return [
+        ("userneeds_cache_hits_total", "counter", "Cache lookups answered from the cache",
+         [(labels, stats["hits"])]),
+        ("userneeds_cache_misses_total", "counter", "Cache lookups that had to load or render",
+         [(labels, stats["misses"])]),
+        ("userneeds_cache_hit_ratio", "gauge", "Share of cache lookups that hit",
+         [(labels, stats["hits"] / total if total else 0.0)]),
+        ("userneeds_cache_entries", "gauge", "Entries currently cached", [(labels, stats["entries"])]),
+        ("userneeds_cache_bytes", "gauge", "Approximate size of the cached entries", [(labels, stats["bytes"])]),
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Get request, storage and cache metrics in the Prometheus text format.
+
+    Returns:
+        Request latency histograms per route, phase latency histograms,
+        data file bytes read/written, and the DataStore and response cache
+        and demo sandbox counters
+    """
+    families = {}
+    for cache, stats in (("datastore", get_cache_stats()), ("response", response_cache.stats())):
+        # Merge the samples of both caches into one family per metric
+        for name, kind, description, samples in _cache_families(cache, stats):
+            families.setdefault(name, (name, kind, description, []))[3].extend(samples)
+
+    demo = sandboxes.stats()
+    families["userneeds_demo_sessions"] = (
+        "userneeds_demo_sessions", "gauge", "Live demo sandboxes", [({}, demo["sessions"])]
+    )
+    families["userneeds_demo_sessions_expired_total"] = (
+        "userneeds_demo_sessions_expired_total", "counter", "Demo sandboxes dropped after their TTL",
+        [({}, demo["expired"])]
+    )
+    families["userneeds_demo_sessions_evicted_total"] = (
+        "userneeds_demo_sessions_evicted_total", "counter",
+        "Demo sandboxes dropped to stay within DEMO_MAX_SESSIONS", [({}, demo["evicted"])]
+    )
+    return PlainTextResponse(metrics.render(families.values()), media_type=CONTENT_TYPE)
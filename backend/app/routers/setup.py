@@ -1,33 +1,38 @@
 """Setup and statistics endpoints."""
 
-import json
-from fastapi import APIRouter
+from typing import Optional
 
-from ..database import load_data
-from ..config import DATA_FILE
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from ..conditional import not_modified
+from ..database import COLLECTIONS, get_backend, get_cache_stats
+from ..integrity import check_dataset
+from ..models import IntegrityReport
+from ..pivot import build_pivot, parse_dimensions
+from ..response_cache import cached_response, encode_json, response_cache
+from ..sandbox import sandboxes
 from ..state import app_state
 
 router = APIRouter(prefix="/api", tags=["setup"])
 
 
 @router.get("/check-setup")
-def check_setup():
+async def check_setup():
     """Check if initial setup is required.
 
     Returns:
-        hasData: Whether the data file exists
+        hasData: Whether the main dataset exists
         needsSetup: Whether initial setup is needed (no user groups)
     """
-    # Always check the main data.json file for setup status
-    has_data = DATA_FILE.exists()
+    # Always check the main dataset for setup status
+    backend = get_backend(False, app_state.workspace)
+    has_data = backend.has_data()
     needs_setup = False
 
     if has_data:
         try:
-            with open(DATA_FILE, 'r') as f:
-                data = json.load(f)
-                # Check if there's at least one user group
-                needs_setup = len(data.get('userGroups', [])) == 0
+            # Check if there's at least one user group
+            needs_setup = len(await backend.read(backend.list_user_groups)) == 0
         except:
             needs_setup = True
     else:
@@ -40,39 +45,110 @@ def check_setup():
 
 
 @router.get("/statistics")
-def get_statistics():
+async def get_statistics(request: Request, response: Response):
     """Get statistics about user needs.
 
     Returns:
         Statistics grouped by user group, workflow phase, and entity
     """
-    data = load_data(app_state.demo_mode)
-
-    # Group by user group
-    by_user_group = {}
-    for need in data.userNeeds:
-        if need.userGroupId not in by_user_group:
-            by_user_group[need.userGroupId] = 0
-        by_user_group[need.userGroupId] += 1
-
-    # Group by workflow phase
-    by_workflow_phase = {}
-    for need in data.userNeeds:
-        if need.workflowPhase not in by_workflow_phase:
-            by_workflow_phase[need.workflowPhase] = 0
-        by_workflow_phase[need.workflowPhase] += 1
-
-    # Group by entity
-    by_entity = {}
-    for need in data.userNeeds:
-        for entity in need.entities:
-            if entity not in by_entity:
-                by_entity[entity] = 0
-            by_entity[entity] += 1
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
 
-    return {
-        "totalNeeds": len(data.userNeeds),
-        "byUserGroup": by_user_group,
-        "byWorkflowPhase": by_workflow_phase,
-        "byEntity": by_entity
-    }
+    def read():
+        cached = not_modified(request, response, backend, "userNeeds")
+        if cached is not None:
+            return cached
+        return backend.get_statistics()
+
+    return await backend.read(read)
+
+
+# Counting is CPU-bound, so this stays a sync handler and runs in the threadpool
+@router.get("/statistics/pivot")
+def get_statistics_pivot(
+    request: Request,
+    response: Response,
+    rows: str,
+    cols: Optional[str] = None,
+    split: Optional[str] = None
+):
+    """Get user need counts cross-tabulated by up to three dimensions.
+
+    Dimensions are userGroup, superGroup, workflowPhase, entity, refined,
+    optional, futureFeature and triggersStateChange. Responses are cached per
+    dataset version.
+
+    Args:
+        rows: Dimension of the first axis
+        cols: Dimension of the second axis
+        split: Dimension of the third axis (requires cols)
+
+    Returns:
+        rows, cols and split axes with their labels, the dense counts matrix
+        indexed [row][col][split] and totalNeeds
+
+    Raises:
+        HTTPException: If a dimension is unknown or repeated
+    """
+    try:
+        dimensions = parse_dimensions(rows, cols, split)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+    cached = not_modified(request, response, backend, *COLLECTIONS)
+    if cached is not None:
+        return cached
+
+    def render():
+        pivot = build_pivot(
+            backend.get_need_table(),
+            dimensions,
+            backend.list_user_groups(),
+            backend.list_user_super_groups(),
+            backend.list_entities(),
+            backend.list_workflow_phases()
+        )
+        return encode_json(pivot), {}
+
+    return cached_response(request, response, COLLECTIONS, render)
+
+
+# Scans the whole dataset, so this stays a sync handler and runs in the threadpool
+@router.get("/integrity", response_model=IntegrityReport)
+def get_integrity(request: Request, response: Response):
+    """Check the current dataset for duplicate IDs/prefixes and unknown references.
+
+    Returns:
+        ok flag, record counts per collection and the issues found (the first 1000)
+    """
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+    cached = not_modified(request, response, backend, *COLLECTIONS)
+    if cached is not None:
+        return cached
+    return check_dataset(backend)
+
+
+@router.get("/cache-stats")
+async def cache_stats():
+    """Get DataStore and response cache hit/miss counters.
+
+    Returns:
+        hits, misses, hitRate and number of cached data files, plus the
+        response cache counters under responses and the demo sandboxes
+        under demoSessions
+    """
+    return {**get_cache_stats(), "responses": response_cache.stats(), "demoSessions": sandboxes.stats()}
+
+
+@router.post("/flush")
+async def flush():
+    """Write any buffered changes of the current dataset to durable storage.
+
+    Runs behind the writes already queued, so they are flushed too.
+
+    Returns:
+        flushed: True once every acknowledged change is on disk
+    """
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+    await backend.write(backend.flush)
+    return {"flushed": True}
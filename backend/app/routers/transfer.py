@@ -0,0 +1,117 @@
+"""Streaming NDJSON export and import endpoints."""
+
+import logging
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from ..changes import RESET
+from ..models import ImportProgress, ImportResult
+from ..database import COLLECTIONS, get_backend
+from ..response_cache import response_cache
+from ..state import app_state
+from ..transfer import RUNNING_STATES, NdjsonImporter, export_lines, import_tracker
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["transfer"])
+
+# Log import progress every this many lines
+PROGRESS_INTERVAL = 10000
+
+
+@router.get("/export")
+def export_data():
+    """Stream the current dataset as NDJSON.
+
+    Returns:
+        One {"collection", "record"} object per line: super groups, user groups,
+        entities, workflow phases, then user needs
+    """
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+    filename = "data.demomode.ndjson" if app_state.demo_mode else "data.ndjson"
+    return StreamingResponse(
+        export_lines(backend),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/import", response_model=ImportResult)
+async def import_data(request: Request, dryRun: bool = False):
+    """Replace the current dataset with an NDJSON export.
+
+    The body is parsed and validated line by line as it arrives, and the
+    validated user needs are spooled to a temporary file. The dataset is only
+    replaced if every line is valid; the records are then streamed into the
+    backend. GET /api/import/progress reports the import while it runs.
+
+    Args:
+        request: Request whose body is the NDJSON (as produced by GET /api/export)
+        dryRun: Only validate, never replace the dataset
+
+    Returns:
+        applied flag, line and record counts, and the first per-line errors
+
+    Raises:
+        HTTPException: 400 with the import report if any line is invalid,
+            or if the import is empty
+    """
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+    length = request.headers.get("content-length")
+    importer = NdjsonImporter(int(length) if length and length.isdigit() else None)
+    import_tracker.start(backend, importer)
+    try:
+        next_progress = PROGRESS_INTERVAL
+        async for chunk in request.stream():
+            # Parsing and validation are CPU-bound; keep them off the event loop
+            await run_in_threadpool(importer.feed, chunk)
+            if importer.lines >= next_progress:
+                logger.info("Import %s: %d lines read, %d errors", importer.id, importer.lines, importer.error_count)
+                next_progress = importer.lines + PROGRESS_INTERVAL
+        importer.finish()
+
+        result = ImportResult(
+            applied=False,
+            lines=importer.lines,
+            imported=importer.counts(),
+            errorCount=importer.error_count,
+            errors=importer.errors
+        )
+        if importer.error_count:
+            raise HTTPException(status_code=400, detail=result.model_dump())
+        if not any(result.imported.values()):
+            raise HTTPException(status_code=400, detail="Import contains no records")
+        if not dryRun:
+            importer.state = "applying"
+
+            def replace():
+                with backend.mutation_lock:
+                    backend.import_records(importer.records())
+                    backend.changes.publish([{"op": RESET, "version": backend.get_version(COLLECTIONS)}])
+                response_cache.evict(COLLECTIONS)
+
+            await backend.write(replace)
+            result.applied = True
+        importer.state = "applied" if result.applied else "validated"
+        return result
+    finally:
+        if importer.state in RUNNING_STATES:
+            importer.state = "failed"
+        importer.close()
+
+
+@router.get("/import/progress", response_model=List[ImportProgress])
+def get_import_progress():
+    """Get the progress of the imports into the current dataset.
+
+    Returns:
+        Running imports and the last few finished ones, newest first. state
+        is reading (the body is being validated), applying, or once finished
+        applied, validated (dry runs) or failed. bytesTotal is the request's
+        Content-Length, if it sent one.
+    """
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+    return import_tracker.progress(backend)
@@ -1,28 +1,41 @@
 """User groups endpoints."""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import List
 
 from ..models import UserGroup
-from ..database import load_data, save_data
+from ..conditional import guarded_write, not_modified
+from ..database import StorageBackend, get_backend
+from ..id_allocator import format_need_id
+from ..integrity import reference_checker
+from ..response_cache import cached_response, encode_models
 from ..state import app_state
 
 router = APIRouter(prefix="/api/user-groups", tags=["user-groups"])
 
 
 @router.get("", response_model=List[UserGroup])
-def get_user_groups():
+async def get_user_groups(request: Request, response: Response):
     """Get all user groups.
 
     Returns:
         List of all user groups
     """
-    data = load_data(app_state.demo_mode)
-    return data.userGroups
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def read():
+        cached = not_modified(request, response, backend, "userGroups")
+        if cached is not None:
+            return cached
+        return cached_response(
+            request, response, ("userGroups",), lambda: (encode_models(backend.list_user_groups()), {})
+        )
+
+    return await backend.read(read)
 
 
 @router.post("", response_model=UserGroup)
-def create_user_group(user_group: UserGroup):
+async def create_user_group(user_group: UserGroup, request: Request, response: Response):
     """Create a new user group.
 
     Args:
@@ -32,22 +45,48 @@ def create_user_group(user_group: UserGroup):
         The created user group
 
     Raises:
-        HTTPException: If user group ID already exists
+        HTTPException: If user group ID already exists or superGroup is unknown
     """
-    data = load_data(app_state.demo_mode)
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def write():
+        with guarded_write(request, response, backend, "userGroups") as changes:
+
+            # Check if ID already exists
+            if backend.get_user_group(user_group.id) is not None:
+                raise HTTPException(status_code=400, detail="User group with this ID already exists")
+
+            error = reference_checker(backend).user_group_error(user_group.superGroup)
+            if error:
+                raise HTTPException(status_code=400, detail=error)
+
+            backend.create_user_group(user_group)
+            changes.created("userGroups", user_group.id)
+            return user_group
 
-    # Check if ID already exists
-    if any(ug.id == user_group.id for ug in data.userGroups):
-        raise HTTPException(status_code=400, detail="User group with this ID already exists")
+    return await backend.write(write)
 
-    data.userGroups.append(user_group)
-    save_data(data, app_state.demo_mode)
-    return user_group
+
+def _need_id_prefix(backend: StorageBackend, user_group_id: str) -> str:
+    """Get the need ID prefix of a user group's super group.
+
+    Raises:
+        HTTPException: If user group not found or invalid super group
+    """
+    try:
+        return backend.need_id_prefix(user_group_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="User group not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/next-id/{user_group_id}")
-def get_next_id(user_group_id: str):
-    """Generate the next available ID for a user group.
+async def get_next_id(user_group_id: str):
+    """Get the next available ID for a user group, without reserving it.
+
+    Concurrent callers may see the same ID. Create needs without an ID to
+    have one allocated atomically, or reserve IDs before using them.
 
     Args:
         user_group_id: The user group to generate an ID for
@@ -58,40 +97,39 @@ def get_next_id(user_group_id: str):
     Raises:
         HTTPException: If user group not found or invalid super group
     """
-    data = load_data(app_state.demo_mode)
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def read():
+        prefix = _need_id_prefix(backend, user_group_id)
+        next_id = format_need_id(prefix, backend.next_need_number(prefix))
+        return {"nextId": next_id, "prefix": prefix}
+
+    return await backend.read(read)
 
-    # Find the user group
-    user_group = next((ug for ug in data.userGroups if ug.id == user_group_id), None)
-    if not user_group:
-        raise HTTPException(status_code=404, detail="User group not found")
 
-    # Get the super group prefix from data
-    super_group_id = user_group.superGroup
-    if not super_group_id:
-        raise HTTPException(status_code=400, detail="User group has no super group assigned")
+@router.post("/next-id/{user_group_id}/reserve")
+async def reserve_ids(user_group_id: str, count: int = Query(1, ge=1, le=1000)):
+    """Reserve a block of consecutive IDs for a user group.
 
-    super_group = next((sg for sg in data.userSuperGroups if sg.id == super_group_id), None)
-    if not super_group:
-        raise HTTPException(status_code=400, detail="Super group not found")
+    Reserved IDs are never handed out again, whether or not needs are
+    created with them.
 
-    prefix = super_group.prefix
+    Args:
+        user_group_id: The user group to reserve IDs for
+        count: Number of IDs to reserve
 
-    # Find all IDs with this prefix
-    matching_ids = []
-    for need in data.userNeeds:
-        if need.id.startswith(f"{prefix}-"):
-            try:
-                # Extract the numeric part
-                numeric_part = need.id.split("-")[1]
-                matching_ids.append(int(numeric_part))
-            except (IndexError, ValueError):
-                # Skip IDs that don't match the pattern
-                continue
+    Returns:
+        The reserved IDs, the first of them as nextId, and the prefix
 
-    # Get the next number
-    next_num = max(matching_ids) + 1 if matching_ids else 1
+    Raises:
+        HTTPException: If user group not found or invalid super group
+    """
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
 
-    # Format with leading zeros (3 digits)
-    next_id = f"{prefix}-{next_num:03d}"
+    def write():
+        prefix = _need_id_prefix(backend, user_group_id)
+        start = backend.reserve_need_numbers(prefix, count)
+        ids = [format_need_id(prefix, number) for number in range(start, start + count)]
+        return {"nextId": ids[0], "ids": ids, "prefix": prefix}
 
-    return {"nextId": next_id, "prefix": prefix}
+    return await backend.write(write)
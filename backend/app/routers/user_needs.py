@@ -1,60 +1,332 @@
 """User needs CRUD endpoints."""
 
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
-
-from ..models import UserNeed, UserNeedCreate, UserNeedUpdate
-from ..database import load_data, save_data
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Optional, Set
+
+from ..models import (
+    UserNeed, UserNeedCreate, UserNeedUpdate,
+    UserNeedBatchRequest, UserNeedBatchResult, UserNeedBatchResponse, UserNeedSearchHit
+)
+from ..conditional import guarded_write, not_modified, not_modified_etag
+from ..database import StorageBackend, get_backend
+from ..integrity import reference_checker
+from ..metrics import timed
+from ..response_cache import cached_response, encode_json, encode_models
+from ..pagination import SORT_ORDERS, SortKey, decode_cursor, encode_cursor, parse_fields, sparse
+from ..search import tokenize
 from ..state import app_state
+from .history import require_history
 
 router = APIRouter(prefix="/api/user-needs", tags=["user-needs"])
 
+# ChangeRecorder method for each batch operation
+CHANGE_OPS = {"create": "created", "update": "updated", "delete": "deleted"}
+
 
 @router.get("", response_model=List[UserNeed])
-def get_user_needs(
+async def get_user_needs(
+    request: Request,
+    response: Response,
     userGroupId: Optional[str] = None,
     entity: Optional[str] = None,
     workflowPhase: Optional[str] = None,
     superGroup: Optional[str] = None,
-    refined: Optional[str] = None
+    refined: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    asOf: Optional[int] = Query(None, ge=0)
 ):
     """Get all user needs with optional filters.
 
+    Without limit, cursor or sort the full filtered list is returned in list
+    order. With limit, a page is returned and the X-Next-Cursor header holds
+    the cursor for the next page (absent on the last page). Responds 304 Not
+    Modified if If-None-Match holds the current ETag. With asOf the needs are
+    read from that version of the dataset history (see GET /api/history).
+
     Args:
         userGroupId: Filter by user group ID
         entity: Filter by entity ID
         workflowPhase: Filter by workflow phase ID
         superGroup: Filter by super group
         refined: Filter by refinement status ('refined' or 'needsRefinement')
+        limit: Maximum number of needs to return
+        cursor: X-Next-Cursor value from the previous page
+        sort: Sort order ('id', 'workflowPhase' or 'userGroupId'), default list order
+        fields: Comma-separated UserNeed fields to return (id is always included)
+        asOf: History version to read instead of the current data
 
     Returns:
         List of user needs matching the filters
+
+    Raises:
+        HTTPException: 400 if sort, cursor or fields is invalid, 404 if the
+            asOf version does not exist or asOf is given for a dataset that
+            keeps no history
     """
-    data = load_data(app_state.demo_mode)
-    needs = data.userNeeds
-
-    # Apply filters
-    if userGroupId:
-        needs = [n for n in needs if n.userGroupId == userGroupId]
-    if entity:
-        needs = [n for n in needs if entity in n.entities]
-    if workflowPhase:
-        needs = [n for n in needs if n.workflowPhase == workflowPhase]
+    if sort is not None and sort not in SORT_ORDERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort, expected one of: {', '.join(SORT_ORDERS)}"
+        )
+    try:
+        after = decode_cursor(cursor, sort) if cursor else None
+        field_set = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+    if asOf is not None:
+        # Replaying a version is blocking work
+        filters = dict(
+            userGroupId=userGroupId,
+            entity=entity,
+            workflowPhase=workflowPhase,
+            superGroup=superGroup,
+            refined=refined
+        )
+        return await run_in_threadpool(
+            _get_user_needs_as_of, request, response, backend, asOf, filters,
+            limit, cursor, sort, after, field_set
+        )
+
+    # The superGroup filter is resolved through user groups, and the
+    # workflowPhase sort through the phase order
+    collections = ("userNeeds",)
     if superGroup:
-        # Filter by superGroup - need to look up user groups
-        user_group_ids_in_super_group = [ug.id for ug in data.userGroups if ug.superGroup == superGroup]
-        needs = [n for n in needs if n.userGroupId in user_group_ids_in_super_group]
-    if refined:
-        if refined == 'refined':
-            needs = [n for n in needs if n.refined == True]
-        elif refined == 'needsRefinement':
-            needs = [n for n in needs if n.refined != True]
+        collections += ("userGroups",)
+    if sort == "workflowPhase":
+        collections += ("workflowPhases",)
+
+    def read():
+        cached = not_modified(request, response, backend, *collections)
+        if cached is not None:
+            return cached
+
+        filters = dict(
+            userGroupId=userGroupId,
+            entity=entity,
+            workflowPhase=workflowPhase,
+            superGroup=superGroup,
+            refined=refined
+        )
+
+        def render():
+            headers = {}
+            with timed("filter"):
+                if limit is None and cursor is None and sort is None:
+                    needs = backend.list_user_needs(**filters)
+                else:
+                    needs, last_key = backend.page_user_needs(sort=sort, after=after, limit=limit, **filters)
+                    if last_key is not None:
+                        headers["X-Next-Cursor"] = encode_cursor(sort, last_key)
+            with timed("serialise"):
+                if field_set is not None:
+                    return encode_json(sparse(needs, field_set)), headers
+                return encode_models(needs), headers
+
+        return cached_response(request, response, collections, render)
+
+    return await backend.read(read)
+
+
+def _get_user_needs_as_of(request: Request, response: Response, backend: StorageBackend,
+                          version: int, filters: Dict[str, Optional[str]], limit: Optional[int],
+                          cursor: Optional[str], sort: Optional[str], after: Optional[SortKey],
+                          field_set: Optional[Set[str]]) -> Response:
+    """Serve GET /api/user-needs?asOf=<version> from the dataset history.
+
+    A version never changes, so its ETag and cached bodies stay valid across writes.
+    """
+    history = require_history(backend)
+    cached = not_modified_etag(request, response, history.etag(version))
+    if cached is not None:
+        return cached
+
+    def render():
+        try:
+            data, table = history.read(version)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Version not found")
+        headers = {}
+        with timed("filter"):
+            if limit is None and cursor is None and sort is None:
+                needs = table.filter(**filters)
+            else:
+                phase_order = {wp.id: wp.order for wp in data.workflowPhases}
+                needs, last_key = table.page(phase_order, sort, after, limit, **filters)
+                if last_key is not None:
+                    headers["X-Next-Cursor"] = encode_cursor(sort, last_key)
+        with timed("serialise"):
+            if field_set is not None:
+                return encode_json(sparse(needs, field_set)), headers
+            return encode_models(needs), headers
+
+    return cached_response(request, response, (), render)
+
+
+@router.get("/search", response_model=List[UserNeedSearchHit])
+async def search_user_needs(
+    request: Request,
+    response: Response,
+    q: str,
+    userGroupId: Optional[str] = None,
+    entity: Optional[str] = None,
+    workflowPhase: Optional[str] = None,
+    superGroup: Optional[str] = None,
+    refined: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Search user needs by wording, best match first.
+
+    Matches title, description, constraints, sla, fromState and toState.
+    Query words match whole words or word prefixes and results are ranked
+    with BM25. The filters restrict which needs are searched.
+
+    Args:
+        q: Search text
+        userGroupId: Filter by user group ID
+        entity: Filter by entity ID
+        workflowPhase: Filter by workflow phase ID
+        superGroup: Filter by super group
+        refined: Filter by refinement status ('refined' or 'needsRefinement')
+        limit: Maximum number of results
+
+    Returns:
+        Matching needs with their score and the matched character ranges per field
 
-    return needs
+    Raises:
+        HTTPException: 400 if q contains no words
+    """
+    if not tokenize(q):
+        raise HTTPException(status_code=400, detail="Search query must contain at least one word")
+
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+    collections = ("userNeeds", "userGroups") if superGroup else ("userNeeds",)
+
+    def read():
+        cached = not_modified(request, response, backend, *collections)
+        if cached is not None:
+            return cached
+
+        def render():
+            with timed("search"):
+                hits = backend.search_user_needs(
+                    q,
+                    limit,
+                    userGroupId=userGroupId,
+                    entity=entity,
+                    workflowPhase=workflowPhase,
+                    superGroup=superGroup,
+                    refined=refined
+                )
+            with timed("serialise"):
+                return encode_models([UserNeedSearchHit(**hit._asdict()) for hit in hits]), {}
+
+        return cached_response(request, response, collections, render)
+
+    # Ranking is CPU-bound, so unlike backend.read (which answers from memory
+    # inline for the JSON backend) it always runs in the threadpool
+    return await run_in_threadpool(read)
+
+
+@router.post("/batch", response_model=UserNeedBatchResponse)
+async def batch_user_needs(batch: UserNeedBatchRequest, request: Request, response: Response):
+    """Create, update and delete several user needs in one atomic write.
+
+    Operations are validated in order against the state left by the previous
+    ones, so a batch can e.g. create a need and then update it. Creates
+    without an ID are allocated one as in POST /api/user-needs. If any
+    operation is invalid nothing is applied.
+
+    Args:
+        batch: The operations to apply
+
+    Returns:
+        applied flag and a result per operation
+
+    Raises:
+        HTTPException: 400 with the per-operation results if any operation is invalid
+    """
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def write():
+        with guarded_write(request, response, backend, "userNeeds") as changes:
+            references = reference_checker(backend)
+
+            # Needs touched by earlier operations in the batch (None once deleted)
+            touched = {}
+
+            def current(need_id: str) -> Optional[UserNeed]:
+                if need_id in touched:
+                    return touched[need_id]
+                return backend.get_user_need(need_id)
+
+            operations = []
+            results = []
+            for i, operation in enumerate(batch.operations):
+                need_id = operation.need.id if operation.op == "create" else operation.id
+                result = UserNeedBatchResult(index=i, op=operation.op, id=need_id, ok=False)
+                results.append(result)
+                existing = current(need_id) if need_id is not None else None
+
+                if operation.op == "create":
+                    if existing is not None:
+                        result.error = "User need with this ID already exists"
+                        continue
+                    result.error = references.need_error(
+                        operation.need.userGroupId, operation.need.workflowPhase, operation.need.entities
+                    )
+                    if result.error:
+                        continue
+                    # Allocated IDs skip the IDs created earlier in this batch too
+                    while need_id is None or current(need_id) is not None:
+                        try:
+                            need_id = result.id = backend.allocate_need_id(operation.need.userGroupId)
+                        except ValueError as e:
+                            result.error = str(e)
+                            break
+                    if result.error:
+                        continue
+                    new_need = UserNeed(**{**operation.need.model_dump(), "id": need_id})
+                    operations.append((None, new_need))
+                elif existing is None:
+                    result.error = "User need not found"
+                    continue
+                elif operation.op == "update":
+                    result.error = references.need_error(
+                        operation.need.userGroupId, operation.need.workflowPhase, operation.need.entities
+                    )
+                    if result.error:
+                        continue
+                    new_need = existing.model_copy(update=operation.need.model_dump(exclude_unset=True))
+                    operations.append((need_id, new_need))
+                else:
+                    new_need = None
+                    operations.append((need_id, None))
+
+                touched[need_id] = new_need
+                result.ok = True
+                result.need = new_need
+
+            if not all(result.ok for result in results):
+                outcome = UserNeedBatchResponse(applied=False, results=results)
+                raise HTTPException(status_code=400, detail=outcome.model_dump())
+
+            if operations:
+                backend.apply_user_need_changes(operations)
+            for result in results:
+                getattr(changes, CHANGE_OPS[result.op])("userNeeds", result.id)
+            return UserNeedBatchResponse(applied=True, results=results)
+
+    return await backend.write(write)
 
 
 @router.get("/{need_id}", response_model=UserNeed)
-def get_user_need(need_id: str):
+async def get_user_need(need_id: str, request: Request, response: Response):
     """Get a specific user need by ID.
 
     Args:
@@ -66,17 +338,28 @@ def get_user_need(need_id: str):
     Raises:
         HTTPException: If user need not found
     """
-    data = load_data(app_state.demo_mode)
-    need = next((n for n in data.userNeeds if n.id == need_id), None)
-    if not need:
-        raise HTTPException(status_code=404, detail="User need not found")
-    return need
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def read():
+        cached = not_modified(request, response, backend, "userNeeds")
+        if cached is not None:
+            return cached
+
+        need = backend.get_user_need(need_id)
+        if not need:
+            raise HTTPException(status_code=404, detail="User need not found")
+        return need
+
+    return await backend.read(read)
 
 
 @router.post("", response_model=UserNeed)
-def create_user_need(need: UserNeedCreate):
+async def create_user_need(need: UserNeedCreate, request: Request, response: Response):
     """Create a new user need.
 
+    Without an ID, the next ID of the need's user group is allocated as part
+    of the write, so concurrent creates never get the same one.
+
     Args:
         need: The user need to create
 
@@ -84,32 +367,42 @@ def create_user_need(need: UserNeedCreate):
         The created user need
 
     Raises:
-        HTTPException: If ID already exists or invalid references
+        HTTPException: If ID already exists, invalid references, or no ID
+            can be allocated for the user group
     """
-    data = load_data(app_state.demo_mode)
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def write():
+        with guarded_write(request, response, backend, "userNeeds") as changes:
+            # Check if ID already exists
+            if need.id is not None and backend.get_user_need(need.id) is not None:
+                raise HTTPException(status_code=400, detail="User need with this ID already exists")
 
-    # Check if ID already exists
-    if any(n.id == need.id for n in data.userNeeds):
-        raise HTTPException(status_code=400, detail="User need with this ID already exists")
+            # Validate references
+            error = reference_checker(backend).need_error(need.userGroupId, need.workflowPhase, need.entities)
+            if error:
+                raise HTTPException(status_code=400, detail=error)
 
-    # Validate references
-    if not any(ug.id == need.userGroupId for ug in data.userGroups):
-        raise HTTPException(status_code=400, detail="Invalid userGroupId")
-    if not any(wp.id == need.workflowPhase for wp in data.workflowPhases):
-        raise HTTPException(status_code=400, detail="Invalid workflowPhase")
-    for entity_id in need.entities:
-        if not any(e.id == entity_id for e in data.entities):
-            raise HTTPException(status_code=400, detail=f"Invalid entity: {entity_id}")
+            need_id = need.id
+            if need_id is None:
+                try:
+                    need_id = backend.allocate_need_id(need.userGroupId)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
 
-    # Create new need
-    new_need = UserNeed(**need.model_dump())
-    data.userNeeds.append(new_need)
-    save_data(data, app_state.demo_mode)
-    return new_need
+            # Create new need
+            new_need = UserNeed(**{**need.model_dump(), "id": need_id})
+            backend.create_user_need(new_need)
+            changes.created("userNeeds", new_need.id)
+            return new_need
+
+    return await backend.write(write)
 
 
 @router.put("/{need_id}", response_model=UserNeed)
-def update_user_need(need_id: str, need_update: UserNeedUpdate):
+async def update_user_need(
+    need_id: str, need_update: UserNeedUpdate, request: Request, response: Response
+):
     """Update an existing user need.
 
     Args:
@@ -122,36 +415,34 @@ def update_user_need(need_id: str, need_update: UserNeedUpdate):
     Raises:
         HTTPException: If user need not found or invalid references
     """
-    data = load_data(app_state.demo_mode)
-
-    # Find the need
-    need_index = next((i for i, n in enumerate(data.userNeeds) if n.id == need_id), None)
-    if need_index is None:
-        raise HTTPException(status_code=404, detail="User need not found")
-
-    # Get existing need
-    existing_need = data.userNeeds[need_index]
-
-    # Validate references if provided
-    if need_update.userGroupId and not any(ug.id == need_update.userGroupId for ug in data.userGroups):
-        raise HTTPException(status_code=400, detail="Invalid userGroupId")
-    if need_update.workflowPhase and not any(wp.id == need_update.workflowPhase for wp in data.workflowPhases):
-        raise HTTPException(status_code=400, detail="Invalid workflowPhase")
-    if need_update.entities:
-        for entity_id in need_update.entities:
-            if not any(e.id == entity_id for e in data.entities):
-                raise HTTPException(status_code=400, detail=f"Invalid entity: {entity_id}")
-
-    # Update fields
-    update_dict = need_update.model_dump(exclude_unset=True)
-    updated_need = existing_need.model_copy(update=update_dict)
-    data.userNeeds[need_index] = updated_need
-    save_data(data, app_state.demo_mode)
-    return updated_need
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def write():
+        with guarded_write(request, response, backend, "userNeeds") as changes:
+            # Find the need
+            existing_need = backend.get_user_need(need_id)
+            if existing_need is None:
+                raise HTTPException(status_code=404, detail="User need not found")
+
+            # Validate references if provided
+            error = reference_checker(backend).need_error(
+                need_update.userGroupId or None, need_update.workflowPhase or None, need_update.entities
+            )
+            if error:
+                raise HTTPException(status_code=400, detail=error)
+
+            # Update fields
+            update_dict = need_update.model_dump(exclude_unset=True)
+            updated_need = existing_need.model_copy(update=update_dict)
+            backend.update_user_need(need_id, updated_need)
+            changes.updated("userNeeds", need_id)
+            return updated_need
+
+    return await backend.write(write)
 
 
 @router.delete("/{need_id}")
-def delete_user_need(need_id: str):
+async def delete_user_need(need_id: str, request: Request, response: Response):
     """Delete a user need.
 
     Args:
@@ -163,13 +454,16 @@ def delete_user_need(need_id: str):
     Raises:
         HTTPException: If user need not found
     """
-    data = load_data(app_state.demo_mode)
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def write():
+        with guarded_write(request, response, backend, "userNeeds") as changes:
+            # Find and remove the need
+            deleted_need = backend.delete_user_need(need_id)
+            if deleted_need is None:
+                raise HTTPException(status_code=404, detail="User need not found")
+            changes.deleted("userNeeds", need_id)
 
-    # Find and remove the need
-    need_index = next((i for i, n in enumerate(data.userNeeds) if n.id == need_id), None)
-    if need_index is None:
-        raise HTTPException(status_code=404, detail="User need not found")
+        return {"message": "User need deleted successfully", "id": deleted_need.id}
 
-    deleted_need = data.userNeeds.pop(need_index)
-    save_data(data, app_state.demo_mode)
-    return {"message": "User need deleted successfully", "id": deleted_need.id}
+    return await backend.write(write)
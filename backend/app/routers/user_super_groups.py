@@ -1,28 +1,40 @@
 """User super groups endpoints."""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from typing import List
 
 from ..models import UserSuperGroup
-from ..database import load_data, save_data
+from ..conditional import guarded_write, not_modified
+from ..database import get_backend
+from ..integrity import reference_checker
+from ..response_cache import cached_response, encode_models
 from ..state import app_state
 
 router = APIRouter(prefix="/api/user-super-groups", tags=["user-super-groups"])
 
 
 @router.get("", response_model=List[UserSuperGroup])
-def get_user_super_groups():
+async def get_user_super_groups(request: Request, response: Response):
     """Get all user super groups.
 
     Returns:
         List of all user super groups
     """
-    data = load_data(app_state.demo_mode)
-    return data.userSuperGroups
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def read():
+        cached = not_modified(request, response, backend, "userSuperGroups")
+        if cached is not None:
+            return cached
+        return cached_response(
+            request, response, ("userSuperGroups",), lambda: (encode_models(backend.list_user_super_groups()), {})
+        )
+
+    return await backend.read(read)
 
 
 @router.post("", response_model=UserSuperGroup)
-def create_user_super_group(super_group: UserSuperGroup):
+async def create_user_super_group(super_group: UserSuperGroup, request: Request, response: Response):
     """Create a new user super group.
 
     Args:
@@ -34,25 +46,36 @@ def create_user_super_group(super_group: UserSuperGroup):
     Raises:
         HTTPException: If super group ID or prefix already exists
     """
-    data = load_data(app_state.demo_mode)
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def write():
+        with guarded_write(request, response, backend, "userSuperGroups") as changes:
+            references = reference_checker(backend)
 
-    # Check if ID already exists
-    if any(sg.id == super_group.id for sg in data.userSuperGroups):
-        raise HTTPException(status_code=400, detail="User super group with this ID already exists")
+            # Check if ID already exists
+            if super_group.id in references.ids["userSuperGroups"]:
+                raise HTTPException(status_code=400, detail="User super group with this ID already exists")
 
-    # Check if prefix already exists
-    if any(sg.prefix == super_group.prefix for sg in data.userSuperGroups):
-        raise HTTPException(status_code=400, detail="User super group with this prefix already exists")
+            # Check if prefix already exists
+            if super_group.prefix in references.prefixes:
+                raise HTTPException(status_code=400, detail="User super group with this prefix already exists")
 
-    data.userSuperGroups.append(super_group)
-    save_data(data, app_state.demo_mode)
-    return super_group
+            backend.create_user_super_group(super_group)
+            changes.created("userSuperGroups", super_group.id)
+            return super_group
+
+    return await backend.write(write)
 
 
 @router.put("/{super_group_id}", response_model=UserSuperGroup)
-def update_user_super_group(super_group_id: str, super_group_update: UserSuperGroup):
+async def update_user_super_group(
+    super_group_id: str, super_group_update: UserSuperGroup, request: Request, response: Response
+):
     """Update an existing user super group.
 
+    If the ID changes, user groups referring to the old ID are moved to the
+    new one in the same write.
+
     Args:
         super_group_id: The ID of the super group to update
         super_group_update: The updated super group data
@@ -63,31 +86,42 @@ def update_user_super_group(super_group_id: str, super_group_update: UserSuperGr
     Raises:
         HTTPException: If super group not found or conflicts exist
     """
-    data = load_data(app_state.demo_mode)
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def write():
+        with guarded_write(request, response, backend, "userSuperGroups", "userGroups") as changes:
+            references = reference_checker(backend)
 
-    # Find the super group
-    super_group_index = next((i for i, sg in enumerate(data.userSuperGroups) if sg.id == super_group_id), None)
-    if super_group_index is None:
-        raise HTTPException(status_code=404, detail="User super group not found")
+            # Find the super group
+            existing = backend.get_user_super_group(super_group_id)
+            if existing is None:
+                raise HTTPException(status_code=404, detail="User super group not found")
 
-    # Check for ID conflicts (if changing ID)
-    if super_group_update.id != super_group_id:
-        if any(sg.id == super_group_update.id for sg in data.userSuperGroups):
-            raise HTTPException(status_code=400, detail="User super group with this ID already exists")
+            # Check for ID conflicts (if changing ID)
+            if super_group_update.id != super_group_id:
+                if super_group_update.id in references.ids["userSuperGroups"]:
+                    raise HTTPException(status_code=400, detail="User super group with this ID already exists")
 
-    # Check for prefix conflicts
-    existing = data.userSuperGroups[super_group_index]
-    if super_group_update.prefix != existing.prefix:
-        if any(sg.prefix == super_group_update.prefix for sg in data.userSuperGroups):
-            raise HTTPException(status_code=400, detail="User super group with this prefix already exists")
+            # Check for prefix conflicts
+            if super_group_update.prefix != existing.prefix:
+                if super_group_update.prefix in references.prefixes:
+                    raise HTTPException(status_code=400, detail="User super group with this prefix already exists")
 
-    data.userSuperGroups[super_group_index] = super_group_update
-    save_data(data, app_state.demo_mode)
-    return super_group_update
+            moved_groups = []
+            if super_group_update.id != super_group_id:
+                moved_groups = [ug.id for ug in backend.list_user_groups() if ug.superGroup == super_group_id]
+
+            backend.update_user_super_group(super_group_id, super_group_update)
+            changes.updated("userSuperGroups", super_group_update.id, previous_id=super_group_id)
+            for user_group_id in moved_groups:
+                changes.updated("userGroups", user_group_id)
+            return super_group_update
+
+    return await backend.write(write)
 
 
 @router.delete("/{super_group_id}")
-def delete_user_super_group(super_group_id: str):
+async def delete_user_super_group(super_group_id: str, request: Request, response: Response):
     """Delete a user super group.
 
     Args:
@@ -99,22 +133,25 @@ def delete_user_super_group(super_group_id: str):
     Raises:
         HTTPException: If super group not found or has dependent user groups
     """
-    data = load_data(app_state.demo_mode)
-
-    # Check if any user groups reference this super group
-    dependent_groups = [ug for ug in data.userGroups if ug.superGroup == super_group_id]
-    if dependent_groups:
-        group_names = ", ".join([ug.name for ug in dependent_groups])
-        raise HTTPException(
-            status_code=400,
-            detail=f"Cannot delete super group: {len(dependent_groups)} user group(s) depend on it ({group_names})"
-        )
-
-    # Find and remove the super group
-    super_group_index = next((i for i, sg in enumerate(data.userSuperGroups) if sg.id == super_group_id), None)
-    if super_group_index is None:
-        raise HTTPException(status_code=404, detail="User super group not found")
-
-    deleted_super_group = data.userSuperGroups.pop(super_group_index)
-    save_data(data, app_state.demo_mode)
-    return {"message": "User super group deleted successfully", "id": deleted_super_group.id}
+    backend = get_backend(app_state.demo_mode, app_state.workspace)
+
+    def write():
+        with guarded_write(request, response, backend, "userSuperGroups") as changes:
+            # Check if any user groups reference this super group
+            dependent_groups = [ug for ug in backend.list_user_groups() if ug.superGroup == super_group_id]
+            if dependent_groups:
+                group_names = ", ".join([ug.name for ug in dependent_groups])
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Cannot delete super group: {len(dependent_groups)} user group(s) depend on it ({group_names})"
+                )
+
+            # Find and remove the super group
+            deleted_super_group = backend.delete_user_super_group(super_group_id)
+            if deleted_super_group is None:
+                raise HTTPException(status_code=404, detail="User super group not found")
+            changes.deleted("userSuperGroups", super_group_id)
+
+            return {"message": "User super group deleted successfully", "id": deleted_super_group.id}
+
+    return await backend.write(write)
@@ -0,0 +1,64 @@
+"""Workspace management endpoints."""
+
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from ..state import app_state
+from ..workspaces import create_workspace, list_workspaces
+
+router = APIRouter(prefix="/api/workspaces", tags=["workspaces"])
+
+
+class WorkspaceListResponse(BaseModel):
+    """Existing workspaces and the one selected by the request."""
+    workspaces: List[str]
+    current: Optional[str] = None
+
+
+class WorkspaceCreateRequest(BaseModel):
+    """Workspace creation request."""
+    name: str
+
+
+@router.get("", response_model=WorkspaceListResponse)
+async def get_workspaces():
+    """List the workspaces.
+
+    Returns:
+        Workspace names and the workspace selected by this request (null for the default dataset)
+    """
+    return WorkspaceListResponse(
+        workspaces=await run_in_threadpool(list_workspaces),
+        current=app_state.workspace
+    )
+
+
+@router.post("", response_model=WorkspaceListResponse, status_code=201)
+async def add_workspace(request: WorkspaceCreateRequest):
+    """Create a workspace with an empty dataset.
+
+    Select it afterwards with the /w/<name> path prefix or the X-Workspace header.
+
+    Args:
+        request: Name of the workspace to create
+
+    Returns:
+        Workspace names including the new one
+
+    Raises:
+        HTTPException: 400 if the name is invalid, 409 if the workspace exists
+    """
+    try:
+        await run_in_threadpool(create_workspace, request.name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileExistsError:
+        raise HTTPException(status_code=409, detail="Workspace already exists")
+
+    return WorkspaceListResponse(
+        workspaces=await run_in_threadpool(list_workspaces),
+        current=app_state.workspace
+    )
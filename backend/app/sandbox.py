@@ -0,0 +1,502 @@
+"""Per-session demo sandboxes: copy-on-write overlays over the example data.
+
+data.example.json is parsed once into a shared, read-only BaseStore with its
+need table and search index. Each demo session gets a
+SandboxBackend that holds only the records its visitor created, changed or
+deleted; reads merge those over the shared store, so a sandbox costs memory
+in proportion to what was changed rather than to the dataset. Sandboxes idle
+for longer than DEMO_SESSION_TTL_SECONDS are discarded, and beyond
+DEMO_MAX_SESSIONS the least recently used one is.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, TypeVar
+
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import EXAMPLE_DATA_FILE, TEMPLATE_DATA_FILE, settings
+from .database import COLLECTIONS, StorageBackend
+from .id_allocator import IdAllocator
+from .columnar import NeedTable
+from .models import DataStore, Entity, UserGroup, UserNeed, UserSuperGroup, WorkflowPhase
+from .pagination import page_needs
+from .search import OverlaySearchIndex, SearchHit, SearchIndex
+from .state import DemoSession, current_demo_session
+
+SESSION_COOKIE = "demo_session"
+SESSION_HEADER = "X-Demo-Session"
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+# Identifies this process's sandbox versions, like database._EPOCH
+_EPOCH = uuid.uuid4().hex[:8]
+
+T = TypeVar("T")
+
+
+class BaseStore:
+    """A parsed dataset shared read-only by sandboxes, with its derived views built once."""
+
+    def __init__(self, data: DataStore):
+        self.data = data
+        self.by_id: Dict[str, Dict[str, BaseModel]] = {
+            collection: {record.id: record for record in getattr(data, collection)}
+            for collection in COLLECTIONS
+        }
+        self.index = NeedTable(data.userNeeds, data.userGroups)
+        self.search = SearchIndex(data.userNeeds, self.by_id["userNeeds"].get)
+
+
+_example: Optional[BaseStore] = None
+_example_lock = threading.Lock()
+
+
+def example_store() -> BaseStore:
+    """Get the shared store of data.example.json, parsing it on first use."""
+    global _example
+    with _example_lock:
+        if _example is None:
+            source = EXAMPLE_DATA_FILE if EXAMPLE_DATA_FILE.exists() else TEMPLATE_DATA_FILE
+            with open(source, 'r') as f:
+                _example = BaseStore(DataStore(**json.load(f)))
+        return _example
+
+
+class Overlay:
+    """Changes to one collection over its base records; never modified once built.
+
+    replaced maps the ID of a base record to the record now in its place (None
+    once deleted), slots maps the current ID of each replacement back to that
+    base ID, and added holds created records in creation order. version counts
+    the changes, so 0 means the collection still equals the base.
+    """
+
+    def __init__(self, base_records: List[BaseModel], base_by_id: Dict[str, BaseModel], version: int = 0,
+                 replaced: Optional[Dict[str, Optional[BaseModel]]] = None,
+                 slots: Optional[Dict[str, str]] = None,
+                 added: Optional[Dict[str, BaseModel]] = None):
+        self.base_records = base_records
+        self.base_by_id = base_by_id
+        self.version = version
+        self.replaced = replaced or {}
+        self.slots = slots or {}
+        self.added = added or {}
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.replaced or self.added)
+
+    def get(self, record_id: str) -> Optional[BaseModel]:
+        if record_id in self.added:
+            return self.added[record_id]
+        slot = self.slots.get(record_id)
+        if slot is not None:
+            return self.replaced[slot]
+        if record_id in self.replaced:
+            # Deleted, or renamed to another ID
+            return None
+        return self.base_by_id.get(record_id)
+
+    def list(self) -> List[BaseModel]:
+        """Get the records in list order: base positions first, then created records."""
+        if not self.changed:
+            return self.base_records
+        records = [self.replaced.get(record.id, record) for record in self.base_records]
+        return [record for record in records if record is not None] + list(self.added.values())
+
+    def records(self) -> List[BaseModel]:
+        """Get the records held by the overlay itself (replacements and created records)."""
+        return [record for record in self.replaced.values() if record is not None] + list(self.added.values())
+
+    def apply(self, old_id: Optional[str], new: Optional[BaseModel]) -> "Overlay":
+        """Get the overlay with the record old_id (None to create) replaced by new (None to delete)."""
+        replaced, slots, added = self.replaced, self.slots, self.added
+        if old_id is None:
+            added = {**added, new.id: new}
+        elif old_id in added:
+            # Rebuilt to keep creation order when the ID changes
+            added = {
+                (new.id if record_id == old_id else record_id): (new if record_id == old_id else record)
+                for record_id, record in added.items()
+                if record_id != old_id or new is not None
+            }
+        else:
+            slot = slots.get(old_id, old_id)
+            replaced = {**replaced, slot: new}
+            slots = {record_id: s for record_id, s in slots.items() if record_id != old_id}
+            if new is not None:
+                slots[new.id] = slot
+        return Overlay(self.base_records, self.base_by_id, self.version + 1, replaced, slots, added)
+
+
+class _Snapshot(NamedTuple):
+    """State of a sandbox, swapped as a whole on every write."""
+    base: BaseStore
+    overlays: Dict[str, Overlay]
+
+
+def _matches(need: UserNeed, members: Optional[Set[str]], userGroupId: Optional[str] = None,
+             entity: Optional[str] = None, workflowPhase: Optional[str] = None,
+             refined: Optional[str] = None) -> bool:
+    """Check a need against the list_user_needs filters (superGroup as its user group IDs)."""
+    if userGroupId and need.userGroupId != userGroupId:
+        return False
+    if entity and entity not in need.entities:
+        return False
+    if workflowPhase and need.workflowPhase != workflowPhase:
+        return False
+    if members is not None and need.userGroupId not in members:
+        return False
+    if refined == 'refined' and need.refined != True:
+        return False
+    if refined == 'needsRefinement' and need.refined == True:
+        return False
+    return True
+
+
+class SandboxBackend(StorageBackend):
+    """Demo dataset of one session, kept in memory as overlays over a BaseStore.
+
+    Writes build new overlays and swap them in together, so readers never
+    take a lock. They only touch memory and run inline on the event loop,
+    which also serialises them.
+    """
+
+    def __init__(self, base: BaseStore):
+        super().__init__()
+        self.id_allocator = IdAllocator()
+        # Distinguishes this sandbox's versions from every other sandbox's
+        self.token = uuid.uuid4().hex[:8]
+        self.last_used = time.monotonic()
+        self._snapshot = _Snapshot(base, {
+            collection: Overlay(getattr(base.data, collection), base.by_id[collection])
+            for collection in COLLECTIONS
+        })
+        self._search: Optional[Tuple[Overlay, OverlaySearchIndex]] = None
+
+    async def read(self, fn: Callable[[], T]) -> T:
+        return fn()
+
+    async def write(self, fn: Callable[[], T]) -> T:
+        return fn()
+
+    @property
+    def changed_records(self) -> int:
+        """Number of records held by the overlays."""
+        return sum(
+            len(overlay.replaced) + len(overlay.added) for overlay in self._snapshot.overlays.values()
+        )
+
+    def has_data(self) -> bool:
+        return True
+
+    def load(self) -> DataStore:
+        overlays = self._snapshot.overlays
+        return DataStore(**{collection: list(overlays[collection].list()) for collection in COLLECTIONS})
+
+    def replace_all(self, data: DataStore):
+        # The imported data becomes this sandbox's own base; versions keep
+        # counting up so no earlier ETag matches
+        overlays = self._snapshot.overlays
+        base = BaseStore(data)
+        self._snapshot = _Snapshot(base, {
+            collection: Overlay(
+                getattr(data, collection), base.by_id[collection], overlays[collection].version + 1
+            )
+            for collection in COLLECTIONS
+        })
+        self.id_allocator.reset()
+
+    def iter_records(self, page_size: int = 1000) -> Iterator[Tuple[str, BaseModel]]:
+        overlays = self._snapshot.overlays
+        for collection in COLLECTIONS:
+            for record in list(overlays[collection].list()):
+                yield collection, record
+
+    def get_version(self, collections: Iterable[str]) -> str:
+        # Collections still equal to the example data share one version across
+        # sandboxes, so their cached responses are shared too
+        overlays = self._snapshot.overlays
+        versions = [overlays[collection].version for collection in collections]
+        return f"demo-{_EPOCH}-" + ".".join(f"{self.token}:{v}" if v else "0" for v in versions)
+
+    def _apply_all(self, changes: List[Tuple[str, Optional[str], Optional[BaseModel]]]):
+        """Apply (collection, old ID, new record) changes in one swap."""
+        base, overlays = self._snapshot
+        overlays = dict(overlays)
+        for collection, old_id, new in changes:
+            overlays[collection] = overlays[collection].apply(old_id, new)
+        self._snapshot = _Snapshot(base, overlays)
+
+    def _need_ids(self, snapshot: _Snapshot, userGroupId=None, entity=None, workflowPhase=None,
+                  superGroup=None, refined=None) -> Set[str]:
+        """Get the IDs of the needs matching the list_user_needs filters (unordered)."""
+        base, overlays = snapshot
+        needs, user_groups = overlays["userNeeds"], overlays["userGroups"]
+        filters = dict(userGroupId=userGroupId, entity=entity, workflowPhase=workflowPhase, refined=refined)
+        members = None
+        if superGroup:
+            members = {group.id for group in user_groups.list() if group.superGroup == superGroup}
+
+        if superGroup and user_groups.changed:
+            # The base index resolves super groups through the base user groups
+            ids: Set[str] = set()
+            for group_id in members:
+                if not userGroupId or group_id == userGroupId:
+                    ids |= base.index.filter_ids(**{**filters, "userGroupId": group_id})
+        else:
+            ids = base.index.filter_ids(superGroup=superGroup, **filters)
+
+        if needs.changed:
+            ids.difference_update(needs.replaced)
+            ids.update(need.id for need in needs.records() if _matches(need, members, **filters))
+        return ids
+
+    def _positions(self, snapshot: _Snapshot) -> Callable[[str], int]:
+        """Get the list position of a need ID: its base slot, or after the base needs if created."""
+        base, overlays = snapshot
+        needs = overlays["userNeeds"]
+        offset = len(base.data.userNeeds)
+        added = {need_id: offset + i for i, need_id in enumerate(needs.added)}
+
+        def position(need_id: str) -> int:
+            if need_id in added:
+                return added[need_id]
+            return base.index.position(needs.slots.get(need_id, need_id))
+
+        return position
+
+    def list_user_needs(self, userGroupId=None, entity=None, workflowPhase=None,
+                        superGroup=None, refined=None) -> List[UserNeed]:
+        snapshot = self._snapshot
+        needs = snapshot.overlays["userNeeds"]
+        ids = self._need_ids(
+            snapshot,
+            userGroupId=userGroupId,
+            entity=entity,
+            workflowPhase=workflowPhase,
+            superGroup=superGroup,
+            refined=refined
+        )
+        return [needs.get(need_id) for need_id in sorted(ids, key=self._positions(snapshot))]
+
+    def page_user_needs(self, sort=None, after=None, limit=None, **filters):
+        snapshot = self._snapshot
+        needs = snapshot.overlays["userNeeds"]
+        phase_order = {wp.id: wp.order for wp in snapshot.overlays["workflowPhases"].list()}
+        position = self._positions(snapshot)
+        return page_needs(
+            ((needs.get(need_id), position(need_id)) for need_id in self._need_ids(snapshot, **filters)),
+            phase_order, sort, after, limit
+        )
+
+    def search_user_needs(self, query: str, limit: int = 20, **filters) -> List[SearchHit]:
+        snapshot = self._snapshot
+        candidates = None
+        if any(filters.values()):
+            candidates = self._need_ids(snapshot, **filters)
+        needs = snapshot.overlays["userNeeds"]
+        if not needs.changed:
+            return snapshot.base.search.search(query, limit, candidates)
+
+        # Only the changed needs are indexed per sandbox
+        cached = self._search
+        if cached is None or cached[0] is not needs:
+            cached = self._search = (
+                needs, OverlaySearchIndex(snapshot.base.search, set(needs.replaced), needs.records())
+            )
+        return cached[1].search(query, limit, candidates)
+
+    def get_user_need(self, need_id: str) -> Optional[UserNeed]:
+        return self._snapshot.overlays["userNeeds"].get(need_id)
+
+    def list_user_need_ids(self, prefix: str) -> List[str]:
+        base, overlays = self._snapshot
+        needs = overlays["userNeeds"]
+        ids = [
+            need_id for need_id in base.index.rows
+            if need_id.startswith(prefix) and need_id not in needs.replaced
+        ]
+        return ids + [need.id for need in needs.records() if need.id.startswith(prefix)]
+
+    def create_user_need(self, need: UserNeed):
+        self._apply_all([("userNeeds", None, need)])
+
+    def update_user_need(self, need_id: str, need: UserNeed):
+        self._apply_all([("userNeeds", need_id, need)])
+
+    def delete_user_need(self, need_id: str) -> Optional[UserNeed]:
+        need = self.get_user_need(need_id)
+        if need is not None:
+            self._apply_all([("userNeeds", need_id, None)])
+        return need
+
+    def apply_user_need_changes(self, changes: List[Tuple[Optional[str], Optional[UserNeed]]]):
+        base, overlays = self._snapshot
+        needs = overlays["userNeeds"]
+        for need_id, need in changes:
+            if need_id is not None and needs.get(need_id) is None:
+                need_id = None
+            needs = needs.apply(need_id, need)
+        self._snapshot = _Snapshot(base, {**overlays, "userNeeds": needs})
+
+    def list_user_groups(self) -> List[UserGroup]:
+        return self._snapshot.overlays["userGroups"].list()
+
+    def get_user_group(self, user_group_id: str) -> Optional[UserGroup]:
+        return self._snapshot.overlays["userGroups"].get(user_group_id)
+
+    def create_user_group(self, user_group: UserGroup):
+        self._apply_all([("userGroups", None, user_group)])
+
+    def list_user_super_groups(self) -> List[UserSuperGroup]:
+        return self._snapshot.overlays["userSuperGroups"].list()
+
+    def get_user_super_group(self, super_group_id: str) -> Optional[UserSuperGroup]:
+        return self._snapshot.overlays["userSuperGroups"].get(super_group_id)
+
+    def create_user_super_group(self, super_group: UserSuperGroup):
+        self._apply_all([("userSuperGroups", None, super_group)])
+
+    def update_user_super_group(self, super_group_id: str, super_group: UserSuperGroup):
+        changes = [("userSuperGroups", super_group_id, super_group)]
+        if super_group.id != super_group_id:
+            changes += [
+                ("userGroups", user_group.id, user_group.model_copy(update={"superGroup": super_group.id}))
+                for user_group in self.list_user_groups() if user_group.superGroup == super_group_id
+            ]
+        self._apply_all(changes)
+
+    def delete_user_super_group(self, super_group_id: str) -> Optional[UserSuperGroup]:
+        super_group = self.get_user_super_group(super_group_id)
+        if super_group is not None:
+            self._apply_all([("userSuperGroups", super_group_id, None)])
+        return super_group
+
+    def list_entities(self) -> List[Entity]:
+        return self._snapshot.overlays["entities"].list()
+
+    def get_entity(self, entity_id: str) -> Optional[Entity]:
+        return self._snapshot.overlays["entities"].get(entity_id)
+
+    def list_workflow_phases(self) -> List[WorkflowPhase]:
+        return self._snapshot.overlays["workflowPhases"].list()
+
+    def get_workflow_phase(self, phase_id: str) -> Optional[WorkflowPhase]:
+        return self._snapshot.overlays["workflowPhases"].get(phase_id)
+
+    def get_statistics(self) -> dict:
+        base, overlays = self._snapshot
+        needs = overlays["userNeeds"]
+        removed = [base.by_id["userNeeds"][need_id] for need_id in needs.replaced]
+        return base.index.snapshot(removed=removed, added=needs.records())
+
+    def get_need_table(self) -> NeedTable:
+        base, overlays = self._snapshot
+        if not overlays["userNeeds"].changed and not overlays["userGroups"].changed:
+            return base.index
+        return super().get_need_table()
+
+
+class SandboxManager:
+    """Sandboxes by workspace and demo session, discarded once idle for longer than ttl.
+
+    At most max_sessions sandboxes are kept; creating one more discards the
+    least recently used.
+    """
+
+    def __init__(self, ttl: float, max_sessions: int):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        # Least recently used first
+        self._sandboxes: "OrderedDict[Tuple[Optional[str], Optional[str]], SandboxBackend]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, workspace: Optional[str], session: Optional[str]) -> SandboxBackend:
+        """Get the sandbox of a session, creating it over the example data if needed."""
+        now = time.monotonic()
+        key = (workspace, session)
+        with self._lock:
+            if now - self._last_sweep > min(self.ttl, 60.0):
+                self._sweep(now)
+            sandbox = self._sandboxes.get(key)
+            if sandbox is None:
+                while len(self._sandboxes) >= max(self.max_sessions, 1):
+                    _, evicted = self._sandboxes.popitem(last=False)
+                    evicted.close()
+                    self.evicted += 1
+                sandbox = self._sandboxes[key] = SandboxBackend(example_store())
+            else:
+                self._sandboxes.move_to_end(key)
+            sandbox.last_used = now
+            return sandbox
+
+    def _sweep(self, now: float):
+        """Drop the sandboxes idle for longer than the TTL."""
+        self._last_sweep = now
+        idle = [key for key, sandbox in self._sandboxes.items() if now - sandbox.last_used > self.ttl]
+        for key in idle:
+            self._sandboxes.pop(key).close()
+        self.expired += len(idle)
+
+    def stats(self) -> dict:
+        """Return the number of live sandboxes and the records their overlays hold."""
+        with self._lock:
+            sandboxes = list(self._sandboxes.values())
+            expired, evicted = self.expired, self.evicted
+        return {
+            "sessions": len(sandboxes),
+            "changedRecords": sum(sandbox.changed_records for sandbox in sandboxes),
+            "expired": expired,
+            "evicted": evicted,
+        }
+
+
+# Global sandbox registry used by get_backend in demo mode
+sandboxes = SandboxManager(settings.demo_session_ttl_seconds, settings.demo_max_sessions)
+
+
+class DemoSessionMiddleware:
+    """ASGI middleware selecting the demo session of each request.
+
+    The session is read from the X-Demo-Session header or the demo_session
+    cookie. Clients sending neither (or a malformed ID) are only given a new
+    session once the request reads the demo dataset, i.e. in demo mode on a
+    route backed by a sandbox; the response then sets a cookie holding it.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        session_id = headers.get(SESSION_HEADER) or cookie_parser(headers.get("cookie", "")).get(SESSION_COOKIE)
+        session = DemoSession(session_id if session_id is not None and _SESSION_ID.match(session_id) else None)
+        if session.id is None:
+            inner_send = send
+
+            async def send(message: Message):
+                if message["type"] == "http.response.start" and session.created:
+                    cookie = f"{SESSION_COOKIE}={session.id}; Path=/; HttpOnly; SameSite=Lax"
+                    MutableHeaders(scope=message).append("set-cookie", cookie)
+                await inner_send(message)
+
+        token = current_demo_session.set(session)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_demo_session.reset(token)
@@ -0,0 +1,262 @@
+"""Full-text search over user needs: an inverted index with BM25 ranking.
+
+The index is built once from the needs and then adjusted for each created,
+updated or deleted need. Query words match indexed words exactly or as a
+prefix; hits report the character ranges that matched, per field.
+"""
+
+import bisect
+import heapq
+import math
+import re
+import sys
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .models import UserNeed
+
+# Indexed fields and the weight of a word occurring in each
+FIELD_WEIGHTS: Dict[str, float] = {
+    "title": 3.0,
+    "description": 1.0,
+    "constraints": 1.0,
+    "sla": 1.0,
+    "fromState": 1.5,
+    "toState": 1.5,
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Prefix matches score less than exact ones, and a query word expands to at
+# most this many indexed words
+PREFIX_WEIGHT = 0.7
+MAX_EXPANSIONS = 50
+
+_WORD = re.compile(r"\w+")
+
+# Character ranges [start, end) that matched, by field ("constraints.<i>" for list items)
+Highlights = Dict[str, List[Tuple[int, int]]]
+
+
+class SearchHit(NamedTuple):
+    need: UserNeed
+    score: float
+    highlights: Highlights
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-cased words."""
+    return [match.group().lower() for match in _WORD.finditer(text)]
+
+
+def _field_texts(need: UserNeed) -> Iterator[Tuple[str, str, str]]:
+    """Yield (field, highlight key, text) for every indexed value of a need."""
+    for field in FIELD_WEIGHTS:
+        value = getattr(need, field)
+        if isinstance(value, list):
+            for i, item in enumerate(value):
+                yield field, f"{field}.{i}", item
+        elif value:
+            yield field, field, value
+
+
+class SearchIndex:
+    """Inverted index of user need text with BM25 scoring.
+
+    Postings hold the field-weighted frequency of each word per need. A sorted
+    vocabulary serves prefix lookups with bisect. The index keeps the words of
+    each need rather than the need itself; hits are looked up by ID.
+
+    Args:
+        needs: Needs to index
+        lookup: Gets a need by ID (None if it no longer exists)
+    """
+
+    def __init__(self, needs: Iterable[UserNeed], lookup: Callable[[str], Optional[UserNeed]]):
+        self._lock = threading.Lock()
+        self.lookup = lookup
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.vocabulary: List[str] = []
+        # Need ID -> its distinct indexed words, to remove it again
+        self._words: Dict[str, Tuple[str, ...]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        for need in needs:
+            self._add(need, insort=False)
+        # Sorted once after the build; later changes insert their new words
+        self.vocabulary = sorted(self.postings)
+
+    def _add(self, need: UserNeed, insort: bool = True):
+        frequencies: Dict[str, float] = {}
+        length = 0
+        for field, _, text in _field_texts(need):
+            weight = FIELD_WEIGHTS[field]
+            for word in tokenize(text):
+                # Interned, so the postings and the per-need words share one copy
+                word = sys.intern(word)
+                frequencies[word] = frequencies.get(word, 0.0) + weight
+                length += 1
+        for word, frequency in frequencies.items():
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = {}
+                if insort:
+                    bisect.insort(self.vocabulary, word)
+            posting[need.id] = frequency
+        self._words[need.id] = tuple(frequencies)
+        self._lengths[need.id] = length
+        self._total_length += length
+
+    def _remove(self, need_id: str):
+        words = self._words.pop(need_id, None)
+        if words is None:
+            return
+        self._total_length -= self._lengths.pop(need_id)
+        for word in words:
+            posting = self.postings[word]
+            del posting[need_id]
+            if not posting:
+                del self.postings[word]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, word)]
+
+    def apply_need_change(self, old: Optional[UserNeed], new: Optional[UserNeed]):
+        """Update the index for a created (old=None), updated or deleted (new=None) need."""
+        self.apply_change(old.id if old is not None else None, new)
+
+    def apply_change(self, need_id: Optional[str], new: Optional[UserNeed]):
+        """Replace the need indexed under need_id (None to create) with new (None to delete)."""
+        with self._lock:
+            if need_id is not None:
+                self._remove(need_id)
+            if new is not None:
+                self._add(new)
+
+    def _expand(self, word: str) -> List[Tuple[str, float]]:
+        """Get the indexed words a query word matches, with their weight."""
+        matches = [(word, 1.0)] if word in self.postings else []
+        start = bisect.bisect_right(self.vocabulary, word)
+        for candidate in self.vocabulary[start:start + MAX_EXPANSIONS]:
+            if not candidate.startswith(word):
+                break
+            matches.append((candidate, PREFIX_WEIGHT))
+        return matches
+
+    def search(self, query: str, limit: int = 20,
+               candidates: Optional[Set[str]] = None) -> List[SearchHit]:
+        """Rank needs against a query.
+
+        Each query word contributes the BM25 score of its best matching word
+        in a need, so a need matching more query words ranks higher.
+
+        Args:
+            query: Free text; words match exactly or as a prefix
+            limit: Maximum number of hits to return
+            candidates: If given, only needs with these IDs are considered
+
+        Returns:
+            Hits with the highest score first (ties in ID order)
+        """
+        with self._lock:
+            return _rank([(self, frozenset())], query, limit, candidates)
+
+
+class OverlaySearchIndex:
+    """Search view of a shared, read-only SearchIndex with some needs replaced.
+
+    Needs in hidden are left out of the base index and the overlay needs are
+    indexed on their own, so building the view costs as much as the overlay.
+    Scores use the statistics of the combined collection, as if the overlay
+    had been applied to the base index.
+    """
+
+    def __init__(self, base: SearchIndex, hidden: Set[str], needs: Iterable[UserNeed]):
+        self.base = base
+        self.hidden = frozenset(hidden)
+        needs = {need.id: need for need in needs}
+        self.overlay = SearchIndex(needs.values(), needs.get)
+
+    def search(self, query: str, limit: int = 20,
+               candidates: Optional[Set[str]] = None) -> List[SearchHit]:
+        """Rank needs against a query; see SearchIndex.search."""
+        with self.base._lock, self.overlay._lock:
+            return _rank([(self.base, self.hidden), (self.overlay, frozenset())], query, limit, candidates)
+
+
+def _rank(layers: List[Tuple[SearchIndex, Set[str]]], query: str, limit: int,
+          candidates: Optional[Set[str]]) -> List[SearchHit]:
+    """Rank the needs of several indexes as one collection.
+
+    Args:
+        layers: Indexes, each with the IDs of its needs to leave out
+        query: Free text; words match exactly or as a prefix
+        limit: Maximum number of hits to return
+        candidates: If given, only needs with these IDs are considered
+    """
+    count = 0
+    total_length = 0
+    for index, hidden in layers:
+        excluded = [need_id for need_id in hidden if need_id in index._lengths]
+        count += len(index._lengths) - len(excluded)
+        total_length += index._total_length - sum(index._lengths[need_id] for need_id in excluded)
+    if count == 0:
+        return []
+    average_length = total_length / count or 1.0
+
+    scores: Dict[str, float] = {}
+    matched_words: Set[str] = set()
+    for word in dict.fromkeys(tokenize(query)):
+        terms: Dict[str, float] = {}
+        for index, _ in layers:
+            for term, weight in index._expand(word):
+                terms[term] = max(weight, terms.get(term, 0.0))
+
+        best: Dict[str, float] = {}
+        for term, weight in terms.items():
+            postings = [
+                (index, hidden, index.postings[term]) for index, hidden in layers if term in index.postings
+            ]
+            frequency_count = sum(
+                len(posting) - sum(1 for need_id in hidden if need_id in posting)
+                for _, hidden, posting in postings
+            )
+            if frequency_count == 0:
+                continue
+            idf = math.log(1 + (count - frequency_count + 0.5) / (frequency_count + 0.5))
+            for index, hidden, posting in postings:
+                for need_id, frequency in posting.items():
+                    if need_id in hidden or (candidates is not None and need_id not in candidates):
+                        continue
+                    norm = K1 * (1 - B + B * index._lengths[need_id] / average_length)
+                    score = weight * idf * frequency * (K1 + 1) / (frequency + norm)
+                    if score > best.get(need_id, 0.0):
+                        best[need_id] = score
+            matched_words.add(term)
+        for need_id, score in best.items():
+            scores[need_id] = scores.get(need_id, 0.0) + score
+
+    top = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+    hits = []
+    for need_id, score in top:
+        # The need comes from the last layer that holds it and does not hide it
+        index = next(
+            index for index, hidden in reversed(layers)
+            if need_id in index._lengths and need_id not in hidden
+        )
+        need = index.lookup(need_id)
+        if need is None:
+            # Deleted after it was indexed, before the index caught up
+            continue
+        hits.append(SearchHit(need, score, _highlight(need, matched_words)))
+    return hits
+
+
+def _highlight(need: UserNeed, words: Set[str]) -> Highlights:
+    """Find the character ranges of a need's indexed text that are matched words."""
+    highlights: Highlights = {}
+    for _, key, text in _field_texts(need):
+        spans = [match.span() for match in _WORD.finditer(text) if match.group().lower() in words]
+        if spans:
+            highlights[key] = spans
+    return highlights
@@ -0,0 +1,115 @@
+"""Single-writer queue for storage mutations.
+
+Async endpoints submit their check-then-write function instead of running
+it in the threadpool. A task on the event loop takes jobs from an asyncio
+queue in order and runs each on one dedicated thread, so writes never
+contend for locks and queued writes do not tie up threadpool workers.
+The thread is only started by the first job, and close() stops it.
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleWriter:
+    """Serial executor for a dataset's write jobs."""
+
+    def __init__(self, name: str = "storage-writer"):
+        self.name = name
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: "Optional[asyncio.Queue[Optional[Tuple[Callable, asyncio.Future]]]]" = None
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs waiting to run."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def idle(self) -> bool:
+        """Whether no job is running or waiting to run."""
+        return not self._running and self.pending == 0
+
+    def _start(self, loop: asyncio.AbstractEventLoop):
+        """Create the queue and worker task on the running loop (caller holds _lock)."""
+        # A closed writer's task may still be running the jobs queued before
+        # close(); the new task waits for it so jobs still run one at a time
+        previous = self._task if self._task is not None and self._task.get_loop() is loop else None
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        # Keep a reference so the task is not garbage collected
+        self._task = loop.create_task(self._run(self._queue, previous))
+
+    async def _run(self, queue: "asyncio.Queue[Optional[Tuple[Callable, asyncio.Future]]]",
+                   previous: Optional[asyncio.Task]):
+        if previous is not None:
+            await asyncio.wait([previous])
+        loop = asyncio.get_running_loop()
+        executor = self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    # Closed
+                    return
+                job, future = item
+                self._running = True
+                try:
+                    result = await loop.run_in_executor(executor, job)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+                finally:
+                    self._running = False
+        finally:
+            executor.shutdown(wait=False)
+
+    async def submit(self, job: Callable[[], T]) -> T:
+        """Queue job behind the writes submitted before it and wait for its result.
+
+        The job runs even if the caller is cancelled while it is queued, in a
+        copy of the caller's context (so e.g. its phase timings are recorded
+        against the submitting request).
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        context = contextvars.copy_context()
+        with self._lock:
+            if self._loop is not loop:
+                self._start(loop)
+            self._queue.put_nowait((lambda: context.run(job), future))
+        return await future
+
+    def close(self):
+        """Stop the worker task and thread once the jobs queued so far have run.
+
+        May be called from any thread. A later submit starts them again.
+        """
+        with self._lock:
+            loop, queue = self._loop, self._queue
+            self._loop = self._queue = None
+        if queue is None:
+            return
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+        except RuntimeError:
+            # The loop is closed, and its task went with it
+            pass
+
+    def shutdown(self):
+        """Wait for the running job and stop the writer thread."""
+        self.close()
+        executor = self._executor
+        if executor is not None:
+            executor.shutdown(wait=True)
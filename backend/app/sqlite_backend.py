@@ -0,0 +1,621 @@
+"""SQLite storage backend for User Needs Management API."""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .models import (
+    DataStore, Entity, UserGroup, UserNeed, UserSuperGroup, WorkflowPhase
+)
+from .database import COLLECTIONS, StorageBackend
+from .search import SearchHit, SearchIndex
+from .id_allocator import IdAllocator
+from .pagination import UNKNOWN_PHASE_ORDER
+from .config import (
+    DATA_FILE, EXAMPLE_DATA_FILE, TEMPLATE_DATA_FILE,
+    SQLITE_DATA_FILE, SQLITE_DEMO_DATA_FILE, WORKSPACES_DIR
+)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_super_groups (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    prefix TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS user_groups (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    super_group TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_user_groups_super_group ON user_groups(super_group);
+
+CREATE TABLE IF NOT EXISTS entities (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS workflow_phases (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    "order" INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS user_needs (
+    id TEXT PRIMARY KEY,
+    user_group_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    workflow_phase TEXT NOT NULL,
+    refined INTEGER,
+    sla TEXT,
+    triggers_state_change INTEGER,
+    from_state TEXT,
+    to_state TEXT,
+    optional INTEGER,
+    future_feature INTEGER,
+    constraints TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_user_needs_user_group ON user_needs(user_group_id);
+CREATE INDEX IF NOT EXISTS idx_user_needs_workflow_phase ON user_needs(workflow_phase);
+CREATE INDEX IF NOT EXISTS idx_user_needs_refined ON user_needs(refined);
+
+CREATE TABLE IF NOT EXISTS user_need_entities (
+    need_id TEXT NOT NULL REFERENCES user_needs(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    position INTEGER NOT NULL,
+    entity_id TEXT NOT NULL,
+    PRIMARY KEY (need_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_user_need_entities_entity ON user_need_entities(entity_id, need_id);
+
+CREATE TABLE IF NOT EXISTS dataset_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+INSERT OR IGNORE INTO dataset_meta (key, value) VALUES ('epoch', lower(hex(randomblob(4))));
+
+CREATE TABLE IF NOT EXISTS collection_versions (
+    collection TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+# Tables backing each DataStore collection; triggers on them bump collection_versions
+VERSIONED_TABLES: Dict[str, Tuple[str, ...]] = {
+    "userSuperGroups": ("user_super_groups",),
+    "userGroups": ("user_groups",),
+    "entities": ("entities",),
+    "workflowPhases": ("workflow_phases",),
+    "userNeeds": ("user_needs", "user_need_entities"),
+}
+
+VERSION_TRIGGERS = "".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS bump_{table}_{op.lower()} AFTER {op} ON {table}
+BEGIN
+    INSERT INTO collection_versions (collection, version) VALUES ('{collection}', 1)
+    ON CONFLICT (collection) DO UPDATE SET version = version + 1;
+END;
+"""
+    for collection, tables in VERSIONED_TABLES.items()
+    for table in tables
+    for op in ("INSERT", "UPDATE", "DELETE")
+)
+
+# SQL expressions making up the sort key of each sort order
+SORT_COLUMNS = {
+    None: ["n.rowid"],
+    "id": ["n.id"],
+    "workflowPhase": [f'COALESCE(wp."order", {UNKNOWN_PHASE_ORDER})', "n.id"],
+    "userGroupId": ["n.user_group_id", "n.id"],
+}
+
+# Columns of user_needs in insertion order, matching _need_row
+NEED_COLUMNS = (
+    "id, user_group_id, title, description, workflow_phase, refined, sla, "
+    "triggers_state_change, from_state, to_state, optional, future_feature, constraints"
+)
+
+
+def _bool(value: Optional[int]) -> Optional[bool]:
+    """Convert a nullable INTEGER column back to Optional[bool]."""
+    return None if value is None else bool(value)
+
+
+def _need_row(need: UserNeed) -> tuple:
+    """Convert a UserNeed to a user_needs row (without entities)."""
+    return (
+        need.id, need.userGroupId, need.title, need.description, need.workflowPhase,
+        need.refined, need.sla, need.triggersStateChange, need.fromState, need.toState,
+        need.optional, need.futureFeature,
+        json.dumps(need.constraints) if need.constraints is not None else None,
+    )
+
+
+# INSERT statement and row builder of each collection, in dependency order
+INSERTS: Dict[str, Tuple[str, Callable[[BaseModel], tuple]]] = {
+    "userSuperGroups": (
+        "INSERT INTO user_super_groups (id, name, prefix) VALUES (?, ?, ?)",
+        lambda sg: (sg.id, sg.name, sg.prefix),
+    ),
+    "userGroups": (
+        "INSERT INTO user_groups (id, name, description, super_group) VALUES (?, ?, ?, ?)",
+        lambda ug: (ug.id, ug.name, ug.description, ug.superGroup),
+    ),
+    "entities": (
+        "INSERT INTO entities (id, name, description) VALUES (?, ?, ?)",
+        lambda e: (e.id, e.name, e.description),
+    ),
+    "workflowPhases": (
+        'INSERT INTO workflow_phases (id, name, "order") VALUES (?, ?, ?)',
+        lambda wp: (wp.id, wp.name, wp.order),
+    ),
+    "userNeeds": (f"INSERT INTO user_needs ({NEED_COLUMNS}) VALUES ({', '.join('?' * 13)})", _need_row),
+}
+
+# Rows inserted per executemany by import_records
+IMPORT_BATCH_SIZE = 1000
+
+
+def _need_from_row(row: sqlite3.Row, entities: List[str]) -> UserNeed:
+    """Build a UserNeed from a user_needs row and its entity IDs."""
+    return UserNeed(
+        id=row["id"],
+        userGroupId=row["user_group_id"],
+        title=row["title"],
+        description=row["description"],
+        entities=entities,
+        workflowPhase=row["workflow_phase"],
+        refined=_bool(row["refined"]),
+        sla=row["sla"],
+        triggersStateChange=_bool(row["triggers_state_change"]),
+        fromState=row["from_state"],
+        toState=row["to_state"],
+        optional=_bool(row["optional"]),
+        futureFeature=_bool(row["future_feature"]),
+        constraints=json.loads(row["constraints"]) if row["constraints"] is not None else None,
+    )
+
+
+class SqliteBackend(StorageBackend):
+    """Backend storing the dataset in a SQLite database in WAL mode.
+
+    Each thread gets its own connection so reads run concurrently; writes are
+    serialised by a lock and run in a single transaction each. Rows keep their
+    rowid on update, so ordering by rowid preserves insertion order like the
+    JSON document does.
+    """
+
+    def __init__(self, db_path: Path, seed_file: Optional[Path] = None):
+        """Open (and if needed create) the database at db_path.
+
+        Args:
+            db_path: SQLite database file
+            seed_file: JSON data file imported when the database is first created
+        """
+        super().__init__()
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        # Full-text index and the userNeeds version it reflects; writes made
+        # through this instance update it, any other change rebuilds it
+        self._search: Optional[SearchIndex] = None
+        self._search_version = -1
+        self._search_lock = threading.Lock()
+        self.id_allocator = IdAllocator(db_path.with_name(db_path.name + ".ids"))
+
+        is_new = not db_path.exists()
+        with self._write_lock, self._connection() as conn:
+            conn.executescript(SCHEMA + VERSION_TRIGGERS)
+        if is_new and seed_file is not None and seed_file.exists():
+            with open(seed_file, 'r') as f:
+                self.import_data(DataStore(**json.load(f)))
+
+    @classmethod
+    def for_mode(cls, demo_mode: bool = False, workspace: Optional[str] = None) -> "SqliteBackend":
+        """Create the backend for the main or demo database.
+
+        New databases are seeded like their JSON counterparts: the demo
+        database from data.example.json, the main one from data.json if it
+        exists and otherwise from the empty template. A workspace keeps its
+        databases (and the data.json they are seeded from) in its directory.
+        """
+        if workspace is not None:
+            directory = WORKSPACES_DIR / workspace
+            db_file, demo_db_file = directory / "data.db", directory / SQLITE_DEMO_DATA_FILE.name
+            data_file = directory / DATA_FILE.name
+        else:
+            db_file, demo_db_file, data_file = SQLITE_DATA_FILE, SQLITE_DEMO_DATA_FILE, DATA_FILE
+        if demo_mode:
+            return cls(demo_db_file, EXAMPLE_DATA_FILE)
+        return cls(db_file, data_file if data_file.exists() else TEMPLATE_DATA_FILE)
+
+    def close(self):
+        super().close()
+        # Connections close once no thread still uses them; later calls reopen them
+        self._local = threading.local()
+        with self._search_lock:
+            self._search, self._search_version = None, -1
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[sqlite3.Row]:
+        return self._connection().execute(sql, tuple(params)).fetchall()
+
+    def _insert_entities(self, conn: sqlite3.Connection, need: UserNeed):
+        conn.executemany(
+            "INSERT INTO user_need_entities (need_id, position, entity_id) VALUES (?, ?, ?)",
+            [(need.id, position, entity_id) for position, entity_id in enumerate(need.entities)],
+        )
+
+    def _insert_need(self, conn: sqlite3.Connection, need: UserNeed):
+        conn.execute(INSERTS["userNeeds"][0], _need_row(need))
+        self._insert_entities(conn, need)
+
+    def import_data(self, data: DataStore):
+        """Replace the whole database content with a DataStore.
+
+        Args:
+            data: DataStore to import
+        """
+        self.import_records(
+            (collection, record) for collection in COLLECTIONS for record in getattr(data, collection)
+        )
+
+    def import_records(self, records: Iterable[Tuple[str, BaseModel]]):
+        """Replace the whole database content with (collection, record) pairs.
+
+        The records are inserted in batches of IMPORT_BATCH_SIZE rows as they
+        are read, in one transaction, so the replacement is atomic and never
+        holds the whole dataset.
+
+        Args:
+            records: Records in DataStore order (references before the records using them)
+        """
+        with self._write_lock, self._connection() as conn:
+            for table in ("user_need_entities", "user_needs", "user_groups",
+                          "user_super_groups", "entities", "workflow_phases"):
+                conn.execute(f"DELETE FROM {table}")
+            batches: Dict[str, list] = {collection: [] for collection in INSERTS}
+            need_entities: list = []
+
+            def flush():
+                # In dependency order, then the entities of the needs just inserted
+                for collection, rows in batches.items():
+                    if rows:
+                        conn.executemany(INSERTS[collection][0], rows)
+                        rows.clear()
+                conn.executemany(
+                    "INSERT INTO user_need_entities (need_id, position, entity_id) VALUES (?, ?, ?)",
+                    need_entities,
+                )
+                need_entities.clear()
+
+            count = 0
+            for collection, record in records:
+                batches[collection].append(INSERTS[collection][1](record))
+                if collection == "userNeeds":
+                    need_entities.extend(
+                        (record.id, position, entity_id) for position, entity_id in enumerate(record.entities)
+                    )
+                count += 1
+                if count % IMPORT_BATCH_SIZE == 0:
+                    flush()
+            flush()
+        with self._search_lock:
+            self._search = None
+
+    def has_data(self) -> bool:
+        return self.db_path.exists()
+
+    def replace_all(self, data: DataStore):
+        self.import_data(data)
+        self.id_allocator.reset()
+
+    def load(self) -> DataStore:
+        return DataStore(
+            userSuperGroups=self.list_user_super_groups(),
+            userGroups=self.list_user_groups(),
+            entities=self.list_entities(),
+            workflowPhases=self.list_workflow_phases(),
+            userNeeds=self.list_user_needs(),
+        )
+
+    def get_version(self, collections: Iterable[str]) -> str:
+        epoch = self._query("SELECT value FROM dataset_meta WHERE key = 'epoch'")[0][0]
+        versions = dict(self._query("SELECT collection, version FROM collection_versions"))
+        return f"{self.db_path.stem}-{epoch}-{'.'.join(str(versions.get(c, 0)) for c in collections)}"
+
+    # ==================== User Needs ====================
+
+    def _need_filter(self, userGroupId=None, entity=None, workflowPhase=None,
+                     superGroup=None, refined=None) -> Tuple[str, list]:
+        """Build the WHERE clause (over alias n) for the user need filters."""
+        clauses = []
+        params = []
+        if userGroupId:
+            clauses.append("n.user_group_id = ?")
+            params.append(userGroupId)
+        if entity:
+            clauses.append("n.id IN (SELECT need_id FROM user_need_entities WHERE entity_id = ?)")
+            params.append(entity)
+        if workflowPhase:
+            clauses.append("n.workflow_phase = ?")
+            params.append(workflowPhase)
+        if superGroup:
+            clauses.append("n.user_group_id IN (SELECT id FROM user_groups WHERE super_group = ?)")
+            params.append(superGroup)
+        if refined == 'refined':
+            clauses.append("n.refined = 1")
+        elif refined == 'needsRefinement':
+            clauses.append("(n.refined IS NULL OR n.refined = 0)")
+        where = " AND ".join(clauses) if clauses else "1 = 1"
+        return where, params
+
+    def _select_needs(self, where: str, params: list) -> List[UserNeed]:
+        """Fetch user needs matching a WHERE clause, with their entities."""
+        rows = self._query(f"SELECT * FROM user_needs n WHERE {where} ORDER BY n.rowid", params)
+        entities = {row["id"]: [] for row in rows}
+        for link in self._query(
+            "SELECT e.need_id, e.entity_id FROM user_need_entities e "
+            f"JOIN user_needs n ON n.id = e.need_id WHERE {where} "
+            "ORDER BY e.need_id, e.position",
+            params,
+        ):
+            entities[link["need_id"]].append(link["entity_id"])
+        return [_need_from_row(row, entities[row["id"]]) for row in rows]
+
+    def list_user_needs(self, userGroupId=None, entity=None, workflowPhase=None,
+                        superGroup=None, refined=None) -> List[UserNeed]:
+        where, params = self._need_filter(userGroupId, entity, workflowPhase, superGroup, refined)
+        return self._select_needs(where, params)
+
+    def _entities_for(self, need_ids: List[str]) -> dict:
+        """Get the ordered entity IDs of the given needs."""
+        entities = {need_id: [] for need_id in need_ids}
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(need_ids), 500):
+            chunk = need_ids[start:start + 500]
+            for link in self._query(
+                "SELECT need_id, entity_id FROM user_need_entities "
+                f"WHERE need_id IN ({', '.join('?' * len(chunk))}) ORDER BY need_id, position",
+                chunk,
+            ):
+                entities[link["need_id"]].append(link["entity_id"])
+        return entities
+
+    def page_user_needs(self, sort=None, after=None, limit=None, **filters):
+        where, params = self._need_filter(**filters)
+        columns = SORT_COLUMNS[sort]
+        key_sql = ", ".join(f"{column} AS k{i}" for i, column in enumerate(columns))
+        if after is not None:
+            where += f" AND ({', '.join(columns)}) > ({', '.join('?' * len(columns))})"
+            params = params + list(after)
+        sql = (
+            f"SELECT n.*, {key_sql} FROM user_needs n "
+            "LEFT JOIN workflow_phases wp ON wp.id = n.workflow_phase "
+            f"WHERE {where} ORDER BY {', '.join(columns)}"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = params + [limit + 1]
+
+        rows = self._query(sql, params)
+        more = limit is not None and len(rows) > limit
+        rows = rows[:limit]
+        entities = self._entities_for([row["id"] for row in rows])
+        needs = [_need_from_row(row, entities[row["id"]]) for row in rows]
+        last_key = tuple(rows[-1][f"k{i}"] for i in range(len(columns))) if more else None
+        return needs, last_key
+
+    def _needs_version(self) -> int:
+        rows = self._query("SELECT version FROM collection_versions WHERE collection = 'userNeeds'")
+        return rows[0][0] if rows else 0
+
+    def _search_index(self) -> SearchIndex:
+        """Get the full-text index, rebuilding it if the needs changed elsewhere."""
+        with self._search_lock:
+            version = self._needs_version()
+            if self._search is None or self._search_version != version:
+                self._search = SearchIndex(self.list_user_needs(), self.get_user_need)
+                self._search_version = version
+            return self._search
+
+    def _update_search(self, version_before: int,
+                       changes: List[Tuple[Optional[str], Optional[UserNeed]]]):
+        """Apply committed need changes to the full-text index.
+
+        Call with the write lock held. If the index did not reflect
+        version_before it is dropped instead.
+        """
+        with self._search_lock:
+            if self._search is None:
+                return
+            if self._search_version != version_before:
+                self._search = None
+                return
+            for need_id, need in changes:
+                self._search.apply_change(need_id, need)
+            self._search_version = self._needs_version()
+
+    def search_user_needs(self, query: str, limit: int = 20, **filters) -> List[SearchHit]:
+        candidates = None
+        if any(filters.values()):
+            where, params = self._need_filter(**filters)
+            rows = self._query(f"SELECT n.id FROM user_needs n WHERE {where}", params)
+            candidates = {row["id"] for row in rows}
+        return self._search_index().search(query, limit, candidates)
+
+    def get_user_need(self, need_id: str) -> Optional[UserNeed]:
+        needs = self._select_needs("n.id = ?", [need_id])
+        return needs[0] if needs else None
+
+    def list_user_need_ids(self, prefix: str) -> List[str]:
+        rows = self._query("SELECT id FROM user_needs WHERE substr(id, 1, ?) = ?", (len(prefix), prefix))
+        return [row["id"] for row in rows]
+
+    def create_user_need(self, need: UserNeed):
+        with self._write_lock:
+            version = self._needs_version()
+            with self._connection() as conn:
+                self._insert_need(conn, need)
+            self._update_search(version, [(None, need)])
+
+    def _update_need(self, conn: sqlite3.Connection, need_id: str, need: UserNeed):
+        conn.execute(
+            "UPDATE user_needs SET id = ?, user_group_id = ?, title = ?, description = ?, "
+            "workflow_phase = ?, refined = ?, sla = ?, triggers_state_change = ?, "
+            "from_state = ?, to_state = ?, optional = ?, future_feature = ?, constraints = ? "
+            "WHERE id = ?",
+            _need_row(need) + (need_id,),
+        )
+        conn.execute("DELETE FROM user_need_entities WHERE need_id = ?", (need.id,))
+        self._insert_entities(conn, need)
+
+    def update_user_need(self, need_id: str, need: UserNeed):
+        with self._write_lock:
+            version = self._needs_version()
+            with self._connection() as conn:
+                self._update_need(conn, need_id, need)
+            self._update_search(version, [(need_id, need)])
+
+    def delete_user_need(self, need_id: str) -> Optional[UserNeed]:
+        with self._write_lock:
+            need = self.get_user_need(need_id)
+            if need is not None:
+                version = self._needs_version()
+                with self._connection() as conn:
+                    conn.execute("DELETE FROM user_needs WHERE id = ?", (need_id,))
+                self._update_search(version, [(need_id, None)])
+            return need
+
+    def apply_user_need_changes(self, changes: List[Tuple[Optional[str], Optional[UserNeed]]]):
+        with self._write_lock:
+            version = self._needs_version()
+            with self._connection() as conn:
+                for need_id, need in changes:
+                    if need_id is None:
+                        self._insert_need(conn, need)
+                    elif need is None:
+                        conn.execute("DELETE FROM user_needs WHERE id = ?", (need_id,))
+                    else:
+                        self._update_need(conn, need_id, need)
+            self._update_search(version, changes)
+
+    # ==================== User Groups ====================
+
+    def _user_group(self, row: sqlite3.Row) -> UserGroup:
+        return UserGroup(
+            id=row["id"], name=row["name"],
+            description=row["description"], superGroup=row["super_group"],
+        )
+
+    def list_user_groups(self) -> List[UserGroup]:
+        return [self._user_group(row) for row in self._query("SELECT * FROM user_groups ORDER BY rowid")]
+
+    def get_user_group(self, user_group_id: str) -> Optional[UserGroup]:
+        rows = self._query("SELECT * FROM user_groups WHERE id = ?", (user_group_id,))
+        return self._user_group(rows[0]) if rows else None
+
+    def create_user_group(self, user_group: UserGroup):
+        with self._write_lock, self._connection() as conn:
+            conn.execute(
+                "INSERT INTO user_groups (id, name, description, super_group) VALUES (?, ?, ?, ?)",
+                (user_group.id, user_group.name, user_group.description, user_group.superGroup),
+            )
+
+    # ==================== User Super Groups ====================
+
+    def _super_group(self, row: sqlite3.Row) -> UserSuperGroup:
+        return UserSuperGroup(id=row["id"], name=row["name"], prefix=row["prefix"])
+
+    def list_user_super_groups(self) -> List[UserSuperGroup]:
+        return [self._super_group(row) for row in self._query("SELECT * FROM user_super_groups ORDER BY rowid")]
+
+    def get_user_super_group(self, super_group_id: str) -> Optional[UserSuperGroup]:
+        rows = self._query("SELECT * FROM user_super_groups WHERE id = ?", (super_group_id,))
+        return self._super_group(rows[0]) if rows else None
+
+    def create_user_super_group(self, super_group: UserSuperGroup):
+        with self._write_lock, self._connection() as conn:
+            conn.execute(
+                "INSERT INTO user_super_groups (id, name, prefix) VALUES (?, ?, ?)",
+                (super_group.id, super_group.name, super_group.prefix),
+            )
+
+    def update_user_super_group(self, super_group_id: str, super_group: UserSuperGroup):
+        with self._write_lock, self._connection() as conn:
+            conn.execute(
+                "UPDATE user_super_groups SET id = ?, name = ?, prefix = ? WHERE id = ?",
+                (super_group.id, super_group.name, super_group.prefix, super_group_id),
+            )
+            if super_group.id != super_group_id:
+                conn.execute(
+                    "UPDATE user_groups SET super_group = ? WHERE super_group = ?",
+                    (super_group.id, super_group_id),
+                )
+
+    def delete_user_super_group(self, super_group_id: str) -> Optional[UserSuperGroup]:
+        with self._write_lock:
+            super_group = self.get_user_super_group(super_group_id)
+            if super_group is not None:
+                with self._connection() as conn:
+                    conn.execute("DELETE FROM user_super_groups WHERE id = ?", (super_group_id,))
+            return super_group
+
+    # ==================== Metadata ====================
+
+    def list_entities(self) -> List[Entity]:
+        return [
+            Entity(id=row["id"], name=row["name"], description=row["description"])
+            for row in self._query("SELECT * FROM entities ORDER BY rowid")
+        ]
+
+    def get_entity(self, entity_id: str) -> Optional[Entity]:
+        rows = self._query("SELECT * FROM entities WHERE id = ?", (entity_id,))
+        return Entity(id=rows[0]["id"], name=rows[0]["name"], description=rows[0]["description"]) if rows else None
+
+    def list_workflow_phases(self) -> List[WorkflowPhase]:
+        return [
+            WorkflowPhase(id=row["id"], name=row["name"], order=row["order"])
+            for row in self._query("SELECT * FROM workflow_phases ORDER BY rowid")
+        ]
+
+    def get_workflow_phase(self, phase_id: str) -> Optional[WorkflowPhase]:
+        rows = self._query("SELECT * FROM workflow_phases WHERE id = ?", (phase_id,))
+        return WorkflowPhase(id=rows[0]["id"], name=rows[0]["name"], order=rows[0]["order"]) if rows else None
+
+    def get_statistics(self) -> dict:
+        def counts(sql: str) -> dict:
+            return {row[0]: row[1] for row in self._query(sql)}
+
+        return {
+            "totalNeeds": self._query("SELECT COUNT(*) FROM user_needs")[0][0],
+            "byUserGroup": counts(
+                "SELECT user_group_id, COUNT(*) FROM user_needs GROUP BY user_group_id ORDER BY MIN(rowid)"
+            ),
+            "byWorkflowPhase": counts(
+                "SELECT workflow_phase, COUNT(*) FROM user_needs GROUP BY workflow_phase ORDER BY MIN(rowid)"
+            ),
+            "byEntity": counts(
+                "SELECT e.entity_id, COUNT(*) FROM user_need_entities e "
+                "JOIN user_needs n ON n.id = e.need_id GROUP BY e.entity_id ORDER BY MIN(n.rowid)"
+            ),
+        }
@@ -1,7 +1,34 @@
 """Global application state management."""
 
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
 from .config import DEMO_MODE_ONLY
 
+# Workspace selected for the current request by WorkspaceMiddleware
+# (None selects the default dataset)
+current_workspace: ContextVar[Optional[str]] = ContextVar("current_workspace", default=None)
+
+
+class DemoSession:
+    """Demo session of a request: the client's session ID, or one assigned on first use."""
+
+    def __init__(self, session_id: Optional[str] = None):
+        self.id = session_id
+        self.created = False
+
+    def ensure(self) -> str:
+        """Get the session ID, assigning a new one if the client sent none."""
+        if self.id is None:
+            self.id = uuid.uuid4().hex
+            self.created = True
+        return self.id
+
+
+# Demo session of the current request, selected by DemoSessionMiddleware
+current_demo_session: ContextVar[Optional[DemoSession]] = ContextVar("current_demo_session", default=None)
+
 
 class AppState:
     """Global application state."""
@@ -30,6 +57,17 @@ class AppState:
             )
         self._demo_mode = value
 
+    @property
+    def workspace(self) -> Optional[str]:
+        """Get the workspace selected for the current request."""
+        return current_workspace.get()
+
+    @property
+    def demo_session(self) -> Optional[str]:
+        """Get the demo session ID of the current request (None until one is assigned)."""
+        session = current_demo_session.get()
+        return session.id if session is not None else None
+
     @property
     def locked(self) -> bool:
         """Check if demo mode is locked (cannot be disabled)."""
@@ -0,0 +1,200 @@
+"""NDJSON export and import of whole datasets.
+
+Each line holds one record: {"collection": "userNeeds", "record": {...}}.
+Collections are written (and must be read) in dependency order, so every
+reference can be checked against the records seen before it.
+"""
+
+import json
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from pydantic import BaseModel, ValidationError
+
+from .database import StorageBackend
+from .integrity import IntegrityChecker
+from .models import Entity, UserGroup, UserNeed, UserSuperGroup, WorkflowPhase
+
+# Collections in dependency order, with their record models
+RECORD_MODELS = {
+    "userSuperGroups": UserSuperGroup,
+    "userGroups": UserGroup,
+    "entities": Entity,
+    "workflowPhases": WorkflowPhase,
+    "userNeeds": UserNeed,
+}
+
+# Approximate size of the chunks yielded by export_lines
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Per-line errors kept for the import report; further errors are only counted
+MAX_REPORTED_ERRORS = 1000
+
+# Import states: reading and validating the body, then applying it; finished
+# imports end as applied, validated (dry runs) or failed
+RUNNING_STATES = ("reading", "applying")
+
+
+def export_lines(backend: StorageBackend) -> Iterator[bytes]:
+    """Serialise a dataset as NDJSON, one record at a time.
+
+    Lines are grouped into chunks of about EXPORT_CHUNK_SIZE bytes.
+
+    Args:
+        backend: Backend of the dataset to export
+
+    Yields:
+        Chunks of NDJSON
+    """
+    chunk: List[str] = []
+    size = 0
+    for collection, record in backend.iter_records():
+        line = f'{{"collection":"{collection}","record":{record.model_dump_json()}}}\n'
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(chunk).encode()
+            chunk, size = [], 0
+    if chunk:
+        yield "".join(chunk).encode()
+
+
+class NdjsonImporter:
+    """Incremental parser and validator for an NDJSON import.
+
+    Feed the request body with feed() as it arrives and call finish() at the
+    end. Each complete line is parsed, validated against its model and checked
+    for duplicate IDs and dangling references as soon as it is read.
+
+    Only the reference records (super groups, user groups, entities and
+    workflow phases) are kept as models. User needs, the bulk of a dataset,
+    are spooled to a temporary file as they are validated, so memory does not
+    grow with the import; records() reads them back once. Call close() to
+    delete the spool file.
+    """
+
+    def __init__(self, bytes_total: Optional[int] = None):
+        self.id = uuid.uuid4().hex[:8]
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self.state = "reading"
+        self.bytes_read = 0
+        self.bytes_total = bytes_total
+        self.references: Dict[str, List[BaseModel]] = {c: [] for c in RECORD_MODELS if c != "userNeeds"}
+        self.need_count = 0
+        self._needs = tempfile.TemporaryFile()
+        self.checker = IntegrityChecker()
+        self.lines = 0
+        self.error_count = 0
+        self.errors: List[dict] = []
+        self._buffer = b""
+
+    def feed(self, chunk: bytes):
+        """Process every complete line in chunk, buffering the remainder."""
+        self.bytes_read += len(chunk)
+        lines = (self._buffer + chunk).split(b"\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            self._process(line)
+
+    def finish(self):
+        """Process a final line without a trailing newline."""
+        if self._buffer:
+            self._process(self._buffer)
+            self._buffer = b""
+
+    def records(self) -> Iterator[Tuple[str, BaseModel]]:
+        """Read back every validated record as (collection, record), user needs last."""
+        for collection, records in self.references.items():
+            for record in records:
+                yield collection, record
+        self._needs.seek(0)
+        for line in self._needs:
+            # Parsing straight from JSON in pydantic-core is cheaper than json.loads
+            yield "userNeeds", UserNeed.model_validate_json(line)
+
+    def close(self):
+        """Delete the spooled user needs."""
+        self._needs.close()
+
+    def counts(self) -> Dict[str, int]:
+        """Number of validated records per collection."""
+        counts = {collection: len(records) for collection, records in self.references.items()}
+        counts["userNeeds"] = self.need_count
+        return counts
+
+    def progress(self) -> dict:
+        """Get the progress in the ImportProgress shape."""
+        return {
+            "id": self.id,
+            "state": self.state,
+            "startedAt": self.started_at,
+            "bytesRead": self.bytes_read,
+            "bytesTotal": self.bytes_total,
+            "lines": self.lines,
+            "imported": self.counts(),
+            "errorCount": self.error_count,
+        }
+
+    def _error(self, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": self.lines, "error": message})
+
+    def _process(self, line: bytes):
+        self.lines += 1
+        if not line.strip():
+            return
+        try:
+            item = json.loads(line)
+            collection = item["collection"]
+            model = RECORD_MODELS[collection]
+            record = model.model_validate(item["record"])
+        except json.JSONDecodeError as e:
+            return self._error(f"Invalid JSON: {e.msg}")
+        except (KeyError, TypeError):
+            return self._error('Expected {"collection": ..., "record": {...}} with a known collection')
+        except ValidationError as e:
+            return self._error(f"Invalid {collection} record: {e.errors()[0]['msg']} "
+                               f"({'.'.join(map(str, e.errors()[0]['loc']))})")
+
+        issues = self.checker.check(collection, record)
+        if issues:
+            return self._error(issues[0].message)
+        self.checker.add(collection, record)
+        if collection == "userNeeds":
+            self._needs.write(record.model_dump_json().encode() + b"\n")
+            self.need_count += 1
+        else:
+            self.references[collection].append(record)
+
+
+class ImportTracker:
+    """The imports of each dataset, running and recently finished, for
+    GET /api/import/progress."""
+
+    def __init__(self, keep: int = 5):
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._imports: "WeakKeyDictionary[StorageBackend, List[NdjsonImporter]]" = WeakKeyDictionary()
+
+    def start(self, backend: StorageBackend, importer: NdjsonImporter):
+        """Track an import into backend's dataset, forgetting the oldest finished ones."""
+        with self._lock:
+            imports = self._imports.setdefault(backend, [])
+            imports.insert(0, importer)
+            finished = [i for i in imports if i.state not in RUNNING_STATES]
+            for old in finished[self.keep:]:
+                imports.remove(old)
+
+    def progress(self, backend: StorageBackend) -> List[dict]:
+        """Get the progress of the tracked imports of backend's dataset, newest first."""
+        with self._lock:
+            return [importer.progress() for importer in self._imports.get(backend, ())]
+
+
+# Imports of every dataset, shared by the import endpoints
+import_tracker = ImportTracker()
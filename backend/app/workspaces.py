@@ -0,0 +1,104 @@
+"""Named workspaces, each an independent dataset with its own data files.
+
+A request selects a workspace with a /w/<name> path prefix (e.g.
+/w/team-a/api/user-needs) or the X-Workspace header; without either it
+uses the default dataset. WorkspaceMiddleware strips the prefix, so the
+routers are unchanged and read the selection from app_state.workspace.
+"""
+
+import re
+from pathlib import Path
+from typing import List
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .config import WORKSPACES_DIR
+from .database import get_data_file_path, initialize_data_file
+from .state import current_workspace
+
+WORKSPACE_HEADER = "X-Workspace"
+
+# Workspace names double as directory names
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+PATH_PREFIX = re.compile(r"^/w/([^/]+)(?=/|$)")
+
+
+def is_valid_name(name: str) -> bool:
+    """Check whether name can be used as a workspace name."""
+    return NAME_PATTERN.match(name) is not None
+
+
+def workspace_dir(name: str) -> Path:
+    """Get the directory holding a workspace's data files."""
+    return WORKSPACES_DIR / name
+
+
+def workspace_exists(name: str) -> bool:
+    """Check whether a workspace has been created."""
+    return is_valid_name(name) and workspace_dir(name).is_dir()
+
+
+def list_workspaces() -> List[str]:
+    """Get the names of the existing workspaces, sorted."""
+    if not WORKSPACES_DIR.is_dir():
+        return []
+    return sorted(p.name for p in WORKSPACES_DIR.iterdir() if p.is_dir() and is_valid_name(p.name))
+
+
+def create_workspace(name: str):
+    """Create a workspace with an empty main dataset.
+
+    Args:
+        name: Workspace name
+
+    Raises:
+        ValueError: If name is not a valid workspace name
+        FileExistsError: If the workspace already exists
+    """
+    if not is_valid_name(name):
+        raise ValueError(
+            "Invalid workspace name: use up to 64 letters, digits, '-' or '_', "
+            "starting with a letter or digit"
+        )
+    workspace_dir(name).mkdir(parents=True)
+    initialize_data_file(get_data_file_path(False, name))
+
+
+class WorkspaceMiddleware:
+    """ASGI middleware selecting the workspace of each HTTP request.
+
+    Responds 400 for an invalid workspace name and 404 for an unknown one.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        name = None
+        match = PATH_PREFIX.match(scope["path"])
+        if match:
+            name = match.group(1)
+            path = scope["path"][match.end():] or "/"
+            scope = dict(scope, path=path, raw_path=path.encode())
+        else:
+            name = Headers(scope=scope).get(WORKSPACE_HEADER) or None
+
+        if name is not None and not workspace_exists(name):
+            if is_valid_name(name):
+                status_code, detail = 404, "Workspace not found"
+            else:
+                status_code, detail = 400, "Invalid workspace name"
+            await JSONResponse({"detail": detail}, status_code=status_code)(scope, receive, send)
+            return
+
+        token = current_workspace.set(name)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_workspace.reset(token)
@@ -0,0 +1,137 @@
+"""Write-behind flushing of the in-memory DataStore.
+
+In write-behind mode save_data only marks a data file dirty; the flusher
+writes it out once the oldest unflushed change is older than the latency
+window, or as soon as the batch size is reached. Bursts of edits therefore
+cost one disk write per batch instead of one per request.
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class _Pending:
+    """Unflushed changes for a single data file."""
+
+    def __init__(self):
+        self.since = time.monotonic()
+        self.count = 0
+
+
+class WriteBehindFlusher:
+    """Background thread that writes dirty data files in batches."""
+
+    def __init__(self, flush: Callable[[Path], None], latency: float, batch_size: int):
+        """Create the flusher.
+
+        Args:
+            flush: Writes the current in-memory state of a data file to disk
+            latency: Seconds a change may stay unflushed
+            batch_size: Number of changes that triggers an immediate flush
+        """
+        self._flush = flush
+        self.latency = latency
+        self.batch_size = batch_size
+        self._pending: Dict[Path, _Pending] = {}
+        # Files taken off the pending list whose write has not finished yet
+        self._flushing: Set[Path] = set()
+        self._condition = threading.Condition()
+        # Serialises flushes so the thread and explicit flushes never interleave
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def schedule(self, file_path: Path):
+        """Record an unflushed change to file_path."""
+        with self._condition:
+            pending = self._pending.get(file_path)
+            if pending is None:
+                pending = self._pending[file_path] = _Pending()
+            pending.count += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="write-behind-flusher", daemon=True
+                )
+                self._thread.start()
+            # notify_all: flush() callers wait on the same condition
+            self._condition.notify_all()
+
+    def is_dirty(self, file_path: Path) -> bool:
+        """Check whether file_path has unflushed changes."""
+        with self._condition:
+            return file_path in self._pending or file_path in self._flushing
+
+    def flush(self, file_path: Optional[Path] = None):
+        """Write out unflushed changes now.
+
+        Writes the background thread already started are waited for, so every
+        change made before the call is on disk when it returns.
+
+        Args:
+            file_path: Data file to flush, or None to flush every dirty file
+        """
+        with self._condition:
+            while self._flushing if file_path is None else file_path in self._flushing:
+                self._condition.wait()
+            if file_path is None:
+                due = list(self._pending)
+            elif file_path in self._pending:
+                due = [file_path]
+            else:
+                due = []
+            for path in due:
+                del self._pending[path]
+            self._flushing.update(due)
+        self._write(due)
+
+    def stop(self):
+        """Flush everything and stop the background thread."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self.flush()
+
+    def _write(self, file_paths: List[Path]):
+        written = 0
+        try:
+            with self._flush_lock:
+                for file_path in file_paths:
+                    self._flush(file_path)
+                    written += 1
+        finally:
+            with self._condition:
+                self._flushing.difference_update(file_paths)
+                # Keep failed changes dirty so the next flush retries them
+                for file_path in file_paths[written:]:
+                    self._pending.setdefault(file_path, _Pending()).count += 1
+                self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                due = [
+                    path for path, pending in self._pending.items()
+                    if pending.count >= self.batch_size or now - pending.since >= self.latency
+                ]
+                if not due:
+                    timeout = None
+                    if self._pending:
+                        oldest = min(p.since for p in self._pending.values())
+                        timeout = max(oldest + self.latency - now, 0)
+                    self._condition.wait(timeout)
+                    continue
+                for path in due:
+                    del self._pending[path]
+                self._flushing.update(due)
+            try:
+                self._write(due)
+            except Exception:
+                logger.exception("Write-behind flush failed")
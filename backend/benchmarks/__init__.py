@@ -0,0 +1,4 @@
+"""Benchmark suite for the API: synthetic datasets, in-process load and baseline comparison.
+
+Run ``python -m benchmarks --help`` from the backend directory.
+"""
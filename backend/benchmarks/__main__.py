@@ -0,0 +1,128 @@
+"""Benchmark every API endpoint against synthetic datasets.
+
+Usage (from the backend directory):
+
+    python -m benchmarks                                   # 1k, 10k and 100k needs
+    python -m benchmarks --sizes 1000 --iterations 50 --output results.json
+    python -m benchmarks --baseline baseline.json          # exit 1 on regressions
+    python -m benchmarks --list                            # benchmarked operations
+
+Each dataset size runs in its own process so peak RSS and caches are not
+shared between sizes. Data is written to a temporary workspace, never to
+data.json. The storage backend and mode come from the usual environment
+variables (STORAGE_BACKEND, STORAGE_MODE, WRITE_BEHIND).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+RESULTS_VERSION = 1
+
+
+def _run_size(args) -> int:
+    """Benchmark one size in this process and print its results as JSON."""
+    # Settings are read on import, so point the app at scratch directories first
+    scratch = tempfile.mkdtemp(prefix="userneeds-benchmark-")
+    os.environ["WORKSPACES_DIR"] = str(Path(scratch) / "workspaces")
+    os.environ["DEMO_STORAGE_DIR"] = str(Path(scratch) / "demo-storage")
+    from .runner import run_size
+
+    only = args.only.split(",") if args.only else None
+    result = asyncio.run(run_size(args.only_size, args.iterations, args.concurrency, args.seed, only))
+    print(json.dumps(result))
+    return 0
+
+
+def _environment(args) -> dict:
+    from app.config import settings
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "storageBackend": settings.storage_backend,
+        "storageMode": settings.storage_mode,
+        "writeBehind": settings.write_behind,
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated numbers of user needs")
+    parser.add_argument("--iterations", type=int, default=200, help="requests per operation")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent requests for read operations")
+    parser.add_argument("--seed", type=int, default=0, help="dataset random seed")
+    parser.add_argument("--only", help="comma-separated operation names to run")
+    parser.add_argument("--output", type=Path, help="write results JSON to this file")
+    parser.add_argument("--baseline", type=Path, help="compare against these results")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change that counts as a regression")
+    parser.add_argument("--list", action="store_true", help="list the benchmarked operations and exit")
+    parser.add_argument("--only-size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.only_size is not None:
+        return _run_size(args)
+
+    if args.list:
+        from .operations import describe, operations
+        print(describe(operations()))
+        return 0
+
+    results = {
+        "version": RESULTS_VERSION,
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "environment": _environment(args),
+        "sizes": {},
+    }
+    for size in (int(size) for size in args.sizes.split(",")):
+        print(f"Benchmarking {size} needs...", file=sys.stderr)
+        command = [
+            sys.executable, "-m", "benchmarks", "--only-size", str(size),
+            "--iterations", str(args.iterations), "--concurrency", str(args.concurrency), "--seed", str(args.seed),
+        ]
+        if args.only:
+            command += ["--only", args.only]
+        completed = subprocess.run(command, stdout=subprocess.PIPE, text=True, cwd=Path(__file__).parent.parent)
+        if completed.returncode != 0:
+            print(f"Benchmark of {size} needs failed", file=sys.stderr)
+            return completed.returncode
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results["sizes"][str(size)] = result
+
+        for name, op in result["operations"].items():
+            latency = op["latencyMs"]
+            errors = f"  {op['errors']} errors" if op["errors"] else ""
+            print(
+                f"  {name:28} p50 {latency['p50']:>9.2f} ms  p99 {latency['p99']:>9.2f} ms  "
+                f"{op['throughput']:>8.1f} req/s{errors}",
+                file=sys.stderr
+            )
+        if result["uncovered"]:
+            print(f"  Not benchmarked: {', '.join(result['uncovered'])}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        from .report import compare, load
+        regressions = compare(results, load(args.baseline), args.threshold, out=sys.stderr)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s)", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
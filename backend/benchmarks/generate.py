@@ -0,0 +1,180 @@
+"""Synthetic datasets in the data.template.json format.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.generate 10000 bench-10k.json
+    python -m benchmarks.generate 100000 bench-100k.json --seed 7
+
+Reference collections grow with the number of needs (user groups with
+needs / 250, entities with its square root). Entities are picked with a
+skewed (Zipf-like) distribution so a few of them are shared by many needs,
+and a share of needs carries SLAs, constraints and fromState/toState
+transitions along an entity lifecycle.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+from pathlib import Path
+from typing import List
+
+from app.id_allocator import format_need_id
+from app.models import DataStore, Entity, UserGroup, UserNeed, UserSuperGroup, WorkflowPhase
+
+SUPER_GROUPS = [
+    ("tenant", "Tenant", "TEN"),
+    ("owner", "Property Owner", "OWN"),
+    ("staff", "Staff", "STF"),
+    ("partner", "Partner", "PRT"),
+    ("visitor", "Visitor", "VIS"),
+]
+
+PHASES = [
+    "discovery", "onboarding", "search", "application", "verification", "agreement",
+    "payment", "move_in", "occupancy", "maintenance", "renewal", "move_out",
+]
+
+# Lifecycle states; transitions go to the next state or branch to a terminal one
+STATES = ["draft", "submitted", "under_review", "approved", "active", "suspended", "closed", "archived"]
+TERMINAL_STATES = ["rejected", "cancelled", "expired"]
+
+VERBS = [
+    "search", "filter", "submit", "review", "approve", "schedule", "pay", "sign", "upload", "verify",
+    "track", "cancel", "renew", "report", "export", "notify", "compare", "assign", "archive", "request",
+]
+ADJECTIVES = [
+    "available", "pending", "monthly", "shared", "urgent", "digital", "recurring", "draft", "verified",
+    "overdue", "secure", "detailed", "flexible", "local", "annual",
+]
+NOUNS = [
+    "listing", "application", "viewing", "deposit", "lease", "invoice", "inspection", "repair", "contract",
+    "reference", "document", "message", "payment", "inventory", "key", "meter", "reminder", "dispute",
+]
+FILLER = [
+    "so that", "they", "can", "without", "delays", "and", "keep", "a", "record", "of", "every", "change",
+    "with", "clear", "status", "updates", "from", "the", "portal", "on", "mobile", "or", "desktop",
+]
+CONSTRAINTS = [
+    "Must complete within {n} minutes",
+    "Requires identity verification",
+    "Only available to verified accounts",
+    "Limited to {n} requests per day",
+    "Must be accessible (WCAG 2.1 AA)",
+    "Audit trail retained for {n} years",
+    "Works offline for up to {n} hours",
+]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    parts = [rng.choice(VERBS), rng.choice(ADJECTIVES), rng.choice(NOUNS)]
+    parts += rng.choices(FILLER + NOUNS + ADJECTIVES, k=max(0, words - 3))
+    return " ".join(parts).capitalize()
+
+
+def generate_dataset(needs: int, seed: int = 0) -> DataStore:
+    """Generate a reproducible dataset with the given number of user needs.
+
+    Args:
+        needs: Number of user needs
+        seed: Random seed; the same arguments always give the same dataset
+
+    Returns:
+        DataStore whose references are all valid
+    """
+    rng = random.Random(seed)
+
+    super_groups = [UserSuperGroup(id=i, name=name, prefix=prefix) for i, name, prefix in SUPER_GROUPS]
+    user_groups = []
+    for i in range(max(6, needs // 250)):
+        super_group = super_groups[i % len(super_groups)]
+        user_groups.append(UserGroup(
+            id=f"{super_group.id}_group_{i:04d}",
+            name=f"{super_group.name} Group {i}",
+            description=_sentence(rng, 8) if rng.random() < 0.5 else None,
+            superGroup=super_group.id,
+        ))
+    entities = [
+        Entity(id=f"entity_{i:04d}", name=f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS).title()} {i}")
+        for i in range(max(10, int(math.sqrt(needs))))
+    ]
+    phases = [
+        WorkflowPhase(id=phase, name=phase.replace("_", " ").title(), order=order)
+        for order, phase in enumerate(PHASES, start=1)
+    ]
+
+    # Zipf-like popularity: a few entities appear in many needs
+    entity_weights = [1 / (rank + 1) ** 0.8 for rank in range(len(entities))]
+    prefixes = {super_group.id: super_group.prefix for super_group in super_groups}
+    numbers = {s.prefix: 0 for s in super_groups}
+
+    user_needs: List[UserNeed] = []
+    for _ in range(needs):
+        group = rng.choice(user_groups)
+        prefix = prefixes[group.superGroup]
+        numbers[prefix] += 1
+        fan_out = rng.choices([1, 2, 3, 4, 5], weights=[45, 30, 15, 7, 3])[0]
+        need_entities = list(dict.fromkeys(
+            entity.id for entity in rng.choices(entities, weights=entity_weights, k=fan_out)
+        ))
+
+        need = dict(
+            id=format_need_id(prefix, numbers[prefix]),
+            userGroupId=group.id,
+            title=_sentence(rng, rng.randint(3, 6)),
+            description=_sentence(rng, rng.randint(12, 30)),
+            entities=need_entities,
+            workflowPhase=rng.choice(phases).id,
+            refined=rng.random() < 0.4,
+        )
+        if rng.random() < 0.25:
+            start = rng.randrange(len(STATES) - 1)
+            to_state = rng.choice(TERMINAL_STATES) if rng.random() < 0.2 else STATES[start + 1]
+            need.update(triggersStateChange=True, fromState=STATES[start], toState=to_state)
+        if rng.random() < 0.2:
+            need["sla"] = f"{rng.choice([1, 4, 24, 48, 72])} hours"
+        if rng.random() < 0.3:
+            need["constraints"] = [
+                template.format(n=rng.randint(2, 90)) for template in rng.sample(CONSTRAINTS, rng.randint(1, 3))
+            ]
+        if rng.random() < 0.1:
+            need["optional"] = True
+        if rng.random() < 0.05:
+            need["futureFeature"] = True
+        user_needs.append(UserNeed(**need))
+
+    return DataStore(
+        userSuperGroups=super_groups,
+        userGroups=user_groups,
+        entities=entities,
+        workflowPhases=phases,
+        userNeeds=user_needs,
+    )
+
+
+def write_dataset(data: DataStore, path: Path):
+    """Write a dataset in the data.json format."""
+    with open(path, 'w') as f:
+        json.dump(data.model_dump(), f, indent=2)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("needs", type=int, help="number of user needs")
+    parser.add_argument("output", type=Path, help="data file to write")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args(argv)
+
+    data = generate_dataset(args.needs, args.seed)
+    write_dataset(data, args.output)
+    print(
+        f"Wrote {args.output}: {len(data.userSuperGroups)} super groups, {len(data.userGroups)} user groups, "
+        f"{len(data.entities)} entities, {len(data.workflowPhases)} workflow phases, "
+        f"{len(data.userNeeds)} user needs"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""The benchmarked operations: one or more requests per API endpoint.
+
+Operations run in list order against the same dataset, reads first. Write
+operations undo their own changes where the API allows it (created needs
+are updated and then deleted, batches create and delete in one request,
+imports are dry runs) so every operation sees a dataset of the same size.
+"""
+
+import itertools
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from app.models import DataStore
+
+# (method, path, httpx request keyword arguments)
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+class Context:
+    """IDs of the benchmark dataset that operations build their requests from."""
+
+    def __init__(self, data: DataStore):
+        self.need_ids = [need.id for need in data.userNeeds]
+        self.user_groups = data.userGroups
+        self.super_groups = data.userSuperGroups
+        self.entity_ids = [entity.id for entity in data.entities]
+        self.phase_ids = [phase.id for phase in data.workflowPhases]
+        self.sample_need = data.userNeeds[0].model_dump()
+        # Filled in before the write operations run
+        self.export: bytes = b""
+        self._unique = itertools.count()
+
+    def pick(self, items: list, i: int):
+        """Spread requests over the dataset (a stride coprime with most sizes)."""
+        return items[(i * 7919) % len(items)]
+
+    def unique(self) -> int:
+        return next(self._unique)
+
+    def need(self, need_id: str, user_group: Optional[str] = None) -> dict:
+        """A valid need body based on the dataset's first need."""
+        return {**self.sample_need, "id": need_id, "userGroupId": user_group or self.sample_need["userGroupId"]}
+
+
+class Operation(NamedTuple):
+    """A benchmarked request.
+
+    build returns the i-th request; expect lists the status codes that count
+    as success. heavy operations run a twentieth of the iterations. stream
+    operations are timed to their first response body chunk (for endless
+    Server-Sent Events streams).
+    """
+    name: str
+    route: Tuple[str, str]
+    build: Callable[[Context, int], Request]
+    expect: Tuple[int, ...] = (200,)
+    heavy: bool = False
+    stream: bool = False
+
+
+def _created_need_id(i: int) -> str:
+    return f"BEN-{i:06d}"
+
+
+def _batch(ctx: Context, i: int) -> Request:
+    ids = [f"BAT-{ctx.unique():06d}" for _ in range(5)]
+    operations = [{"op": "create", "need": ctx.need(need_id)} for need_id in ids]
+    operations += [{"op": "update", "id": need_id, "need": {"refined": True}} for need_id in ids]
+    operations += [{"op": "delete", "id": need_id} for need_id in ids]
+    return "POST", "/api/user-needs/batch", {"json": {"operations": operations}}
+
+
+def operations() -> List[Operation]:
+    """Build the operation list, in run order."""
+    return [
+        # Reads
+        Operation("root", ("GET", "/"), lambda ctx, i: ("GET", "/", {})),
+        Operation("check-setup", ("GET", "/api/check-setup"), lambda ctx, i: ("GET", "/api/check-setup", {})),
+        Operation("demo-mode.get", ("GET", "/api/demo-mode"), lambda ctx, i: ("GET", "/api/demo-mode", {})),
+        Operation("workspaces.list", ("GET", "/api/workspaces"), lambda ctx, i: ("GET", "/api/workspaces", {})),
+        Operation("user-super-groups.list", ("GET", "/api/user-super-groups"),
+                  lambda ctx, i: ("GET", "/api/user-super-groups", {})),
+        Operation("user-groups.list", ("GET", "/api/user-groups"), lambda ctx, i: ("GET", "/api/user-groups", {})),
+        Operation("entities.list", ("GET", "/api/entities"), lambda ctx, i: ("GET", "/api/entities", {})),
+        Operation("workflow-phases.list", ("GET", "/api/workflow-phases"),
+                  lambda ctx, i: ("GET", "/api/workflow-phases", {})),
+        Operation("user-needs.list", ("GET", "/api/user-needs"),
+                  lambda ctx, i: ("GET", "/api/user-needs", {}), heavy=True),
+        Operation("user-needs.list.filtered", ("GET", "/api/user-needs"),
+                  lambda ctx, i: ("GET", "/api/user-needs", {"params": {
+                      "userGroupId": ctx.pick(ctx.user_groups, i).id, "refined": "needsRefinement"
+                  }})),
+        Operation("user-needs.list.superGroup", ("GET", "/api/user-needs"),
+                  lambda ctx, i: ("GET", "/api/user-needs", {"params": {
+                      "superGroup": ctx.pick(ctx.super_groups, i).id, "entity": ctx.pick(ctx.entity_ids, i)
+                  }})),
+        Operation("user-needs.page", ("GET", "/api/user-needs"),
+                  lambda ctx, i: ("GET", "/api/user-needs", {"params": {
+                      "limit": 50, "sort": "workflowPhase", "fields": "id,title,workflowPhase",
+                      "workflowPhase": ctx.pick(ctx.phase_ids, i)
+                  }})),
+        Operation("user-needs.get", ("GET", "/api/user-needs/{need_id}"),
+                  lambda ctx, i: ("GET", f"/api/user-needs/{ctx.pick(ctx.need_ids, i)}", {})),
+        Operation("user-needs.search", ("GET", "/api/user-needs/search"),
+                  lambda ctx, i: ("GET", "/api/user-needs/search", {"params": {
+                      "q": ["overdue deposit", "sign lease", "verif", "repair request", "monthly pay"][i % 5]
+                  }})),
+        Operation("user-groups.next-id", ("GET", "/api/user-groups/next-id/{user_group_id}"),
+                  lambda ctx, i: ("GET", f"/api/user-groups/next-id/{ctx.pick(ctx.user_groups, i).id}", {})),
+        Operation("statistics", ("GET", "/api/statistics"), lambda ctx, i: ("GET", "/api/statistics", {})),
+        Operation("statistics.pivot", ("GET", "/api/statistics/pivot"),
+                  lambda ctx, i: ("GET", "/api/statistics/pivot", {"params": [
+                      {"rows": "userGroup", "cols": "workflowPhase"},
+                      {"rows": "entity", "cols": "workflowPhase", "split": "refined"},
+                      {"rows": "superGroup", "cols": "futureFeature"},
+                  ][i % 3]})),
+        Operation("graph", ("GET", "/api/graph"),
+                  lambda ctx, i: ("GET", "/api/graph", {"params": {"superGroup": ctx.pick(ctx.super_groups, i).id}}),
+                  heavy=True),
+        Operation("graph.layout", ("GET", "/api/graph"),
+                  lambda ctx, i: ("GET", "/api/graph", {"params": {
+                      "layout": "true", "userGroupId": ctx.pick(ctx.user_groups, i).id
+                  }}), heavy=True),
+        Operation("integrity", ("GET", "/api/integrity"), lambda ctx, i: ("GET", "/api/integrity", {}), heavy=True),
+        Operation("export", ("GET", "/api/export"), lambda ctx, i: ("GET", "/api/export", {}), heavy=True),
+        Operation("cache-stats", ("GET", "/api/cache-stats"), lambda ctx, i: ("GET", "/api/cache-stats", {})),
+        Operation("metrics", ("GET", "/metrics"), lambda ctx, i: ("GET", "/metrics", {})),
+        Operation("history.list", ("GET", "/api/history"), lambda ctx, i: ("GET", "/api/history", {})),
+        Operation("history.diff", ("GET", "/api/history/diff"),
+                  lambda ctx, i: ("GET", "/api/history/diff", {"params": {"from": 0}})),
+        Operation("user-needs.as-of", ("GET", "/api/user-needs"),
+                  lambda ctx, i: ("GET", "/api/user-needs", {"params": {
+                      "asOf": 0, "limit": 50, "workflowPhase": ctx.pick(ctx.phase_ids, i)
+                  }})),
+        Operation("changes.stream", ("GET", "/api/changes"),
+                  lambda ctx, i: ("GET", "/api/changes", {"headers": {"Last-Event-ID": "benchmark-0"}}),
+                  stream=True),
+
+        # Writes
+        Operation("user-needs.create", ("POST", "/api/user-needs"),
+                  lambda ctx, i: ("POST", "/api/user-needs", {"json": ctx.need(_created_need_id(i))})),
+        Operation("user-needs.update", ("PUT", "/api/user-needs/{need_id}"),
+                  lambda ctx, i: ("PUT", f"/api/user-needs/{_created_need_id(i)}", {"json": {
+                      "title": f"Updated benchmark need {i}", "refined": True
+                  }})),
+        Operation("user-needs.delete", ("DELETE", "/api/user-needs/{need_id}"),
+                  lambda ctx, i: ("DELETE", f"/api/user-needs/{_created_need_id(i)}", {})),
+        Operation("user-needs.batch", ("POST", "/api/user-needs/batch"), _batch),
+        Operation("user-groups.reserve", ("POST", "/api/user-groups/next-id/{user_group_id}/reserve"),
+                  lambda ctx, i: ("POST", f"/api/user-groups/next-id/{ctx.pick(ctx.user_groups, i).id}/reserve",
+                                  {"params": {"count": 10}})),
+        Operation("user-groups.create", ("POST", "/api/user-groups"),
+                  lambda ctx, i: ("POST", "/api/user-groups", {"json": {
+                      "id": f"benchmark_group_{ctx.unique()}", "name": "Benchmark group",
+                      "superGroup": ctx.pick(ctx.super_groups, i).id
+                  }})),
+        Operation("user-super-groups.create", ("POST", "/api/user-super-groups"),
+                  lambda ctx, i: ("POST", "/api/user-super-groups", {"json": {
+                      "id": f"bench_{i}", "name": "Benchmark", "prefix": f"B{i}"
+                  }})),
+        Operation("user-super-groups.update", ("PUT", "/api/user-super-groups/{super_group_id}"),
+                  lambda ctx, i: ("PUT", f"/api/user-super-groups/bench_{i}", {"json": {
+                      "id": f"bench_{i}_renamed", "name": "Benchmark renamed", "prefix": f"B{i}"
+                  }})),
+        Operation("user-super-groups.delete", ("DELETE", "/api/user-super-groups/{super_group_id}"),
+                  lambda ctx, i: ("DELETE", f"/api/user-super-groups/bench_{i}_renamed", {})),
+        Operation("import.dry-run", ("POST", "/api/import"),
+                  lambda ctx, i: ("POST", "/api/import", {
+                      "params": {"dryRun": "true"}, "content": ctx.export,
+                      "headers": {"Content-Type": "application/x-ndjson"}
+                  }), heavy=True),
+        Operation("flush", ("POST", "/api/flush"), lambda ctx, i: ("POST", "/api/flush", {})),
+        Operation("workspaces.create", ("POST", "/api/workspaces"),
+                  lambda ctx, i: ("POST", "/api/workspaces", {"json": {"name": f"benchmark-extra-{ctx.unique()}"}}),
+                  expect=(201,)),
+        Operation("demo-mode.set", ("POST", "/api/demo-mode"),
+                  lambda ctx, i: ("POST", "/api/demo-mode", {"json": {"enabled": False}})),
+    ]
+
+
+def describe(ops: List[Operation]) -> str:
+    """One line per operation, for --list."""
+    return "\n".join(f"{op.name:28} {op.route[0]:6} {op.route[1]}" for op in ops)
@@ -0,0 +1,114 @@
+"""Compare benchmark results against a stored baseline.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.report results.json baseline.json --threshold 0.1
+
+Exits with status 1 if any metric regressed by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# (label, path into an operation's results, True if higher values are worse)
+METRICS: List[Tuple[str, Tuple[str, ...], bool]] = [
+    ("p50 ms", ("latencyMs", "p50"), True),
+    ("p99 ms", ("latencyMs", "p99"), True),
+    ("req/s", ("throughput",), False),
+    ("bytes/op", ("bytesWrittenPerOp",), True),
+]
+
+# Latencies below this many milliseconds are too noisy to compare relatively
+MIN_LATENCY_MS = 0.5
+
+
+def load(path: Path) -> dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _lookup(results: dict, path: Tuple[str, ...]) -> Optional[float]:
+    for key in path:
+        if not isinstance(results, dict) or key not in results:
+            return None
+        results = results[key]
+    return results
+
+
+def _change(current: Optional[float], baseline: Optional[float]) -> Optional[float]:
+    if current is None or baseline is None:
+        return None
+    if baseline == 0:
+        return 0.0 if current == 0 else float("inf")
+    return (current - baseline) / baseline
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.1, out=sys.stdout) -> List[str]:
+    """Print a comparison table and list the regressions beyond the threshold.
+
+    Args:
+        current: Results of benchmarks.__main__
+        baseline: Earlier results to compare against
+        threshold: Relative change that counts as a regression (0.1 = 10%)
+        out: Stream the table is printed to
+
+    Returns:
+        One description per regressed metric
+    """
+    regressions = []
+    for size, results in current["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if base is None:
+            print(f"\n{size} needs: no baseline", file=out)
+            continue
+
+        print(f"\n{size} needs", file=out)
+        print(f"{'operation':28} {'metric':9} {'baseline':>12} {'current':>12} {'change':>9}", file=out)
+        rows = [(name, op, base["operations"].get(name)) for name, op in results["operations"].items()]
+        rows.append(("(process)", {"loadSeconds": results["dataset"].get("loadSeconds"),
+                                   "peakRssMiB": results.get("peakRssMiB")},
+                     {"loadSeconds": base["dataset"].get("loadSeconds"), "peakRssMiB": base.get("peakRssMiB")}))
+        for name, op, base_op in rows:
+            if base_op is None:
+                print(f"{name:28} (new operation)", file=out)
+                continue
+            metrics = METRICS if name != "(process)" else [
+                ("load s", ("loadSeconds",), True), ("RSS MiB", ("peakRssMiB",), True)
+            ]
+            for label, path, higher_is_worse in metrics:
+                value, base_value = _lookup(op, path), _lookup(base_op, path)
+                change = _change(value, base_value)
+                if change is None:
+                    continue
+                worse = change > threshold if higher_is_worse else change < -threshold
+                if worse and path[0] == "latencyMs" and max(value, base_value) < MIN_LATENCY_MS:
+                    worse = False
+                flag = "  REGRESSION" if worse else ""
+                print(f"{name:28} {label:9} {base_value:>12} {value:>12} {change:>+8.1%}{flag}", file=out)
+                if worse:
+                    regressions.append(f"{size} needs {name} {label}: {base_value} -> {value} ({change:+.1%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("current", type=Path, help="results to check")
+    parser.add_argument("baseline", type=Path, help="baseline results")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change that counts as a regression")
+    args = parser.parse_args(argv)
+
+    regressions = compare(load(args.current), load(args.baseline), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""Drive the ASGI app from main.py in-process and measure each operation.
+
+Import this module only after WORKSPACES_DIR points at a scratch directory
+(see benchmarks.__main__): the benchmark dataset is a workspace there, so
+the real data files are never touched.
+"""
+
+import asyncio
+import itertools
+import resource
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi.routing import APIRoute
+
+from app.config import WORKSPACES_DIR
+from app.database import shutdown_storage
+from app.state import app_state
+from main import app
+
+from .generate import generate_dataset, write_dataset
+from .operations import Context, Operation, operations
+
+WORKSPACE = "benchmark"
+HEADERS = {"X-Workspace": WORKSPACE}
+
+# Stream operations give up waiting for their first chunk after this many seconds
+STREAM_TIMEOUT = 10.0
+
+
+def written_bytes() -> Optional[int]:
+    """Bytes this process has passed to write() so far (Linux only, else None)."""
+    try:
+        with open("/proc/self/io", 'r') as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mib() -> float:
+    """Peak resident set size of this process, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linearly interpolated percentile (0 <= q <= 100) of sorted values."""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def uncovered_routes(ops: List[Operation]) -> List[str]:
+    """List the app's routes that no operation exercises."""
+    covered = {op.route for op in ops}
+    missing = []
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            for method in sorted(route.methods):
+                if (method, route.path) not in covered:
+                    missing.append(f"{method} {route.path}")
+    return missing
+
+
+async def _first_chunk(path: str, headers: Dict[str, str]) -> int:
+    """Open a streaming GET directly over ASGI, wait for its first body chunk and disconnect.
+
+    Returns:
+        The response status code
+    """
+    status = 0
+    first_chunk = asyncio.Event()
+    disconnected = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            first_chunk.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+    }
+    task = asyncio.create_task(app(scope, receive, send))
+    try:
+        await asyncio.wait_for(first_chunk.wait(), STREAM_TIMEOUT)
+    finally:
+        disconnected.set()
+        try:
+            await asyncio.wait_for(task, 1.0)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            task.cancel()
+    return status
+
+
+async def run_operation(client: httpx.AsyncClient, ctx: Context, op: Operation,
+                        iterations: int, concurrency: int) -> dict:
+    """Run one operation and summarise its latency, throughput and writes.
+
+    Only GET operations run concurrently; writes run one at a time so that
+    e.g. the update of a need never overtakes its creation.
+    """
+    count = max(5, iterations // 20) if op.heavy else iterations
+    workers = min(concurrency, count) if op.route[0] == "GET" else 1
+    indexes = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for i in indexes:
+            if i >= count:
+                return
+            method, path, kwargs = op.build(ctx, i)
+            start = time.perf_counter()
+            if op.stream:
+                status = await _first_chunk(path, {**HEADERS, **kwargs.get("headers", {})})
+            else:
+                status = (await client.request(method, path, **kwargs)).status_code
+            latencies.append(time.perf_counter() - start)
+            if status not in op.expect:
+                errors += 1
+
+    written_before = written_bytes()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    elapsed = time.perf_counter() - start
+    # Attribute buffered (write-behind) writes to the operation that made them
+    await client.post("/api/flush")
+    written_after = written_bytes()
+
+    latencies.sort()
+    return {
+        "method": op.route[0],
+        "path": op.route[1],
+        "iterations": count,
+        "concurrency": workers,
+        "errors": errors,
+        "latencyMs": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p90": round(percentile(latencies, 90) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3),
+        },
+        "throughput": round(count / elapsed, 1),
+        "bytesWrittenPerOp": (
+            round((written_after - written_before) / count) if written_before is not None else None
+        ),
+        "peakRssMiB": round(peak_rss_mib(), 1),
+    }
+
+
+async def run_size(needs: int, iterations: int, concurrency: int, seed: int = 0,
+                   only: Optional[List[str]] = None) -> dict:
+    """Benchmark every operation against a generated dataset of the given size.
+
+    Args:
+        needs: Number of user needs in the dataset
+        iterations: Requests per operation (heavy operations run fewer)
+        concurrency: Concurrent requests for read operations
+        seed: Dataset random seed
+        only: Run only the operations with these names
+
+    Returns:
+        The dataset summary and the results per operation name
+    """
+    start = time.perf_counter()
+    data = generate_dataset(needs, seed)
+    data_file = WORKSPACES_DIR / WORKSPACE / "data.json"
+    data_file.parent.mkdir(parents=True, exist_ok=True)
+    write_dataset(data, data_file)
+    generate_seconds = time.perf_counter() - start
+
+    if not app_state.locked:
+        app_state.demo_mode = False
+    ops = operations()
+    result = {
+        "dataset": {
+            "needs": needs,
+            "seed": seed,
+            "bytes": data_file.stat().st_size,
+            "generateSeconds": round(generate_seconds, 3),
+        },
+        "uncovered": uncovered_routes(ops),
+        "operations": {},
+    }
+    ctx = Context(data)
+    del data
+
+    # Count server errors against the operation instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver", headers=HEADERS) as client:
+        # The first request parses and indexes the data file
+        start = time.perf_counter()
+        (await client.get("/api/user-needs/search", params={"q": "lease"})).raise_for_status()
+        result["dataset"]["loadSeconds"] = round(time.perf_counter() - start, 3)
+        ctx.export = (await client.get("/api/export")).content
+
+        for op in ops:
+            if only and op.name not in only:
+                continue
+            result["operations"][op.name] = await run_operation(client, ctx, op, iterations, concurrency)
+
+    shutdown_storage()
+    result["peakRssMiB"] = round(peak_rss_mib(), 1)
+    return result
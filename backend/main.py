@@ -1,18 +1,42 @@
 """User Needs Management API - Main application."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import CORS_ORIGINS
-from app.routers import user_needs, user_groups, user_super_groups, metadata, setup, demo_mode
+from app.database import shutdown_storage
+from app.metrics import MetricsMiddleware
+from app.sandbox import DemoSessionMiddleware
+from app.workspaces import WorkspaceMiddleware
+from app.routers import user_needs, user_groups, user_super_groups, metadata, setup, demo_mode, transfer, graph, changes, workspaces, metrics, history
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan: flush buffered writes on shutdown."""
+    yield
+    shutdown_storage()
+
 
 # Create FastAPI application
 app = FastAPI(
     title="User Needs Management API",
     description="API for managing user needs, groups, entities, and workflow phases",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
+# Time each request by route (added first so it runs innermost and sees the
+# matched route)
+app.add_middleware(MetricsMiddleware)
+
+# Select the workspace and demo session of each request (added before CORS
+# so CORS stays outermost)
+app.add_middleware(WorkspaceMiddleware)
+app.add_middleware(DemoSessionMiddleware)
+
 # Enable CORS for local development
 app.add_middleware(
     CORSMiddleware,
@@ -20,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
 )
 
 # Include routers
@@ -29,6 +54,12 @@ app.include_router(user_needs.router)
 app.include_router(user_groups.router)
 app.include_router(metadata.router)
 app.include_router(setup.router)
+app.include_router(transfer.router)
+app.include_router(graph.router)
+app.include_router(changes.router)
+app.include_router(workspaces.router)
+app.include_router(metrics.router)
+app.include_router(history.router)
 
 
 @app.get("/")
@@ -0,0 +1,111 @@
+"""Shared fixtures: every test runs against its own copy of the example dataset."""
+
+import asyncio
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List
+
+# app.config creates these directories on import; keep them out of the source tree
+os.environ.setdefault("DEMO_STORAGE_DIR", tempfile.mkdtemp(prefix="userneeds-demo-"))
+os.environ.setdefault("WORKSPACES_DIR", tempfile.mkdtemp(prefix="userneeds-workspaces-"))
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database, sqlite_backend, workspaces
+from app.journal import JournalCompactor
+from app.response_cache import response_cache
+from app.state import app_state
+from app.write_behind import WriteBehindFlusher
+
+REPO_DIR = Path(__file__).resolve().parent.parent.parent
+EXAMPLE_DATA = REPO_DIR / "data.example.json"
+TEMPLATE_DATA = REPO_DIR / "data.template.json"
+
+STORAGE_BACKENDS = ["json", "sqlite"]
+
+
+def pytest_generate_tests(metafunc):
+    # Tests marked all_backends run once per storage backend
+    if metafunc.definition.get_closest_marker("all_backends") and "storage_backend" in metafunc.fixturenames:
+        metafunc.parametrize("storage_backend", STORAGE_BACKENDS, indirect=True)
+
+
+@pytest.fixture
+def storage_backend(request) -> str:
+    """STORAGE_BACKEND of the test: "json" unless parametrised."""
+    return getattr(request, "param", "json")
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch, storage_backend) -> Path:
+    """Point the storage backend at a fresh copy of the example data, in file storage mode.
+
+    The SQLite backend seeds its database from this copy on first use. Tests
+    change the storage settings by patching app.database (STORAGE_MODE,
+    WRITE_BEHIND, HISTORY_ENABLED) before the first read.
+    """
+    path = tmp_path / "data.json"
+    shutil.copy(EXAMPLE_DATA, path)
+    shutil.copy(EXAMPLE_DATA, tmp_path / "data.example.json")
+    shutil.copy(TEMPLATE_DATA, tmp_path / "data.template.json")
+    for module in (database, sqlite_backend):
+        monkeypatch.setattr(module, "DATA_FILE", path)
+        monkeypatch.setattr(module, "EXAMPLE_DATA_FILE", tmp_path / "data.example.json")
+        monkeypatch.setattr(module, "TEMPLATE_DATA_FILE", tmp_path / "data.template.json")
+        monkeypatch.setattr(module, "WORKSPACES_DIR", tmp_path / "workspaces")
+    monkeypatch.setattr(database, "DEMO_DATA_FILE", tmp_path / "data.demomode.json")
+    monkeypatch.setattr(sqlite_backend, "SQLITE_DATA_FILE", tmp_path / "data.db")
+    monkeypatch.setattr(sqlite_backend, "SQLITE_DEMO_DATA_FILE", tmp_path / "data.demomode.db")
+    monkeypatch.setattr(workspaces, "WORKSPACES_DIR", tmp_path / "workspaces")
+    monkeypatch.setattr(database, "STORAGE_BACKEND", storage_backend)
+    monkeypatch.setattr(database, "STORAGE_MODE", "file")
+    monkeypatch.setattr(database, "WRITE_BEHIND", False)
+    monkeypatch.setattr(database, "HISTORY_ENABLED", False)
+
+    # Storage state is per process; start from nothing
+    monkeypatch.setattr(database, "data_cache", database.DataStoreCache())
+    monkeypatch.setattr(database, "_backends", OrderedDict())
+    monkeypatch.setattr(database, "_journals", {})
+    monkeypatch.setattr(database, "_histories", {})
+    monkeypatch.setattr(database, "compactor", JournalCompactor(threshold=500, interval=3600))
+    flusher = WriteBehindFlusher(database._flush_file, latency=0.05, batch_size=50)
+    monkeypatch.setattr(database, "write_behind", flusher)
+    monkeypatch.setattr(app_state, "_demo_mode", False)
+    response_cache.clear()
+    yield path
+    flusher.stop()
+    response_cache.clear()
+
+
+@pytest.fixture
+def backend(data_file) -> database.StorageBackend:
+    """Backend of the main dataset."""
+    return database.get_backend()
+
+
+@pytest.fixture
+def client(data_file) -> TestClient:
+    """Client of the API over the main dataset."""
+    from main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def concurrently(data_file) -> Callable[..., List[httpx.Response]]:
+    """Send requests at the same time, on one event loop, and return their responses.
+
+    Each request is a (method, url, keyword arguments for httpx) tuple.
+    """
+    from main import app
+
+    async def send(requests):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.request(method, url, **kwargs) for method, url, kwargs in requests))
+
+    return lambda requests: asyncio.run(send(requests))
@@ -0,0 +1,112 @@
+"""POST /api/user-needs/batch: several need writes applied all-or-nothing."""
+
+import pytest
+
+pytestmark = pytest.mark.all_backends
+
+NEED = {
+    "userGroupId": "landlord",
+    "title": "See rent arrears",
+    "description": "As a landlord I want to see arrears",
+    "entities": ["payment", "property_listing"],
+    "workflowPhase": "application",
+}
+
+
+def _batch(client, *operations):
+    return client.post("/api/user-needs/batch", json={"operations": list(operations)})
+
+
+def _needs(client) -> dict:
+    return {need["id"]: need for need in client.get("/api/user-needs").json()}
+
+
+def test_operations_apply_in_order(client):
+    before = _needs(client)
+    first, second = list(before)[:2]
+
+    response = _batch(
+        client,
+        {"op": "create", "need": {**NEED, "id": "BATCH-1"}},
+        {"op": "update", "id": "BATCH-1", "need": {"title": "Updated in the same batch"}},
+        {"op": "update", "id": first, "need": {"workflowPhase": "viewing"}},
+        {"op": "delete", "id": second},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["applied"] is True
+    assert [(r["index"], r["op"], r["id"], r["ok"]) for r in body["results"]] == [
+        (0, "create", "BATCH-1", True), (1, "update", "BATCH-1", True),
+        (2, "update", first, True), (3, "delete", second, True),
+    ]
+
+    after = _needs(client)
+    assert after["BATCH-1"]["title"] == "Updated in the same batch"
+    assert after[first]["workflowPhase"] == "viewing"
+    assert after[first]["title"] == before[first]["title"]
+    assert second not in after
+    assert len(after) == len(before)
+
+
+def test_an_invalid_operation_applies_nothing(client):
+    before = _needs(client)
+    etag = client.get("/api/user-needs").headers["ETag"]
+    first = next(iter(before))
+
+    response = _batch(
+        client,
+        {"op": "create", "need": {**NEED, "id": "BATCH-1"}},
+        {"op": "delete", "id": first},
+        {"op": "update", "id": "NOPE-999", "need": {"title": "Missing"}},
+        {"op": "create", "need": {**NEED, "id": first}},
+    )
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert detail["applied"] is False
+    assert [(r["ok"], r["error"]) for r in detail["results"]] == [
+        (True, None),
+        (True, None),
+        (False, "User need not found"),
+        # The ID is free again after the delete earlier in the batch
+        (True, None),
+    ]
+
+    assert _needs(client) == before
+    assert client.get("/api/user-needs", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_references_are_validated(client):
+    before = _needs(client)
+    first = next(iter(before))
+
+    response = _batch(
+        client,
+        {"op": "create", "need": {**NEED, "userGroupId": "nobody"}},
+        {"op": "update", "id": first, "need": {"workflowPhase": "nowhere"}},
+        {"op": "update", "id": first, "need": {"entities": ["payment", "no_such_entity"]}},
+    )
+    assert response.status_code == 400
+    results = response.json()["detail"]["results"]
+    assert [(r["ok"], r["error"]) for r in results] == [
+        (False, "Invalid userGroupId"),
+        (False, "Invalid workflowPhase"),
+        (False, "Invalid entity: no_such_entity"),
+    ]
+    assert _needs(client) == before
+
+
+def test_creates_without_an_id_are_allocated_distinct_ids(client):
+    before = _needs(client)
+
+    response = _batch(client, *[{"op": "create", "need": NEED} for _ in range(3)])
+    assert response.status_code == 200
+    ids = [result["id"] for result in response.json()["results"]]
+    assert len(set(ids)) == 3
+    assert not set(ids) & set(before)
+    assert all(need_id.startswith("OWN-") for need_id in ids)
+
+    after = _needs(client)
+    assert [after[need_id]["title"] for need_id in ids] == [NEED["title"]] * 3
+    # The next single create continues after them
+    created = client.post("/api/user-needs", json=NEED).json()
+    assert created["id"] not in ids
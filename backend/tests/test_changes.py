@@ -0,0 +1,76 @@
+"""GET /api/changes: change events, Last-Event-ID resume and resets.
+
+The stream never ends, so the tests drive its generator directly.
+"""
+
+import asyncio
+import json
+
+from app import database
+from app.config import settings
+from app.routers import changes as changes_router
+
+
+def _parse(frame: str) -> dict:
+    """Parse an SSE message into its fields, with data decoded."""
+    fields = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+    fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+def _read(last_event_id, count: int) -> list:
+    """Read the first count messages of a stream opened with last_event_id."""
+    async def read():
+        stream = changes_router._stream(last_event_id)
+        try:
+            return [await stream.__anext__() for _ in range(count)]
+        finally:
+            await stream.aclose()
+    return asyncio.run(read())
+
+
+def test_resume_replays_the_missed_events(client):
+    assert client.delete("/api/user-needs/PAT-001").status_code == 200
+    assert client.put("/api/user-needs/PAT-002", json={"title": "Renamed"}).status_code == 200
+    assert client.post("/api/user-needs/batch", json={"operations": [
+        {"op": "delete", "id": "CLI-001"}, {"op": "delete", "id": "CLI-002"}
+    ]}).status_code == 200
+    feed = database.get_backend().changes
+
+    frames = [_parse(frame) for frame in _read(feed.event_id(1), 2)]
+    assert [frame["id"] for frame in frames] == [feed.event_id(2), feed.event_id(3)]
+    assert [frame["event"] for frame in frames] == ["change", "change"]
+    assert [(f["data"]["op"], f["data"]["id"]) for f in frames] == [("update", "PAT-002"), ("delete", "CLI-001")]
+    # Events of one write share the version they produced
+    assert _parse(_read(feed.event_id(3), 1)[0])["data"]["version"] == frames[1]["data"]["version"]
+
+
+def test_unknown_or_expired_event_ids_reset(client, monkeypatch):
+    monkeypatch.setattr(settings, "change_feed_size", 2)
+    for need_id in ("PAT-001", "PAT-002", "PAT-003", "PAT-004"):
+        assert client.delete(f"/api/user-needs/{need_id}").status_code == 200
+    feed = database.get_backend().changes
+
+    for last_event_id in ("0123abcd-1", "garbage", feed.event_id(1), feed.event_id(99)):
+        [frame] = _read(last_event_id, 1)
+        assert _parse(frame)["event"] == "reset", last_event_id
+    # Events 3 and 4 are still in the ring buffer
+    assert _parse(_read(feed.event_id(2), 1)[0])["data"]["id"] == "PAT-003"
+
+
+def test_live_events_and_keep_alives(client, monkeypatch):
+    monkeypatch.setattr(settings, "change_feed_keepalive_seconds", 0.05)
+
+    async def read():
+        stream = changes_router._stream(None)
+        try:
+            assert await stream.__anext__() == ": keep-alive\n\n"
+            waiting = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0.01)
+            await asyncio.to_thread(client.delete, "/api/user-needs/PAT-001")
+            return await waiting
+        finally:
+            await stream.aclose()
+
+    frame = _parse(asyncio.run(read()))
+    assert (frame["event"], frame["data"]["op"], frame["data"]["id"]) == ("change", "delete", "PAT-001")
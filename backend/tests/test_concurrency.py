@@ -0,0 +1,86 @@
+"""Reads stay consistent while writes run; writes queue on one writer per dataset."""
+
+import threading
+import time
+
+NEED = {
+    "userGroupId": "landlord",
+    "title": "See rent arrears",
+    "description": "As a landlord I want to see arrears",
+    "entities": ["payment"],
+    "workflowPhase": "application",
+}
+
+
+def test_concurrent_creates_get_distinct_sequential_ids(client, concurrently):
+    responses = concurrently([("POST", "/api/user-needs", {"json": NEED})] * 20)
+
+    assert all(response.status_code == 200 for response in responses)
+    ids = sorted(response.json()["id"] for response in responses)
+    assert ids == [f"OWN-{n:03d}" for n in range(1, 21)]
+    assert len(client.get("/api/user-needs", params={"userGroupId": "landlord"}).json()) >= 20
+
+
+def test_reads_during_writes_see_whole_states(backend):
+    """Readers list, page and count needs while a writer churns them, and reload the file."""
+    stop = threading.Event()
+    errors = []
+    template = backend.list_user_needs()[0]
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            need = template.model_copy(update={"id": f"TEN-{500 + n % 50}", "title": str(n)})
+            if backend.get_user_need(need.id) is None:
+                backend.create_user_need(need)
+            else:
+                backend.delete_user_need(need.id)
+            backend.update_user_need(template.id, template.model_copy(update={"title": str(n)}))
+            n += 1
+
+    def reader(reload: bool):
+        try:
+            while not stop.is_set():
+                if reload:
+                    # Forces the next read to parse the file the writer is replacing
+                    from app import database
+                    database.data_cache.invalidate()
+                needs = backend.list_user_needs()
+                ids = [need.id for need in needs]
+                assert len(ids) == len(set(ids))
+                statistics = backend.get_statistics()
+                assert statistics["totalNeeds"] >= 24
+                page, after = backend.page_user_needs(limit=10)
+                while after is not None:
+                    more, after = backend.page_user_needs(after=after, limit=10)
+                    page += more
+                # Needs the writer never deletes are on every walk through the
+                # pages exactly once (re-created ones move to the end, so they
+                # can legitimately show up twice)
+                kept = [need.id for need in page if not need.id.startswith("TEN-5")]
+                assert sorted(kept) == sorted(i for i in ids if not i.startswith("TEN-5"))
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [threading.Thread(target=writer)] + [
+        threading.Thread(target=reader, args=(reload,)) for reload in (False, False, True)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(1.5)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+
+def test_write_failure_leaves_the_writer_running(client, concurrently):
+    responses = concurrently([
+        ("POST", "/api/user-needs", {"json": {**NEED, "workflowPhase": "nope"}}),
+        ("POST", "/api/user-needs", {"json": NEED}),
+    ])
+
+    assert [response.status_code for response in responses] == [400, 200]
+    assert client.get(f"/api/user-needs/{responses[1].json()['id']}").status_code == 200
@@ -0,0 +1,85 @@
+"""User need filters and ID lookups served from the indexes, kept in sync with writes."""
+
+import json
+import os
+
+from app import database
+
+FILTERS = [
+    {},
+    {"userGroupId": "prospective_renter"},
+    {"workflowPhase": "application"},
+    {"entity": "property_listing"},
+    {"superGroup": "tenant"},
+    {"refined": "refined"},
+    {"refined": "needsRefinement"},
+    {"superGroup": "property_owner", "entity": "payment"},
+    {"userGroupId": "landlord", "workflowPhase": "application"},
+]
+
+
+def _matches(need: dict, groups: dict, userGroupId=None, entity=None, workflowPhase=None,
+             superGroup=None, refined=None) -> bool:
+    return (
+        (not userGroupId or need["userGroupId"] == userGroupId)
+        and (not entity or entity in need["entities"])
+        and (not workflowPhase or need["workflowPhase"] == workflowPhase)
+        and (not superGroup or groups.get(need["userGroupId"]) == superGroup)
+        and (refined != "refined" or need.get("refined") is True)
+        and (refined != "needsRefinement" or need.get("refined") is not True)
+    )
+
+
+def _assert_filters_match_scan(client):
+    needs = client.get("/api/user-needs").json()
+    groups = {group["id"]: group.get("superGroup") for group in client.get("/api/user-groups").json()}
+    for filters in FILTERS:
+        expected = [need["id"] for need in needs if _matches(need, groups, **filters)]
+        response = client.get("/api/user-needs", params=filters)
+        assert [need["id"] for need in response.json()] == expected, filters
+
+
+def test_filters_match_a_scan_after_writes(client):
+    _assert_filters_match_scan(client)
+
+    first, second = client.get("/api/user-needs").json()[:2]
+    client.put(f"/api/user-needs/{first['id']}", json={
+        "userGroupId": "landlord", "entities": ["payment"], "refined": True
+    })
+    client.delete(f"/api/user-needs/{second['id']}")
+    created = client.post("/api/user-needs", json={**first, "id": None, "workflowPhase": "application"}).json()
+    client.post("/api/user-groups", json={"id": "subletter", "name": "Subletter", "superGroup": "tenant"})
+    client.post("/api/user-needs", json={**first, "id": None, "userGroupId": "subletter"})
+
+    _assert_filters_match_scan(client)
+    # An update keeps the need's place in the list, creates are appended
+    ids = [need["id"] for need in client.get("/api/user-needs").json()]
+    assert ids[0] == first["id"]
+    assert ids[-2] == created["id"]
+
+
+def test_lookup_by_id_follows_writes(client):
+    first, second = client.get("/api/user-needs").json()[:2]
+    assert client.get(f"/api/user-needs/{first['id']}").json() == first
+
+    client.put(f"/api/user-needs/{first['id']}", json={"title": "Renamed"})
+    client.delete(f"/api/user-needs/{second['id']}")
+
+    assert client.get(f"/api/user-needs/{first['id']}").json()["title"] == "Renamed"
+    assert client.get(f"/api/user-needs/{second['id']}").status_code == 404
+    assert client.get("/api/user-needs/NOPE-001").status_code == 404
+
+
+def test_file_changed_on_disk_is_reloaded(backend, data_file):
+    assert backend.get_user_need("PAT-001") is not None
+
+    raw = json.loads(data_file.read_text())
+    raw["userNeeds"] = [need for need in raw["userNeeds"] if need["id"] != "PAT-001"]
+    data_file.write_text(json.dumps(raw))
+    # Make sure the signature differs even on a coarse mtime clock
+    stat = os.stat(data_file)
+    os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert backend.get_user_need("PAT-001") is None
+    assert [need.id for need in backend.list_user_needs()] == [need["id"] for need in raw["userNeeds"]]
+    assert database.get_cache_stats()["misses"] == 2
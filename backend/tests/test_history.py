@@ -0,0 +1,157 @@
+"""Version history: point-in-time reads, diffs between versions and pruning."""
+
+import time
+
+import pytest
+
+from app import database
+from app.config import settings
+from app.routers import history as history_router
+
+
+@pytest.fixture
+def history(data_file, monkeypatch):
+    """Enable the version history with a checkpoint every 3 versions."""
+    monkeypatch.setattr(database, "HISTORY_ENABLED", True)
+    monkeypatch.setattr(history_router, "HISTORY_ENABLED", True)
+    monkeypatch.setattr(settings, "history_checkpoint_interval", 3)
+    monkeypatch.setattr(settings, "history_max_versions", 0)
+
+
+def _ids(response) -> list:
+    assert response.status_code == 200
+    return [need["id"] for need in response.json()]
+
+
+def _wait_for_checkpoints(file_path):
+    history = database._get_history(file_path)
+    for _ in range(200):
+        with history._lock:
+            if not history._checkpointing:
+                return history
+        time.sleep(0.01)
+    raise AssertionError("history checkpoints still being written")
+
+
+def _rename(client, need_id: str, title: str):
+    assert client.put(f"/api/user-needs/{need_id}", json={"title": title}).status_code == 200
+
+
+def test_as_of_reads_earlier_versions(client, history):
+    original = _ids(client.get("/api/user-needs"))
+    first, second = original[:2]
+    _rename(client, first, "Renamed once")
+    assert client.delete(f"/api/user-needs/{second}").status_code == 200
+    for i in range(5):
+        _rename(client, first, f"Renamed {i + 2} times")
+
+    listing = client.get("/api/history").json()
+    assert listing["version"] == 7
+    assert [entry["version"] for entry in listing["versions"]] == list(range(7, -1, -1))
+    assert listing["versions"][-2]["changes"] == [{"op": "update", "collection": "userNeeds", "id": first}]
+
+    assert _ids(client.get("/api/user-needs?asOf=0")) == original
+    assert second not in _ids(client.get("/api/user-needs?asOf=2"))
+    titles = {version: next(need["title"] for need in client.get(f"/api/user-needs?asOf={version}").json()
+                            if need["id"] == first)
+              for version in (1, 4, 7)}
+    assert titles == {1: "Renamed once", 4: "Renamed 3 times", 7: "Renamed 6 times"}
+
+    # Paging an old version: the cursor walk yields the whole version, once
+    walked, cursor = [], None
+    while True:
+        response = client.get("/api/user-needs?asOf=0&limit=5&sort=id" + (f"&cursor={cursor}" if cursor else ""))
+        walked += _ids(response)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert walked == sorted(original)
+
+    assert client.get("/api/user-needs?asOf=99").status_code == 404
+
+
+def test_old_versions_keep_their_etag(client, history):
+    client.get("/api/user-needs")
+    etag = client.get("/api/user-needs?asOf=0").headers["ETag"]
+    _rename(client, _ids(client.get("/api/user-needs"))[0], "Renamed")
+    assert client.get("/api/user-needs?asOf=0", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_diff_between_versions(client, history):
+    needs = client.get("/api/user-needs").json()
+    first, second = needs[0], needs[1]
+    _rename(client, first["id"], "Renamed")
+    assert client.delete(f"/api/user-needs/{second['id']}").status_code == 200
+    created = client.post("/api/user-needs", json={**first, "id": None}).json()
+
+    diff = client.get("/api/history/diff?from=0&to=3").json()
+    changes = diff["collections"]["userNeeds"]
+    assert list(diff["collections"]) == ["userNeeds"]
+    assert [need["id"] for need in changes["created"]] == [created["id"]]
+    assert [need["id"] for need in changes["deleted"]] == [second["id"]]
+    [updated] = changes["updated"]
+    assert updated["id"] == first["id"]
+    assert updated["fields"] == ["title"]
+    assert (updated["before"]["title"], updated["after"]["title"]) == (first["title"], "Renamed")
+
+    reverse = client.get("/api/history/diff?from=3&to=0").json()["collections"]["userNeeds"]
+    assert reverse["created"] == changes["deleted"]
+    assert reverse["deleted"] == changes["created"]
+    assert (reverse["updated"][0]["before"], reverse["updated"][0]["after"]) == (updated["after"], updated["before"])
+
+    assert client.get("/api/history/diff?from=1").json()["to"] == 3
+    assert client.get("/api/history/diff?from=0&to=9").status_code == 404
+
+
+def test_old_versions_are_pruned(client, history, monkeypatch):
+    monkeypatch.setattr(settings, "history_max_versions", 5)
+    need_id = _ids(client.get("/api/user-needs"))[0]
+    for i in range(20):
+        _rename(client, need_id, f"Renamed {i + 1} times")
+    history = _wait_for_checkpoints(database.DATA_FILE)
+
+    listing = client.get("/api/history?limit=1000").json()
+    versions = [entry["version"] for entry in listing["versions"]]
+    oldest = versions[-1]
+    assert listing["version"] == 20
+    assert 10 <= oldest <= 15
+    assert versions == list(range(20, oldest - 1, -1))
+    assert len(list(history.directory.glob("checkpoint-*.json"))) <= 3
+
+    assert client.get(f"/api/user-needs?asOf={oldest}").status_code == 200
+    assert client.get(f"/api/history/diff?from={oldest}").status_code == 200
+    assert client.get(f"/api/user-needs?asOf={oldest - 1}").status_code == 404
+    assert client.get("/api/history/diff?from=0").status_code == 404
+
+
+def test_read_versions_count_against_the_cache(client, history, monkeypatch):
+    need_id = _ids(client.get("/api/user-needs"))[0]
+    for i in range(3):
+        _rename(client, need_id, f"Renamed {i + 1} times")
+    cache = database.data_cache
+    before = cache.stats()
+
+    for version in (0, 1, 2):
+        assert client.get(f"/api/user-needs?asOf={version}").status_code == 200
+    stats = cache.stats()
+    # The dataset itself plus this history's two most recently read versions
+    assert stats["entries"] == before["entries"] + 2
+    assert stats["bytes"] > before["bytes"]
+    history = database._get_history(database.DATA_FILE)
+    assert cache.get_state((history.directory, history.id, 0)) is None
+    assert cache.get_state((history.directory, history.id, 2)) is not None
+
+    # Under a tighter bound the versions are evicted like any other entry
+    monkeypatch.setattr(cache, "max_entries", 2)
+    assert client.get("/api/user-needs?asOf=3").status_code == 200
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] > before["evictions"]
+
+
+def test_history_disabled(client, monkeypatch):
+    assert settings.model_fields["history_enabled"].default is False
+    monkeypatch.setattr(history_router, "HISTORY_ENABLED", False)
+    response = client.get("/api/history")
+    assert response.status_code == 404
+    assert "disabled" in response.json()["detail"]
+    assert client.get("/api/user-needs?asOf=0").status_code == 404
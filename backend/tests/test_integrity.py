@@ -0,0 +1,54 @@
+"""Reference validation on writes, including concurrent ones, and GET /api/integrity."""
+
+import json
+
+NEED = {
+    "userGroupId": "landlord",
+    "title": "See rent arrears",
+    "description": "As a landlord I want to see arrears",
+    "entities": ["payment"],
+    "workflowPhase": "application",
+}
+
+
+def test_concurrent_creates_of_one_id_admit_exactly_one(client, concurrently):
+    responses = concurrently([("POST", "/api/user-needs", {"json": {**NEED, "id": "OWN-500"}})] * 10)
+
+    assert sorted(response.status_code for response in responses) == [200] + [400] * 9
+    assert [need["id"] for need in client.get("/api/user-needs").json()].count("OWN-500") == 1
+
+
+def test_concurrent_super_groups_with_one_prefix_admit_exactly_one(client, concurrently):
+    responses = concurrently([
+        ("POST", "/api/user-super-groups", {"json": {"id": f"agent{i}", "name": "Agent", "prefix": "AGT"}})
+        for i in range(8)
+    ])
+
+    assert sorted(response.status_code for response in responses) == [200] + [400] * 7
+    report = client.get("/api/integrity").json()
+    assert report["ok"], report["issues"]
+
+
+def test_references_are_checked_against_current_collections(client):
+    assert client.post("/api/user-needs", json={**NEED, "entities": ["nope"]}).status_code == 400
+    assert client.post("/api/user-needs", json={**NEED, "workflowPhase": "nope"}).status_code == 400
+    assert client.post("/api/user-needs", json={**NEED, "userGroupId": "agent"}).status_code == 400
+
+    # A group created after the checker was built is accepted straight away
+    group = {"id": "agent", "name": "Agent", "superGroup": "property_owner"}
+    assert client.post("/api/user-groups", json=group).status_code == 200
+    assert client.post("/api/user-needs", json={**NEED, "userGroupId": "agent"}).status_code == 200
+    assert client.post("/api/user-groups", json={**group, "id": "agent2", "superGroup": "nope"}).status_code == 400
+
+
+def test_integrity_report_lists_every_issue(client, data_file):
+    raw = json.loads(data_file.read_text())
+    raw["userNeeds"].append({**raw["userNeeds"][0], "entities": ["ghost"], "workflowPhase": "nowhere"})
+    raw["userGroups"][0]["superGroup"] = "missing"
+    data_file.write_text(json.dumps(raw))
+
+    report = client.get("/api/integrity").json()
+
+    assert not report["ok"]
+    assert report["counts"]["userNeeds"] == len(raw["userNeeds"])
+    assert report["issueCount"] == 4
@@ -0,0 +1,95 @@
+"""Journal storage mode: changes are appended, replayed on load and folded by compaction."""
+
+import json
+
+import pytest
+
+from app import database
+
+
+@pytest.fixture
+def journal_backend(data_file, monkeypatch):
+    monkeypatch.setattr(database, "STORAGE_MODE", "journal")
+    return database.get_backend()
+
+
+def _edit(backend):
+    first, second = backend.list_user_needs()[:2]
+    backend.update_user_need(first.id, first.model_copy(update={"title": "Renamed", "constraints": ["a"]}))
+    backend.delete_user_need(second.id)
+    backend.create_user_need(first.model_copy(update={"id": "TEN-900"}))
+    backend.apply_user_need_changes([
+        (None, first.model_copy(update={"id": "TEN-901"})),
+        ("TEN-900", None),
+    ])
+    backend.create_user_group(backend.list_user_groups()[0].model_copy(update={"id": "agent"}))
+
+
+def _reload(backend) -> dict:
+    database.data_cache.invalidate()
+    return backend.load().model_dump()
+
+
+def test_changes_are_appended_not_rewritten(journal_backend, data_file):
+    snapshot = data_file.read_bytes()
+    _edit(journal_backend)
+
+    assert data_file.read_bytes() == snapshot
+    lines = data_file.with_name("data.json.journal").read_text().splitlines()
+    # Header naming the snapshot, then one line per change
+    assert "base" in json.loads(lines[0])
+    assert len(lines) == 1 + 6
+
+
+def test_replay_restores_every_change(journal_backend):
+    _edit(journal_backend)
+    expected = journal_backend.load().model_dump()
+
+    assert _reload(journal_backend) == expected
+    needs = [need["id"] for need in expected["userNeeds"]]
+    assert "TEN-901" in needs and "TEN-900" not in needs
+    assert expected["userNeeds"][0]["title"] == "Renamed"
+
+
+def test_torn_final_line_is_ignored(journal_backend, data_file):
+    _edit(journal_backend)
+    expected = journal_backend.load().model_dump()
+    with open(data_file.with_name("data.json.journal"), "a") as f:
+        f.write('{"op": "delete", "collection": "userNeeds", "id": "PAT-0')
+
+    assert _reload(journal_backend) == expected
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(journal_backend, data_file):
+    _edit(journal_backend)
+    expected = journal_backend.load().model_dump()
+
+    database.compactor.compact_all(force=True)
+
+    assert json.loads(data_file.read_text()) == expected
+    assert len(data_file.with_name("data.json.journal").read_text().splitlines()) == 1
+    assert _reload(journal_backend) == expected
+
+
+def test_stale_journal_is_ignored_after_a_compaction_crash(journal_backend, data_file):
+    _edit(journal_backend)
+    journal = data_file.with_name("data.json.journal")
+    stale = journal.read_text()
+    database.compactor.compact_all(force=True)
+    expected = json.loads(data_file.read_text())
+
+    # As if the snapshot was written but the journal was not reset
+    journal.write_text(stale)
+
+    assert _reload(journal_backend) == expected
+
+
+def test_write_behind_changes_reach_the_journal_on_flush(journal_backend, data_file, monkeypatch):
+    monkeypatch.setattr(database, "WRITE_BEHIND", True)
+    _edit(journal_backend)
+    database.flush_data(False)
+
+    lines = data_file.with_name("data.json.journal").read_text().splitlines()
+    assert len(lines) == 1 + 6
+    expected = journal_backend.load().model_dump()
+    assert _reload(journal_backend) == expected
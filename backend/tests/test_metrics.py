@@ -0,0 +1,116 @@
+"""GET /metrics (Prometheus text exposition) and the opt-in Server-Timing header."""
+
+import re
+from collections import defaultdict
+
+from app.metrics import UNMATCHED_ROUTE, server_timing
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{((?:[a-zA-Z_]\w*="(?:[^"\\]|\\.)*",?)*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_]\w*)="((?:[^"\\]|\\.)*)"')
+
+
+def _scrape(client) -> dict:
+    """Parse the exposition into {family: {"type": ..., "samples": [(name, labels, value)]}}."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert text.endswith("\n")
+
+    families = defaultdict(lambda: {"type": None, "help": None, "samples": []})
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            name, description = line[len("# HELP "):].split(" ", 1)
+            families[name]["help"] = description
+        elif line.startswith("# TYPE "):
+            name, kind = line[len("# TYPE "):].split(" ")
+            families[name]["type"] = kind
+        else:
+            match = SAMPLE.match(line)
+            assert match, line
+            name, labels, value = match.groups()
+            family = re.sub(r"_(bucket|sum|count)$", "", name) if name not in families else name
+            # Every sample follows the HELP and TYPE lines of its family
+            assert families[family]["type"] is not None, line
+            families[family]["samples"].append((name, dict(LABEL.findall(labels or "")), float(value)))
+    return families
+
+
+def _requests(families, route: str, method: str = "GET", status: str = "200") -> float:
+    samples = families["userneeds_request_duration_seconds"]["samples"]
+    return sum(value for name, labels, value in samples if name.endswith("_count") and labels == {
+        "method": method, "route": route, "status": status
+    })
+
+
+def test_exposition_format(client):
+    client.get("/api/user-needs")
+    client.delete("/api/user-needs/PAT-001")
+    families = _scrape(client)
+
+    assert families["userneeds_request_duration_seconds"]["type"] == "histogram"
+    assert families["userneeds_storage_bytes_total"]["type"] == "counter"
+    assert families["userneeds_cache_entries"]["type"] == "gauge"
+    assert {labels["cache"] for _, labels, _ in families["userneeds_cache_hits_total"]["samples"]} == {
+        "datastore", "response"
+    }
+    assert all(family["help"] for family in families.values())
+
+    # Buckets are cumulative and end with +Inf, which equals _count
+    series = defaultdict(list)
+    counts = {}
+    for name, labels, value in families["userneeds_request_duration_seconds"]["samples"]:
+        key = tuple(sorted((k, v) for k, v in labels.items() if k != "le"))
+        if name.endswith("_bucket"):
+            series[key].append((labels["le"], value))
+        elif name.endswith("_count"):
+            counts[key] = value
+    assert series and set(series) == set(counts)
+    for key, buckets in series.items():
+        values = [value for _, value in buckets]
+        assert values == sorted(values)
+        assert buckets[-1] == ("+Inf", counts[key])
+
+
+def test_requests_are_counted_by_route_template(client):
+    before = _scrape(client)
+    for need_id in ("PAT-001", "PAT-002", "PAT-003"):
+        assert client.get(f"/api/user-needs/{need_id}").status_code == 200
+    assert client.get("/api/user-needs/NOPE-001").status_code == 404
+    assert client.get("/no/such/route").status_code == 404
+    after = _scrape(client)
+
+    route = "/api/user-needs/{need_id}"
+    assert _requests(after, route) - _requests(before, route) == 3
+    assert _requests(after, route, status="404") - _requests(before, route, status="404") == 1
+    assert _requests(after, UNMATCHED_ROUTE, status="404") - _requests(before, UNMATCHED_ROUTE, status="404") == 1
+    assert not any("PAT-001" in str(labels) for _, labels, _ in after["userneeds_request_duration_seconds"]["samples"])
+
+
+def test_storage_bytes_follow_writes(client):
+    def written(families):
+        return next(value for _, labels, value in families["userneeds_storage_bytes_total"]["samples"]
+                    if labels == {"direction": "written"})
+
+    before = written(_scrape(client))
+    assert client.delete("/api/user-needs/PAT-001").status_code == 200
+    assert written(_scrape(client)) > before
+
+
+def test_server_timing_is_opt_in(client):
+    assert "Server-Timing" not in client.get("/api/user-needs").headers
+
+    header = client.get("/api/user-needs", params={"limit": 5}, headers={"X-Server-Timing": "1"}).headers["Server-Timing"]
+    entries = dict(entry.split(";dur=") for entry in header.split(", "))
+    assert "total" in entries and "serialise" in entries
+    assert all(re.fullmatch(r"\d+\.\d{3}", duration) for duration in entries.values())
+    assert float(entries["serialise"]) <= float(entries["total"])
+
+    # Writes report their storage phases too
+    header = client.delete("/api/user-needs/PAT-001", headers={"X-Server-Timing": "1"}).headers["Server-Timing"]
+    assert "write" in dict(entry.split(";dur=") for entry in header.split(", "))
+
+
+def test_server_timing_format():
+    assert server_timing({"parse": 0.0015, "validate": 0.00025}, 0.002) == \
+        "parse;dur=1.500, validate;dur=0.250, total;dur=2.000"
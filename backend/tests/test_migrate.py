@@ -0,0 +1,56 @@
+"""JSON to SQLite migration (python -m app.migrate)."""
+
+import json
+
+import pytest
+
+from app.migrate import main, migrate_json_to_sqlite
+from app.models import DataStore
+from app.sqlite_backend import SqliteBackend
+
+from conftest import EXAMPLE_DATA
+
+
+def test_migration_copies_every_collection(tmp_path):
+    db_file = tmp_path / "data.db"
+    data = migrate_json_to_sqlite(EXAMPLE_DATA, db_file)
+
+    expected = DataStore(**json.loads(EXAMPLE_DATA.read_text()))
+    assert data == expected
+    assert SqliteBackend(db_file).load().model_dump() == expected.model_dump()
+
+
+def test_existing_database_needs_force(tmp_path):
+    db_file = tmp_path / "data.db"
+    migrate_json_to_sqlite(EXAMPLE_DATA, db_file)
+    with pytest.raises(FileExistsError):
+        migrate_json_to_sqlite(EXAMPLE_DATA, db_file)
+
+    # Replacing the content, not adding to it
+    raw = json.loads(EXAMPLE_DATA.read_text())
+    raw["userNeeds"] = raw["userNeeds"][:3]
+    smaller = tmp_path / "smaller.json"
+    smaller.write_text(json.dumps(raw))
+    migrate_json_to_sqlite(smaller, db_file, force=True)
+    assert [need.id for need in SqliteBackend(db_file).load().userNeeds] == [need["id"] for need in raw["userNeeds"]]
+
+
+def test_command_line(tmp_path, capsys):
+    db_file = tmp_path / "data.db"
+    assert main([str(EXAMPLE_DATA), str(db_file)]) == 0
+    assert "24 user needs" in capsys.readouterr().out
+
+    assert main([str(EXAMPLE_DATA), str(db_file)]) == 1
+    assert "--force" in capsys.readouterr().err
+    assert main([str(tmp_path / "missing.json"), str(tmp_path / "other.db")]) == 1
+    assert main([str(EXAMPLE_DATA), str(db_file), "--force"]) == 0
+
+
+@pytest.mark.all_backends
+def test_backends_serve_the_same_data(client, storage_backend):
+    expected = json.loads(EXAMPLE_DATA.read_text())
+    for collection, url in [("userNeeds", "/api/user-needs"), ("userGroups", "/api/user-groups"),
+                            ("userSuperGroups", "/api/user-super-groups"), ("entities", "/api/entities"),
+                            ("workflowPhases", "/api/workflow-phases")]:
+        ids = [record["id"] for record in client.get(url).json()]
+        assert ids == [record["id"] for record in expected[collection]], (storage_backend, collection)
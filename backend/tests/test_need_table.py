@@ -0,0 +1,62 @@
+"""The columnar need table: field round trips and compaction."""
+
+import json
+from collections import Counter
+
+from app.columnar import TableDataStore
+from app.models import DataStore
+
+
+def test_table_round_trips_every_field(data_file):
+    data = DataStore(**json.loads(data_file.read_text()))
+    data.userNeeds[0] = data.userNeeds[0].model_copy(update={
+        "constraints": ["within 24h", "EU only"], "sla": "1 day", "fromState": "a", "toState": "b",
+        "optional": True, "futureFeature": False, "refined": None,
+    })
+    data.userNeeds[1] = data.userNeeds[1].model_copy(update={"constraints": [], "entities": []})
+    before = data.model_dump()
+
+    store = TableDataStore.from_data_store(data)
+
+    # The needs given to the table are read, never changed
+    assert data.model_dump() == before
+    assert store.to_dict() == before
+    assert store.to_data_store().model_dump() == before
+    # No userNeeds list that could be read as empty
+    assert not hasattr(store, "userNeeds")
+    assert [need.model_dump() for need in store.table.needs()] == before["userNeeds"]
+
+
+def test_table_survives_compaction(data_file, monkeypatch):
+    monkeypatch.setattr("app.columnar.COMPACT_MIN_DEAD", 4)
+    table = TableDataStore.from_data_store(DataStore(**json.loads(data_file.read_text()))).table
+    expected = [need.model_dump() for need in table.needs()]
+    for n in range(20):
+        for i, record in enumerate(expected):
+            old = table.get(record["id"])
+            table.apply_need_change(old, old.model_copy(update={"title": f"{n}-{i}"}))
+            record["title"] = f"{n}-{i}"
+    assert table.records() == expected
+    assert len(table._ids) < 3 * len(expected)
+
+
+def test_statistics_counts_follow_changes(data_file, monkeypatch):
+    monkeypatch.setattr("app.columnar.COMPACT_MIN_DEAD", 4)
+    table = TableDataStore.from_data_store(DataStore(**json.loads(data_file.read_text()))).table
+    needs = table.needs()
+    for i, need in enumerate(needs):
+        if i % 3 == 0:
+            table.apply_need_change(need, None)
+        else:
+            table.apply_need_change(need, need.model_copy(update={
+                "userGroupId": "landlord", "entities": need.entities[1:] + ["payment"]
+            }))
+    table.apply_need_change(None, needs[0])
+
+    records = table.records()
+    assert table.snapshot() == {
+        "totalNeeds": len(records),
+        "byUserGroup": dict(Counter(record["userGroupId"] for record in records)),
+        "byWorkflowPhase": dict(Counter(record["workflowPhase"] for record in records)),
+        "byEntity": dict(Counter(entity for record in records for entity in record["entities"])),
+    }
@@ -0,0 +1,109 @@
+"""/api/statistics/pivot cross-tabulations against counts recomputed from the needs."""
+
+import itertools
+
+import pytest
+
+from app.columnar import FLAGS
+
+
+def _values(client, need: dict, dimension: str) -> list:
+    """The axis values a need is counted under for a dimension."""
+    if dimension == "entity":
+        return need["entities"]
+    if dimension == "userGroup":
+        return [need["userGroupId"]]
+    if dimension == "superGroup":
+        groups = {group["id"]: group for group in client.get("/api/user-groups").json()}
+        return [groups[need["userGroupId"]].get("superGroup")]
+    if dimension in FLAGS:
+        return [bool(need.get(dimension))]
+    return [need[dimension]]
+
+
+def _recount(client, pivot: dict) -> list:
+    axes = [pivot[key] for key in ("rows", "cols", "split") if pivot[key]]
+    positions = [{label["id"]: i for i, label in enumerate(axis["labels"])} for axis in axes]
+
+    def zeros(depth):
+        size = len(positions[depth])
+        if depth + 1 == len(positions):
+            return [0] * size
+        return [zeros(depth + 1) for _ in range(size)]
+
+    counts = zeros(0)
+    for need in client.get("/api/user-needs").json():
+        per_axis = [_values(client, need, axis["dimension"]) for axis in axes]
+        for cell in itertools.product(*per_axis):
+            target = counts
+            for depth, value in enumerate(cell):
+                if depth + 1 == len(cell):
+                    target[positions[depth][value]] += 1
+                else:
+                    target = target[positions[depth][value]]
+    return counts
+
+
+@pytest.mark.parametrize("query", [
+    "rows=userGroup",
+    "rows=workflowPhase&cols=userGroup",
+    "rows=superGroup&cols=entity",
+    "rows=entity&cols=workflowPhase&split=refined",
+    "rows=optional&cols=futureFeature&split=triggersStateChange",
+])
+def test_counts_match_the_needs(client, query):
+    first, second = client.get("/api/user-needs").json()[:2]
+    client.put(f"/api/user-needs/{first['id']}", json={"refined": True, "optional": False})
+    client.put(f"/api/user-needs/{second['id']}", json={"futureFeature": True, "entities": ["payment", "property_listing"]})
+
+    pivot = client.get(f"/api/statistics/pivot?{query}").json()
+
+    assert pivot["counts"] == _recount(client, pivot)
+    assert pivot["totalNeeds"] == len(client.get("/api/user-needs").json())
+
+
+def test_axes_follow_the_reference_data(client):
+    pivot = client.get("/api/statistics/pivot?rows=workflowPhase&cols=superGroup").json()
+
+    phases = sorted(client.get("/api/workflow-phases").json(), key=lambda phase: phase["order"])
+    assert pivot["rows"]["labels"] == [{"id": phase["id"], "name": phase["name"]} for phase in phases]
+    super_groups = client.get("/api/user-super-groups").json()
+    assert [label["id"] for label in pivot["cols"]["labels"]] == [group["id"] for group in super_groups]
+    assert pivot["split"] is None
+
+    flags = client.get("/api/statistics/pivot?rows=refined").json()
+    assert flags["rows"]["labels"] == [{"id": True, "name": "Yes"}, {"id": False, "name": "No"}]
+    assert flags["counts"] == [0, flags["totalNeeds"]]
+
+
+def test_entity_counts_once_per_entity(client):
+    need = client.get("/api/user-needs").json()[0]
+    client.put(f"/api/user-needs/{need['id']}", json={"entities": ["payment", "property_listing"]})
+
+    pivot = client.get("/api/statistics/pivot?rows=entity").json()
+    by_entity = dict(zip((label["id"] for label in pivot["rows"]["labels"]), pivot["counts"]))
+    statistics = client.get("/api/statistics").json()
+    assert {entity: count for entity, count in by_entity.items() if count} == statistics["byEntity"]
+    assert sum(pivot["counts"]) > pivot["totalNeeds"]
+
+
+@pytest.mark.parametrize("query", [
+    "rows=colour",
+    "rows=userGroup&cols=userGroup",
+    "rows=userGroup&split=entity",
+    "rows=",
+])
+def test_invalid_dimensions(client, query):
+    assert client.get(f"/api/statistics/pivot?{query}").status_code == 400
+
+
+def test_not_modified_until_the_needs_change(client):
+    url = "/api/statistics/pivot?rows=userGroup&cols=workflowPhase"
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    need = client.get("/api/user-needs").json()[0]
+    client.delete(f"/api/user-needs/{need['id']}")
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["totalNeeds"] == len(client.get("/api/user-needs").json())
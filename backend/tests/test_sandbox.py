@@ -0,0 +1,90 @@
+"""Demo mode sandboxes: per-session copies of the example data, expired and evicted when idle."""
+
+import time
+
+import pytest
+
+from app import sandbox
+from app.state import app_state
+
+from conftest import EXAMPLE_DATA
+
+ALICE, BOB, CAROL = "alice-session-0001", "bob-session-000001", "carol-session-0001"
+
+
+@pytest.fixture
+def sandboxes(data_file, monkeypatch):
+    """Serve demo mode from a fresh sandbox registry; tests tune its TTL and size."""
+    monkeypatch.setattr(sandbox, "EXAMPLE_DATA_FILE", data_file.parent / "data.example.json")
+    monkeypatch.setattr(sandbox, "_example", None)
+    manager = sandbox.SandboxManager(ttl=3600, max_sessions=10)
+    monkeypatch.setattr(sandbox, "sandboxes", manager)
+    monkeypatch.setattr(app_state, "_demo_mode", True)
+    return manager
+
+
+def _needs(client, session: str) -> list:
+    response = client.get("/api/user-needs", headers={sandbox.SESSION_HEADER: session})
+    assert response.status_code == 200
+    return [need["id"] for need in response.json()]
+
+
+def _delete(client, session: str, need_id: str = "PAT-001"):
+    response = client.delete(f"/api/user-needs/{need_id}", headers={sandbox.SESSION_HEADER: session})
+    assert response.status_code == 200
+
+
+def test_sessions_are_isolated(client, sandboxes, data_file):
+    before = data_file.read_bytes()
+    _delete(client, ALICE)
+    assert client.put("/api/user-needs/PAT-002", json={"title": "Alice's"},
+                      headers={sandbox.SESSION_HEADER: ALICE}).status_code == 200
+
+    assert "PAT-001" not in _needs(client, ALICE)
+    assert "PAT-001" in _needs(client, BOB)
+    bob = client.get("/api/user-needs/PAT-002", headers={sandbox.SESSION_HEADER: BOB}).json()
+    assert bob["title"] != "Alice's"
+    # Neither the main dataset nor the example data is written
+    assert data_file.read_bytes() == before
+    assert (data_file.parent / "data.example.json").read_bytes() == EXAMPLE_DATA.read_bytes()
+    assert sandboxes.stats()["sessions"] == 2
+    assert sandboxes.stats()["changedRecords"] == 2
+
+
+def test_new_clients_get_a_session_cookie(client, sandboxes):
+    response = client.delete("/api/user-needs/PAT-001")
+    assert response.status_code == 200
+    session = response.cookies[sandbox.SESSION_COOKIE]
+
+    # The client sends the cookie back, so it keeps its own sandbox
+    assert "PAT-001" not in [need["id"] for need in client.get("/api/user-needs").json()]
+    assert "PAT-001" in _needs(client, BOB)
+    assert "PAT-001" not in _needs(client, session)
+
+
+def test_idle_sessions_expire(client, sandboxes):
+    sandboxes.ttl = 0.05
+    _delete(client, ALICE)
+    _needs(client, BOB)
+    time.sleep(0.1)
+
+    # The next request sweeps both idle sandboxes away
+    assert "PAT-001" in _needs(client, CAROL)
+    assert sandboxes.stats()["expired"] == 2
+    assert "PAT-001" in _needs(client, ALICE)
+
+
+def test_least_recently_used_session_is_evicted(client, sandboxes):
+    sandboxes.max_sessions = 2
+    _delete(client, ALICE)
+    _delete(client, BOB)
+    _needs(client, ALICE)
+    evicted = sandboxes._sandboxes[(None, BOB)]
+
+    _needs(client, CAROL)
+    stats = sandboxes.stats()
+    assert (stats["sessions"], stats["evicted"]) == (2, 1)
+    # Bob's sandbox was the least recently used: it starts over, and its writer was closed
+    assert evicted.writer._queue is None
+    assert "PAT-001" not in _needs(client, ALICE)
+    assert "PAT-001" in _needs(client, BOB)
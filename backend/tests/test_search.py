@@ -0,0 +1,81 @@
+"""GET /api/user-needs/search: BM25 ranking, prefix matches and index upkeep on writes."""
+
+import pytest
+
+pytestmark = pytest.mark.all_backends
+
+NEED = {
+    "userGroupId": "landlord",
+    "description": "As a landlord I want to look after the animals",
+    "entities": ["property_listing"],
+    "workflowPhase": "application",
+}
+
+
+def _search(client, q, **params):
+    response = client.get("/api/user-needs/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _ids(hits) -> list:
+    return [hit["need"]["id"] for hit in hits]
+
+
+@pytest.fixture
+def quokkas(client):
+    """Create a need naming quokkas in its title and one naming them in its description only."""
+    title = client.post("/api/user-needs", json={**NEED, "id": "ZOO-001", "title": "Quokka feeding"}).json()
+    description = client.post("/api/user-needs", json={
+        **NEED, "id": "ZOO-002", "title": "Enclosure upkeep", "description": "Keep the quokka enclosure clean"
+    }).json()
+    return title["id"], description["id"]
+
+
+def test_title_matches_rank_first(client, quokkas):
+    in_title, in_description = quokkas
+    hits = _search(client, "quokka")
+    assert _ids(hits) == [in_title, in_description]
+    assert hits[0]["score"] > hits[1]["score"] > 0
+    assert hits[0]["highlights"] == {"title": [[0, 6]]}
+    assert hits[1]["highlights"] == {"description": [[9, 15]]}
+
+
+def test_prefixes_match_but_score_lower(client, quokkas):
+    exact = _search(client, "quokka")
+    prefix = _search(client, "quok")
+    assert _ids(prefix) == _ids(exact)
+    assert all(p["score"] < e["score"] for p, e in zip(prefix, exact))
+    assert _search(client, "QUOKKA")[0]["score"] == exact[0]["score"]
+
+
+def test_filters_and_limit(client):
+    everywhere = _ids(_search(client, "maintenance"))
+    assert len(everywhere) > 1
+    staff = _ids(_search(client, "maintenance", userGroupId="maintenance_staff"))
+    assert staff and set(staff) < set(everywhere)
+    assert _ids(_search(client, "maintenance", limit=1)) == everywhere[:1]
+
+
+def test_index_follows_writes(client, quokkas):
+    in_title, in_description = quokkas
+    etag = client.get("/api/user-needs/search", params={"q": "quokka"}).headers["ETag"]
+
+    assert client.put(f"/api/user-needs/{in_title}", json={"title": "Wombat feeding"}).status_code == 200
+    assert _ids(_search(client, "quokka")) == [in_description]
+    assert _ids(_search(client, "wombat")) == [in_title]
+    assert client.get("/api/user-needs/search", params={"q": "quokka"},
+                      headers={"If-None-Match": etag}).status_code == 200
+
+    assert client.delete(f"/api/user-needs/{in_description}").status_code == 200
+    assert _search(client, "quokka") == []
+    assert _search(client, "enclosure") == []
+
+
+def test_empty_and_unknown_queries(client):
+    assert _search(client, "xyzzy") == []
+    for q in ("", "   ", "?!"):
+        response = client.get("/api/user-needs/search", params={"q": q})
+        assert response.status_code == 400
+        assert "at least one word" in response.json()["detail"]
+    assert client.get("/api/user-needs/search").status_code == 422
@@ -0,0 +1,59 @@
+"""/api/statistics counts kept up to date by every write."""
+
+from collections import Counter
+
+import pytest
+
+pytestmark = pytest.mark.all_backends
+
+NEED = {
+    "userGroupId": "landlord",
+    "title": "See rent arrears",
+    "description": "As a landlord I want to see arrears",
+    "entities": ["payment", "property_listing"],
+    "workflowPhase": "application",
+}
+
+
+def _recount(client) -> dict:
+    needs = client.get("/api/user-needs").json()
+    return {
+        "totalNeeds": len(needs),
+        "byUserGroup": dict(Counter(need["userGroupId"] for need in needs)),
+        "byWorkflowPhase": dict(Counter(need["workflowPhase"] for need in needs)),
+        "byEntity": dict(Counter(entity for need in needs for entity in need["entities"])),
+    }
+
+
+def test_statistics_follow_writes(client):
+    assert client.get("/api/statistics").json() == _recount(client)
+
+    response = client.post("/api/user-needs", json=NEED)
+    assert response.status_code == 200
+    created = response.json()
+    assert client.get("/api/statistics").json() == _recount(client)
+
+    response = client.put(f"/api/user-needs/{created['id']}", json={"workflowPhase": "viewing", "entities": []})
+    assert response.status_code == 200
+    assert client.get("/api/statistics").json() == _recount(client)
+
+    for need in client.get("/api/user-needs").json()[:5]:
+        assert client.delete(f"/api/user-needs/{need['id']}").status_code == 200
+    statistics = client.get("/api/statistics").json()
+    assert statistics == _recount(client)
+    # Values no need has any more are dropped, not reported as zero
+    assert 0 not in statistics["byEntity"].values()
+
+
+def test_statistics_etag_changes_only_with_needs(client):
+    response = client.get("/api/statistics")
+    etag = response.headers["ETag"]
+    assert client.get("/api/statistics", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/api/user-super-groups", json={"id": "agent", "name": "Agent", "prefix": "AGT"})
+    assert client.get("/api/statistics", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/api/user-needs", json=NEED)
+    response = client.get("/api/statistics", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
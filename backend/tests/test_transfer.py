@@ -0,0 +1,116 @@
+"""NDJSON export and import: round trips, rejected lines and import progress."""
+
+import json
+
+from app.transfer import NdjsonImporter
+
+HEADERS = {"Content-Type": "application/x-ndjson"}
+
+
+def _dataset(client) -> dict:
+    return {
+        collection: client.get(path).json()
+        for collection, path in (
+            ("userSuperGroups", "/api/user-super-groups"),
+            ("userGroups", "/api/user-groups"),
+            ("entities", "/api/entities"),
+            ("workflowPhases", "/api/workflow-phases"),
+            ("userNeeds", "/api/user-needs"),
+        )
+    }
+
+
+def test_export_then_import_round_trips(client):
+    client.put("/api/user-needs/PAT-001", json={"constraints": ["EU only"], "refined": True, "sla": "1 day"})
+    original = _dataset(client)
+    export = client.get("/api/export")
+    assert export.headers["content-type"] == "application/x-ndjson"
+    lines = export.content.splitlines()
+    assert [json.loads(line)["collection"] for line in lines][-1] == "userNeeds"
+    assert len(lines) == sum(len(records) for records in original.values())
+
+    for need in original["userNeeds"][:5]:
+        client.delete(f"/api/user-needs/{need['id']}")
+    client.post("/api/user-needs", json={**original["userNeeds"][0], "id": None})
+
+    response = client.post("/api/import", content=export.content, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json()["applied"] is True
+    assert response.json()["imported"] == {collection: len(records) for collection, records in original.items()}
+    assert _dataset(client) == original
+    assert client.get("/api/statistics").json()["totalNeeds"] == len(original["userNeeds"])
+
+
+def test_malformed_lines_are_rejected_and_nothing_is_applied(client):
+    original = _dataset(client)
+    lines = client.get("/api/export").content.splitlines()
+    need = json.loads(lines[-1])["record"]
+    bad = lines[:-1] + [
+        b'{"collection": "userNeeds", "record": {"id": "X-1"}}',
+        b"{not json",
+        b'{"collection": "widgets", "record": {}}',
+        json.dumps({"collection": "userNeeds", "record": {**need, "userGroupId": "nobody"}}).encode(),
+        json.dumps({"collection": "userNeeds", "record": need}).encode(),
+        json.dumps({"collection": "userNeeds", "record": need}).encode(),
+    ]
+
+    response = client.post("/api/import", content=b"\n".join(bad), headers=HEADERS)
+
+    assert response.status_code == 400
+    report = response.json()["detail"]
+    assert report["applied"] is False
+    assert report["errorCount"] == 5
+    # The first copy of the last need is valid, the second a duplicate
+    assert [error["line"] for error in report["errors"]] == [len(lines) + i for i in (0, 1, 2, 3, 5)]
+    assert "Unknown userGroupId: nobody" in report["errors"][3]["error"]
+    assert "Duplicate userNeeds ID" in report["errors"][4]["error"]
+    assert _dataset(client) == original
+    assert client.post("/api/import", content=b"\n\n", headers=HEADERS).status_code == 400
+
+
+def test_dry_run_only_validates(client):
+    body = client.get("/api/export").content
+    client.delete("/api/user-needs/PAT-001")
+
+    response = client.post("/api/import?dryRun=true", content=body, headers=HEADERS)
+
+    assert response.status_code == 200
+    assert response.json()["applied"] is False
+    assert client.get("/api/user-needs/PAT-001").status_code == 404
+
+
+def test_progress_reports_the_imports(client):
+    body = client.get("/api/export").content
+    assert client.get("/api/import/progress").json() == []
+
+    client.post("/api/import?dryRun=true", content=body, headers=HEADERS)
+    client.post("/api/import", content=body + b"{bad\n", headers=HEADERS)
+    client.post("/api/import", content=body, headers=HEADERS)
+
+    progress = client.get("/api/import/progress").json()
+    assert [item["state"] for item in progress] == ["applied", "failed", "validated"]
+    latest = progress[0]
+    assert latest["bytesRead"] == latest["bytesTotal"] == len(body)
+    assert latest["lines"] == len(body.splitlines())
+    assert latest["errorCount"] == 0
+    assert progress[1]["errorCount"] == 1
+    # Imports into another workspace are reported there
+    client.post("/api/workspaces", json={"name": "other"})
+    assert client.get("/api/import/progress", headers={"X-Workspace": "other"}).json() == []
+
+
+def test_importer_spools_user_needs(client):
+    body = client.get("/api/export").content
+    importer = NdjsonImporter()
+    for i in range(0, len(body), 100):
+        importer.feed(body[i:i + 100])
+    importer.finish()
+    try:
+        # Only the reference records are held as models
+        assert "userNeeds" not in importer.references
+        records = list(importer.records())
+        assert [record.model_dump() for collection, record in records if collection == "userNeeds"] == \
+            client.get("/api/user-needs").json()
+        assert [collection for collection, _ in records][-1] == "userNeeds"
+    finally:
+        importer.close()
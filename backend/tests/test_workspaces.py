@@ -0,0 +1,104 @@
+"""Workspaces: separate datasets behind one LRU-bounded cache of loaded stores."""
+
+import json
+import os
+import shutil
+import time
+
+import pytest
+
+from app import database
+
+from conftest import EXAMPLE_DATA
+
+
+@pytest.fixture
+def workspaces(client, data_file, monkeypatch):
+    """Create workspaces a, b and c holding the example data, cached at most two at a time."""
+    monkeypatch.setattr(database, "data_cache", database.DataStoreCache(max_entries=2))
+    for name in "abc":
+        assert client.post("/api/workspaces", json={"name": name}).status_code == 201
+        shutil.copy(EXAMPLE_DATA, data_file.parent / "workspaces" / name / "data.json")
+    database.data_cache.invalidate()
+    return data_file.parent / "workspaces"
+
+
+def _needs(client, workspace=None):
+    headers = {"X-Workspace": workspace} if workspace else {}
+    return [need["id"] for need in client.get("/api/user-needs", headers=headers).json()]
+
+
+def test_workspaces_are_separate_datasets(client, workspaces):
+    assert client.delete("/api/user-needs/PAT-001", headers={"X-Workspace": "a"}).status_code == 200
+
+    assert "PAT-001" not in _needs(client, "a")
+    assert "PAT-001" in _needs(client, "b")
+    assert "PAT-001" in _needs(client)
+    assert "PAT-001" in [need["id"] for need in client.get("/w/b/api/user-needs").json()]
+    assert client.get("/api/user-needs", headers={"X-Workspace": "nope"}).status_code == 404
+
+
+def test_cache_evicts_least_recently_used(client, workspaces):
+    for workspace in ("a", "b", "a", "c"):
+        _needs(client, workspace)
+
+    stats = database.get_cache_stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    # b was the least recently used
+    cached = {path.parent.name for path in database.data_cache._entries}
+    assert cached == {"a", "c"}
+
+
+def test_eviction_flushes_unwritten_changes(client, workspaces, monkeypatch):
+    monkeypatch.setattr(database, "WRITE_BEHIND", True)
+    database.write_behind.latency = 3600
+    assert client.delete("/api/user-needs/PAT-001", headers={"X-Workspace": "a"}).status_code == 200
+    assert "PAT-001" in [n["id"] for n in json.loads((workspaces / "a" / "data.json").read_text())["userNeeds"]]
+
+    _needs(client, "b")
+    _needs(client, "c")
+
+    assert "PAT-001" not in [n["id"] for n in json.loads((workspaces / "a" / "data.json").read_text())["userNeeds"]]
+    assert "PAT-001" not in _needs(client, "a")
+
+
+def test_etag_changes_when_an_evicted_dataset_changed_on_disk(client, workspaces):
+    headers = {"X-Workspace": "a"}
+    etag = client.get("/api/user-needs", headers=headers).headers["ETag"]
+    _needs(client, "b")
+    _needs(client, "c")
+
+    path = workspaces / "a" / "data.json"
+    raw = json.loads(path.read_text())
+    raw["userNeeds"] = raw["userNeeds"][1:]
+    path.write_text(json.dumps(raw))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    response = client.get("/api/user-needs", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == len(raw["userNeeds"])
+
+
+def test_idle_workspace_backends_are_closed(client, workspaces):
+    # One event loop for every request, as under a server
+    with client:
+        assert client.delete("/api/user-needs/PAT-001", headers={"X-Workspace": "a"}).status_code == 200
+        evicted = database._backends[("a", False)]
+        for workspace in "bc":
+            assert client.delete("/api/user-needs/PAT-001", headers={"X-Workspace": workspace}).status_code == 200
+
+        assert list(database._backends) == [("b", False), ("c", False)]
+        threads = evicted.writer._executor._threads
+        for _ in range(200):
+            if evicted.writer._task.done() and not any(thread.is_alive() for thread in threads):
+                break
+            time.sleep(0.01)
+        else:
+            raise AssertionError("the evicted backend's writer is still running")
+        assert workspaces / "a" / "data.json" not in database.data_cache._entries
+
+        # Its dataset opens again on the next request
+        assert "PAT-001" not in _needs(client, "a")
+        assert database._backends[("a", False)] is not evicted
@@ -0,0 +1,70 @@
+"""Write-behind flushing: explicit flushes wait for writes already under way."""
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.write_behind import WriteBehindFlusher
+
+PATH = Path("data.json")
+
+
+def _wait_until(condition):
+    for _ in range(200):
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+@pytest.fixture
+def written():
+    return []
+
+
+@pytest.fixture
+def flusher(written):
+    flusher = WriteBehindFlusher(written.append, latency=0, batch_size=1)
+    yield flusher
+    flusher.stop()
+
+
+def test_flush_waits_for_a_write_the_thread_took(flusher, written):
+    # Hold the thread after it took the file but before it writes it
+    flusher._flush_lock.acquire()
+    flusher.schedule(PATH)
+    _wait_until(lambda: PATH in flusher._flushing)
+
+    seen = []
+    flushing = threading.Thread(target=lambda: (flusher.flush(PATH), seen.append(list(written))))
+    flushing.start()
+    time.sleep(0.05)
+    assert flushing.is_alive()
+
+    flusher._flush_lock.release()
+    flushing.join(timeout=2)
+    assert seen == [[PATH]]
+    assert not flusher.is_dirty(PATH)
+
+
+def test_failed_writes_stay_dirty(written):
+    attempts = []
+
+    def flush(path):
+        attempts.append(path)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+        written.append(path)
+
+    flusher = WriteBehindFlusher(flush, latency=3600, batch_size=100)
+    flusher.schedule(PATH)
+    with pytest.raises(OSError):
+        flusher.flush(PATH)
+    assert flusher.is_dirty(PATH)
+
+    flusher.flush(PATH)
+    assert written == [PATH]
+    assert not flusher.is_dirty(PATH)
+    flusher.stop()
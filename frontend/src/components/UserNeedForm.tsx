@@ -40,7 +40,7 @@ function UserNeedForm({ need, userGroups, entities, workflowPhases, onSubmit, on
 
   const fetchNextId = async (userGroupId: string) => {
     try {
-      const res = await axios.get(`/api/next-id/${userGroupId}`)
+      const res = await axios.get(`/api/user-groups/next-id/${userGroupId}`)
       setFormData(prev => ({ ...prev, id: res.data.nextId }))
     } catch (err) {
       console.error('Failed to fetch next ID:', err)
@@ -74,8 +74,9 @@ function UserNeedForm({ need, userGroups, entities, workflowPhases, onSubmit, on
         .filter(c => c.length > 0)
     }
 
-    // Add ID for create operations
-    if (!need) {
+    // Add ID for create operations; auto IDs are allocated by the server on
+    // create, so the preview shown here never collides with another user's
+    if (!need && manualIdMode) {
       data.id = formData.id
     }
 
@@ -158,7 +158,7 @@ export class ApiService {
   // ==================== Next ID ====================
 
   async getNextId(userGroupId: string): Promise<{ nextId: string }> {
-    const response = await this.client.get<{ nextId: string }>(`/next-id/${userGroupId}`);
+    const response = await this.client.get<{ nextId: string }>(`/user-groups/next-id/${userGroupId}`);
     return response.data;
   }
 }
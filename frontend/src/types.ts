@@ -41,7 +41,7 @@ export interface UserNeed {
 }
 
 export interface UserNeedCreate {
-  id: string
+  id?: string
   userGroupId: string
   title: string
   description: string
@@ -9,6 +9,11 @@ export default defineConfig({
       '/api': {
         target: 'http://localhost:8000',
         changeOrigin: true,
+      },
+      // Workspace API prefix (/w/<name>/api/...)
+      '^/w/[^/]+/api(/|$)': {
+        target: 'http://localhost:8000',
+        changeOrigin: true,
       }
     }
   }